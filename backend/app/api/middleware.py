@@ -0,0 +1,82 @@
+"""
+ASGI middleware for request instrumentation
+Pure ASGI (no BaseHTTPMiddleware task hop) to keep per-request overhead low.
+"""
+import time
+from typing import Callable, Dict
+
+from app.services.metrics import (
+    http_requests, http_request_duration, db_queries_per_request, db_time_per_request, request_db_stats,
+)
+from app.services.query_profiler import query_profiler
+
+UNMATCHED_ROUTE = "unmatched"  # 404s etc.; keeps label cardinality bounded
+
+_route_paths: Dict[Callable, str] = {}
+
+def route_of(scope) -> str:
+    """Route template (e.g. /api/v1/signals/{signal_id}) of the endpoint that served the request"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    path = _route_paths.get(endpoint)
+    if path is None:
+        # The router stores the matched endpoint in the scope; map it back to its template
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                path = route.path
+                break
+        else:
+            path = UNMATCHED_ROUTE
+        _route_paths[endpoint] = path
+    return path
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = request_db_stats.set(db_stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_db_stats.reset(token)
+            route = route_of(scope)
+            method = scope["method"]
+            http_requests.labels(method, route, status[0]).inc()
+            http_request_duration.labels(method, route).observe(elapsed)
+            db_queries_per_request.labels(route).observe(db_stats[0])
+            db_time_per_request.labels(route).observe(db_stats[1])
+
+class QueryProfilerMiddleware:
+    """Attribute SQL statements to the request being served (see query_profiler.py)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = query_profiler.begin_request()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_profiler.end_request(
+                token, profile, scope["method"], route_of(scope), time.perf_counter() - started
+            )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, signals, zones, operators, traffic, emergency, ai_explanation, realtime
+from app.api.v1.endpoints import auth, signals, zones, operators, traffic, emergency, ai_explanation, realtime, metrics, edge
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -10,5 +10,7 @@ api_router.include_router(traffic.router, tags=["traffic"])
 api_router.include_router(emergency.router, tags=["emergency"])
 api_router.include_router(ai_explanation.router, tags=["ai-explanation"])
 api_router.include_router(realtime.router, tags=["realtime"])
+api_router.include_router(metrics.router, tags=["metrics"])
+api_router.include_router(edge.router, tags=["edge"])
 
 
@@ -63,6 +63,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         )
     return user
 
+def get_zone_scope(zone_id: str | None, current_user: models.User) -> str | None:
+    """Resolve the zone a request is restricted to (explicit zone, else operator's zone)"""
+    if zone_id:
+        return zone_id
+    if current_user.role == models.UserRole.OPERATOR and current_user.zone_id:
+        return current_user.zone_id
+    return None
+
 @router.post("/login", response_model=Token)
 async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """Login endpoint"""
@@ -0,0 +1,82 @@
+"""
+Edge Agent API Endpoints
+Receives compressed per-interval summary batches from edge agents
+(see edge_agent/ at the repository root) and feeds them to the ingestion gateway.
+"""
+import asyncio
+import hmac
+import json
+import zlib
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from pydantic import BaseModel, Field, ValidationError
+
+from app.core.config import settings
+from app.services.edge_ingestion import edge_gateway
+
+router = APIRouter()
+
+class EdgeSummary(BaseModel):
+    signal_id: str
+    timestamp: float  # Interval end, epoch seconds
+    interval_seconds: float = Field(gt=0)
+    vehicle_count: int = Field(ge=0, le=10000)
+    pedestrian_count: int = Field(ge=0, le=10000)
+    queue_length: int = Field(ge=0, le=10000)
+    density: float = Field(ge=0.0, le=1.0)
+    queue_p90: int = 0
+    queue_max: int = 0
+    detections: int = 0
+
+class EdgeBatch(BaseModel):
+    agent_id: str
+    summaries: List[EdgeSummary]
+
+def read_batch(body: bytes, content_encoding: Optional[str]) -> EdgeBatch:
+    """Decompress (gzip) and validate an upload, bounding the decompressed size"""
+    if content_encoding and content_encoding.lower() == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, settings.EDGE_AGENT_MAX_BATCH_BYTES)
+        except zlib.error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip body")
+        if decompressor.unconsumed_tail:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large")
+    elif len(body) > settings.EDGE_AGENT_MAX_BATCH_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large")
+    try:
+        return EdgeBatch.model_validate(json.loads(body))
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+@router.post("/edge/batches")
+async def upload_edge_batch(
+    request: Request,
+    x_edge_token: str = Header(default=""),
+    content_encoding: Optional[str] = Header(default=None),
+):
+    """Accept a batch of per-interval summaries from an edge agent"""
+    if not settings.EDGE_AGENT_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Edge agent uploads are disabled")
+    if not hmac.compare_digest(x_edge_token.encode(), settings.EDGE_AGENT_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid edge token")
+
+    batch = read_batch(await request.body(), content_encoding)
+    if not edge_gateway.signals:
+        await asyncio.to_thread(edge_gateway.load_signals)
+
+    accepted = edge_gateway.submit([
+        (s.signal_id, s.vehicle_count, s.pedestrian_count, s.queue_length, s.density, int(s.timestamp * 1000),
+         int(s.interval_seconds * 1000))
+        for s in batch.summaries
+    ])
+    if not edge_gateway.running:
+        # No flush loop in this process; write the batch now
+        await edge_gateway.flush()
+
+    return {
+        "agent_id": batch.agent_id,
+        "received": len(batch.summaries),
+        "accepted": accepted,
+    }
@@ -3,12 +3,16 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
+import asyncio
 import uuid
 import math
 
 from app.db.database import get_db
 from app.db import models
 from app.api.v1.endpoints.auth import get_current_user
+from app.services.data_version import data_versions
+from app.services.signal_state import signal_state
+from app.services.routing import emergency_router
 
 router = APIRouter()
 
@@ -36,6 +40,9 @@ class EmergencyRouteResponse(BaseModel):
     estimated_arrival: Optional[datetime] = None
     signals_cleared: List[str] = []
     created_by: Optional[str] = None
+    distance_km: Optional[float] = None
+    path: List[List[float]] = []  # [lon, lat] points
+    routing: str = "straight_line"  # "road_graph" when routed over the road network
 
 class EmergencyVehicleRequest(BaseModel):
     vehicle_type: str = "ambulance"
@@ -79,9 +86,35 @@ def find_signals_along_route(start_lat: float, start_lon: float, end_lat: float,
     
     return route_signals
 
+def plan_route(start_lat: float, start_lon: float, end_lat: float, end_lon: float, db: Session) -> dict:
+    """Fastest road route (path, signals on it, congestion-aware minutes); the straight line at
+    60 km/h when there is no road graph or an end is off the mapped network. Blocking (a graph
+    search and database reads): handlers run it in a worker thread"""
+    plan = emergency_router.route(start_lat, start_lon, end_lat, end_lon, db)
+    if plan is not None:
+        return {
+            "routing": "road_graph",
+            "path": plan["path"],
+            "distance_km": plan["distance_m"] / 1000,
+            "minutes": plan["duration_s"] / 60,
+            "signal_ids": plan["signal_ids"],
+        }
+    distance_km = calculate_distance(start_lat, start_lon, end_lat, end_lon)
+    return {
+        "routing": "straight_line",
+        "path": [[start_lon, start_lat], [end_lon, end_lat]],
+        "distance_km": distance_km,
+        "minutes": (distance_km / 60) * 60,  # Assuming 60 km/h average speed
+        "signal_ids": [
+            s.id for s in find_signals_along_route(start_lat, start_lon, end_lat, end_lon, db, radius_km=0.5)
+        ],
+    }
+
 def clear_signals_for_emergency(signal_ids: List[str], db: Session):
     """Clear signals (set to green) for emergency vehicle"""
     cleared = []
+    updated = []
+    zone_ids = set()
     for signal_id in signal_ids:
         signal = db.query(models.Signal).filter(models.Signal.id == signal_id).first()
         if signal:
@@ -90,7 +123,12 @@ def clear_signals_for_emergency(signal_ids: List[str], db: Session):
             signal.green_time = 60  # Extended green time for emergency
             signal.mode = models.ControlMode.MANUAL  # Manual mode for emergency
             cleared.append(signal_id)
+            updated.append(signal)
+            zone_ids.add(signal.zone_id)
     db.commit()
+    signal_state.update_signals(updated)
+    for zone_id in zone_ids:
+        data_versions.bump(zone_id)
     return cleared
 
 @router.post("/emergency/routes", response_model=EmergencyRouteResponse)
@@ -109,31 +147,22 @@ async def create_emergency_route(
     
     route_id = str(uuid.uuid4())
     
-    # Find signals along the route
-    route_signals = []
+    # Route over the road network, with the signals on the path
+    plan = await asyncio.to_thread(
+        plan_route,
+        route_data.start_latitude,
+        route_data.start_longitude,
+        route_data.end_latitude,
+        route_data.end_longitude,
+        db,
+    )
     signals_cleared = []
     
-    if route_data.clear_signals:
-        route_signals = find_signals_along_route(
-            route_data.start_latitude,
-            route_data.start_longitude,
-            route_data.end_latitude,
-            route_data.end_longitude,
-            db,
-            radius_km=0.5  # 500m radius
-        )
-        
-        if route_signals:
-            signal_ids = [s.id for s in route_signals]
-            signals_cleared = clear_signals_for_emergency(signal_ids, db)
+    if route_data.clear_signals and plan["signal_ids"]:
+        signals_cleared = clear_signals_for_emergency(plan["signal_ids"], db)
     
-    # Calculate estimated arrival (assuming 60 km/h average speed)
-    distance_km = calculate_distance(
-        route_data.start_latitude, route_data.start_longitude,
-        route_data.end_latitude, route_data.end_longitude
-    )
-    estimated_minutes = (distance_km / 60) * 60  # Convert to minutes
-    estimated_arrival = datetime.utcnow() + timedelta(minutes=int(estimated_minutes))
+    # Estimated arrival from the congestion-aware travel time
+    estimated_arrival = datetime.utcnow() + timedelta(minutes=plan["minutes"])
     
     route = {
         "id": route_id,
@@ -150,6 +179,9 @@ async def create_emergency_route(
         "created_by_name": current_user.name,
         "signals_cleared": signals_cleared,
         "estimated_arrival": estimated_arrival,
+        "distance_km": plan["distance_km"],
+        "path": plan["path"],
+        "routing": plan["routing"],
     }
     
     emergency_routes[route_id] = route
@@ -168,6 +200,9 @@ async def create_emergency_route(
         estimated_arrival=route["estimated_arrival"],
         signals_cleared=signals_cleared,
         created_by=current_user.name,
+        distance_km=route["distance_km"],
+        path=route["path"],
+        routing=route["routing"],
     )
 
 @router.get("/emergency/routes/active", response_model=List[EmergencyRouteResponse])
@@ -193,6 +228,9 @@ async def get_active_routes(
             estimated_arrival=r.get("estimated_arrival"),
             signals_cleared=r.get("signals_cleared", []),
             created_by=r.get("created_by_name"),
+            distance_km=r.get("distance_km"),
+            path=r.get("path", []),
+            routing=r.get("routing", "straight_line"),
         )
         for r in active
     ]
@@ -214,12 +252,19 @@ async def deactivate_route(
     route = emergency_routes[route_id]
     signal_ids = route.get("signals_cleared", [])
     
+    restored = []
+    zone_ids = set()
     for signal_id in signal_ids:
         signal = db.query(models.Signal).filter(models.Signal.id == signal_id).first()
         if signal:
             signal.mode = models.ControlMode.AUTO  # Restore auto mode
             signal.green_time = 30  # Restore normal green time
+            restored.append(signal)
+            zone_ids.add(signal.zone_id)
     db.commit()
+    signal_state.update_signals(restored)
+    for zone_id in zone_ids:
+        data_versions.bump(zone_id)
     
     emergency_routes[route_id]["active"] = False
     
@@ -238,21 +283,20 @@ async def clear_signals_emergency(
             detail="Only Super Admin and Operators can clear signals"
         )
     
-    # Find signals near the emergency vehicle
-    route_signals = find_signals_along_route(
+    # Find signals on the emergency vehicle's route
+    plan = await asyncio.to_thread(
+        plan_route,
         request.current_latitude,
         request.current_longitude,
         request.destination_latitude,
         request.destination_longitude,
         db,
-        radius_km=0.5
     )
     
-    if not route_signals:
+    if not plan["signal_ids"]:
         return {"message": "No signals found along route", "signals_cleared": []}
     
-    signal_ids = [s.id for s in route_signals]
-    signals_cleared = clear_signals_for_emergency(signal_ids, db)
+    signals_cleared = clear_signals_for_emergency(plan["signal_ids"], db)
     
     return {
         "message": f"Cleared {len(signals_cleared)} signals for emergency vehicle",
@@ -0,0 +1,95 @@
+"""
+Metrics API Endpoints
+Exposes in-process performance counters for monitoring
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.db import models
+from app.api.v1.endpoints.auth import get_current_user
+from app.services.response_cache import response_cache
+from app.services.edge_ingestion import edge_gateway
+from app.services.query_profiler import query_profiler
+from app.services.loop_monitor import loop_monitor
+from app.services.signal_state import signal_state
+from app.core.config import settings
+
+router = APIRouter()
+
+@router.get("/metrics/cache")
+async def get_cache_metrics(
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get response cache hit rate and recompute timings"""
+    if current_user.role != models.UserRole.SUPER_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can view metrics"
+        )
+    return {"response_cache": response_cache.stats()}
+
+@router.get("/metrics/edge")
+async def get_edge_metrics(
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get edge ingestion gateway counters"""
+    if current_user.role != models.UserRole.SUPER_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can view metrics"
+        )
+    return {
+        "edge_ingestion": {
+            **edge_gateway.stats,
+            "running": edge_gateway.running,
+            "pending_readings": edge_gateway.pending_readings,
+            "pending_signals": len(edge_gateway.pending),
+            "tcp_connections": len(edge_gateway.tcp_transports),
+            "paused": edge_gateway.paused,
+        }
+    }
+
+@router.get("/metrics/queries")
+async def get_query_metrics(
+    top: int = Query(20, ge=1, le=200),
+    reset: bool = False,
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get per-route SQL query counts and the most expensive statements"""
+    if current_user.role != models.UserRole.SUPER_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can view metrics"
+        )
+    if not settings.QUERY_PROFILER_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query profiler is disabled (set QUERY_PROFILER_ENABLED=true)"
+        )
+    stats = query_profiler.stats(top)
+    if reset:
+        query_profiler.reset()
+    return {"query_profiler": stats}
+
+@router.get("/metrics/loop")
+async def get_loop_metrics(
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get event-loop lag and recent blocking stalls with their stacks"""
+    if current_user.role != models.UserRole.SUPER_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can view metrics"
+        )
+    return {"event_loop": loop_monitor.stats()}
+
+@router.get("/metrics/signal-state")
+async def get_signal_state_metrics(
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get the shared-memory signal state: segment, load timings and fill"""
+    if current_user.role != models.UserRole.SUPER_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can view metrics"
+        )
+    return {"signal_state": signal_state.stats()}
@@ -2,12 +2,15 @@
 Real-Time Data API Endpoints
 Provides access to real-time traffic data from free public sources
 """
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.db.database import get_db
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_zone_scope
 from app.db import models
 from app.services.realtime_data_service import realtime_data_service
+from app.services.road_graph import road_graph
+from app.services.weather import weather_provider
 
 router = APIRouter()
 
@@ -26,33 +29,42 @@ async def get_traffic_pattern(
 async def get_weather_data(
     current_user: models.User = Depends(get_current_user),
 ):
-    """Get current weather data (affects traffic)"""
+    """Get current weather data (affects traffic), the same cached value the realtime tick uses"""
     weather = await realtime_data_service.fetch_weather_data()
     return {
         "weather": weather,
+        "cache": weather_provider.stats(),
         "message": "Weather data affecting traffic conditions",
     }
 
 @router.get("/realtime/road-congestion")
 async def get_road_congestion(
+    zone_id: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=50000),
     current_user: models.User = Depends(get_current_user),
 ):
-    """Get current road congestion levels"""
-    congestion = await realtime_data_service.update_road_congestion()
+    """Get live congestion per road segment (most congested first), optionally for one zone"""
+    scope = get_zone_scope(zone_id, current_user)
+    congestion = await realtime_data_service.update_road_congestion(scope, limit, geometry=True)
     return {
         "congestion": congestion,
-        "message": "Real-time road congestion based on time and weather",
+        "segments": congestion.pop("segments"),
+        "message": "Real-time road congestion from live signal readings per road segment",
     }
 
 @router.get("/realtime/osm-data")
 async def get_osm_data(
+    include_roads: bool = False,
+    limit: int = Query(1000, ge=1, le=50000),
     current_user: models.User = Depends(get_current_user),
 ):
-    """Get OpenStreetMap road network data for Mumbai"""
+    """Get OpenStreetMap road network data for Mumbai (graph summary, optionally road segments as GeoJSON)"""
     if current_user.role != models.UserRole.SUPER_ADMIN:
         return {"error": "Only Super Admin can access OSM data"}
     
     osm_data = await realtime_data_service.fetch_openstreetmap_traffic()
+    if include_roads and osm_data["success"]:
+        osm_data["roads"] = road_graph.get().features(limit)
     return {
         "osm_data": osm_data,
         "message": "OpenStreetMap road network data",
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import Optional
 from pydantic import BaseModel
+import json
 
 from app.db.database import get_db
 from app.db import models
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_zone_scope
+from app.api.v1.conditional import etag_matches, set_etag, not_modified
+from app.services.response_cache import response_cache
+from app.services.data_version import data_versions
+from app.services.road_segments import road_segments
+from app.services.signal_state import signal_state
 
 router = APIRouter()
 
@@ -25,40 +31,111 @@ class SignalResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Columns that can be requested with ?fields= (all SignalResponse fields)
+SIGNAL_FIELDS = list(SignalResponse.model_fields)
+SIGNAL_ENUM_FIELDS = {"status", "current_phase", "mode"}
+MAX_SIGNAL_PAGE_SIZE = 5000
+
 @router.get("/signals", response_model=list[SignalResponse])
 async def get_signals(
+    request: Request,
     zone_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all traffic signals, optionally filtered by zone"""
-    query = db.query(models.Signal)
+    """Get traffic signals, optionally filtered by zone.
+    
+    Pagination is keyset-based on signal_id: pass `limit`, then the
+    `X-Next-Cursor` header value as `after` for the next page.
+    `fields` is a comma-separated subset of columns to return.
+    """
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in SIGNAL_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(SIGNAL_FIELDS)}"
+            )
+    else:
+        selected = SIGNAL_FIELDS
+    if limit is not None and not 1 <= limit <= MAX_SIGNAL_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {MAX_SIGNAL_PAGE_SIZE}"
+        )
+    
+    scope = get_zone_scope(zone_id, current_user)
+    etag = data_versions.etag(scope)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    body, next_cursor = await response_cache.get_or_compute(
+        "signals", scope, {"fields": ",".join(selected), "after": after, "limit": limit},
+        lambda: load_signal_page(scope, selected, after, limit, db)
+    )
+    response = Response(content=body, media_type="application/json")
+    set_etag(response, etag)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+async def load_signal_page(
+    zone_id: Optional[str],
+    fields: list[str],
+    after: Optional[str],
+    limit: Optional[int],
+    db: Session,
+) -> tuple[bytes, Optional[str]]:
+    """One page of signals from the shared signal state, or from the database if it is unavailable"""
+    page = signal_state.signals_page(zone_id, fields, after, limit)
+    if page is None:
+        page = await list_signals(zone_id, fields, after, limit, db)
+    return page
+
+async def list_signals(
+    zone_id: Optional[str],
+    fields: list[str],
+    after: Optional[str],
+    limit: Optional[int],
+    db: Session,
+) -> tuple[bytes, Optional[str]]:
+    """Load one page of signals for a zone scope (None = all zones) as encoded JSON.
+    
+    Rows come straight from the database, so they are serialized directly
+    instead of being validated through SignalResponse.
+    """
+    # signal_id is always selected because it is the pagination key
+    columns = fields if "signal_id" in fields else fields + ["signal_id"]
+    query = db.query(*[getattr(models.Signal, name) for name in columns])
     
     # Filter by zone if provided
     if zone_id:
         query = query.filter(models.Signal.zone_id == zone_id)
-    # If user is operator, filter by their zone
-    elif current_user.role == models.UserRole.OPERATOR and current_user.zone_id:
-        query = query.filter(models.Signal.zone_id == current_user.zone_id)
-    
-    signals = query.all()
-    
-    return [
-        SignalResponse(
-            id=signal.id,
-            signal_id=signal.signal_id,
-            zone_id=signal.zone_id,
-            latitude=signal.latitude,
-            longitude=signal.longitude,
-            status=signal.status.value if hasattr(signal.status, 'value') else str(signal.status),
-            current_phase=signal.current_phase.value if hasattr(signal.current_phase, 'value') else str(signal.current_phase),
-            green_time=signal.green_time,
-            yellow_time=signal.yellow_time,
-            red_time=signal.red_time,
-            mode=signal.mode.value if hasattr(signal.mode, 'value') else str(signal.mode),
-        )
-        for signal in signals
-    ]
+    if after:
+        query = query.filter(models.Signal.signal_id > after)
+    query = query.order_by(models.Signal.signal_id)
+    if limit:
+        query = query.limit(limit + 1)  # One extra row tells us whether there is a next page
+    
+    rows = query.all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].signal_id
+    
+    enum_fields = [name for name in fields if name in SIGNAL_ENUM_FIELDS]
+    items = []
+    for row in rows:
+        item = {name: getattr(row, name) for name in fields}
+        for name in enum_fields:
+            item[name] = item[name].value
+        items.append(item)
+    
+    return json.dumps(items, separators=(",", ":")).encode("utf-8"), next_cursor
 
 @router.get("/signals/{signal_id}", response_model=SignalResponse)
 async def get_signal(
@@ -149,8 +226,13 @@ async def update_signal(
             else:
                 setattr(signal, key, value)
     
+    status_changed = 'status' in update_data
     db.commit()
     db.refresh(signal)
+    signal_state.update_signals([signal])
+    if status_changed:
+        road_segments.stale = True  # Only signals in service are joined to the road segments
+    data_versions.bump(signal.zone_id)
     
     return SignalResponse(
         id=signal.id,
@@ -206,6 +288,8 @@ async def update_signal_timing(
     
     db.commit()
     db.refresh(signal)
+    signal_state.update_signals([signal])
+    data_versions.bump(signal.zone_id)
     
     return SignalResponse(
         id=signal.id,
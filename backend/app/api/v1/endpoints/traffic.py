@@ -1,15 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import func, case, distinct, and_
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
+import csv
+import io
+import json
+import math
 
 from app.db.database import get_db
 from app.db import models
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_zone_scope
+from app.api.v1.conditional import etag_matches, set_etag, not_modified
+from app.services.response_cache import response_cache
+from app.services.data_version import data_versions
+from app.services.demand_profiles import demand_profiles, slot_of, confidence_from_variance, STRIDE
+from app.services.forecasting import forecaster
+from app.services.signal_state import signal_state
 
 router = APIRouter()
 
+# Rows fetched per server-side cursor batch (and flushed per response chunk) for exports
+EXPORT_CHUNK_ROWS = 1000
+
+EXPORT_COLUMNS = [
+    "timestamp",
+    "signal_id",
+    "signal_code",
+    "zone_id",
+    "vehicle_count",
+    "pedestrian_count",
+    "queue_length",
+    "density",
+]
+
 class TrafficStatsResponse(BaseModel):
     total_vehicles: int
     total_signals: int
@@ -27,43 +53,77 @@ class TrafficHistoryItem(BaseModel):
 
 @router.get("/traffic/stats", response_model=TrafficStatsResponse)
 async def get_traffic_stats(
+    request: Request,
+    response: Response,
     zone_id: Optional[str] = None,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get accurate traffic statistics from real data"""
+    scope = get_zone_scope(zone_id, current_user)
+    etag = data_versions.etag(scope)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await response_cache.get_or_compute(
+        "traffic_stats", scope, None, lambda: current_traffic_stats(scope, db)
+    )
+
+async def current_traffic_stats(zone_id: Optional[str], db: Session) -> TrafficStatsResponse:
+    """Traffic statistics from the shared signal state, or from the database if it is unavailable"""
+    totals = signal_state.traffic_totals(zone_id)
+    if totals is None:
+        return await calculate_traffic_stats(zone_id, db)
+    return traffic_stats_from_totals(zone_id, totals)
+
+async def calculate_traffic_stats(zone_id: Optional[str], db: Session) -> TrafficStatsResponse:
+    """Compute traffic statistics for a zone scope (None = all zones) from the database"""
     # Filter by zone
     query = db.query(models.Signal)
     if zone_id:
         query = query.filter(models.Signal.zone_id == zone_id)
-    elif current_user.role == models.UserRole.OPERATOR and current_user.zone_id:
-        query = query.filter(models.Signal.zone_id == current_user.zone_id)
     
     signals = query.all()
     active_signals = [s for s in signals if s.status == models.SignalStatus.ACTIVE]
     
     # Get real traffic data from logs
-    signal_ids = [s.id for s in signals]
+    signal_keys = [s.log_key for s in signals]
     
-    # Get MOST RECENT logs (last 10 minutes) for real-time congestion
-    ten_minutes_ago = datetime.utcnow() - timedelta(minutes=10)
-    recent_logs = db.query(models.TrafficLog).filter(
-        models.TrafficLog.signal_id.in_(signal_ids),
-        models.TrafficLog.timestamp >= ten_minutes_ago
-    ).order_by(models.TrafficLog.timestamp.desc()).all()
+    def log_totals(since: datetime):
+        return db.query(
+            func.count(models.TrafficLog.id),
+            func.coalesce(func.sum(models.TrafficLog.vehicle_count), 0),
+            func.coalesce(func.sum(models.TrafficLog.density), 0.0),
+        ).filter(
+            models.TrafficLog.signal_key.in_(signal_keys),
+            models.TrafficLog.timestamp >= since
+        ).one()
     
-    # Also get logs from last hour for total vehicles calculation
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    hourly_logs = db.query(models.TrafficLog).filter(
-        models.TrafficLog.signal_id.in_(signal_ids),
-        models.TrafficLog.timestamp >= one_hour_ago
-    ).all()
+    # MOST RECENT logs (last 10 minutes) for real-time congestion, last hour for total vehicles
+    recent_logs, recent_vehicles, recent_density = log_totals(datetime.utcnow() - timedelta(minutes=10))
+    hourly_logs, hourly_vehicles, hourly_density = log_totals(datetime.utcnow() - timedelta(hours=1))
+    
+    return traffic_stats_from_totals(zone_id, {
+        "total_signals": len(signals),
+        "active_signals": len(active_signals),
+        "recent_logs": recent_logs,
+        "recent_vehicles": recent_vehicles,
+        "recent_density": recent_density,
+        "hourly_logs": hourly_logs,
+        "hourly_vehicles": hourly_vehicles,
+        "hourly_density": hourly_density,
+    })
+
+def traffic_stats_from_totals(zone_id: Optional[str], totals: dict) -> TrafficStatsResponse:
+    """Build the stats response from signal counts and log totals of the last 10 minutes / hour"""
+    recent_logs = totals["recent_logs"]
+    hourly_logs = totals["hourly_logs"]
     
     # Calculate real-time congestion from most recent logs (last 10 minutes)
     if recent_logs:
         # Use most recent logs for current congestion
-        current_density = sum(log.density for log in recent_logs) / len(recent_logs) if recent_logs else 0.5
-        current_vehicles = sum(log.vehicle_count for log in recent_logs)
+        current_density = totals["recent_density"] / recent_logs
+        current_vehicles = totals["recent_vehicles"]
         
         # Calculate average speed based on density
         avg_speed = 60 - (current_density * 40)  # 60 km/h at 0 density, 20 km/h at 1.0 density
@@ -77,12 +137,12 @@ async def get_traffic_stats(
             congestion_level = "low"
         
         # Total vehicles from last hour
-        total_vehicles = sum(log.vehicle_count for log in hourly_logs) if hourly_logs else current_vehicles
+        total_vehicles = totals["hourly_vehicles"] if hourly_logs else current_vehicles
     else:
         # Fallback: use hourly logs if no recent data
         if hourly_logs:
-            avg_density = sum(log.density for log in hourly_logs) / len(hourly_logs)
-            total_vehicles = sum(log.vehicle_count for log in hourly_logs)
+            avg_density = totals["hourly_density"] / hourly_logs
+            total_vehicles = totals["hourly_vehicles"]
             avg_speed = 60 - (avg_density * 40)
             
             if avg_density > 0.7:
@@ -93,25 +153,25 @@ async def get_traffic_stats(
                 congestion_level = "low"
         else:
             # Final fallback
-            total_vehicles = len(signals) * 45
+            total_vehicles = totals["total_signals"] * 45
             avg_speed = 35.0
             congestion_level = "medium"
     
     # Calculate current congestion percentage (0-100)
     current_congestion_pct = 0.0
     if recent_logs:
-        current_congestion_pct = (sum(log.density for log in recent_logs) / len(recent_logs)) * 100
+        current_congestion_pct = (totals["recent_density"] / recent_logs) * 100
     elif hourly_logs:
-        current_congestion_pct = (sum(log.density for log in hourly_logs) / len(hourly_logs)) * 100
+        current_congestion_pct = (totals["hourly_density"] / hourly_logs) * 100
     
     return TrafficStatsResponse(
-        total_vehicles=total_vehicles,
-        total_signals=len(signals),
-        active_signals=len(active_signals),
+        total_vehicles=round(total_vehicles),
+        total_signals=totals["total_signals"],
+        active_signals=totals["active_signals"],
         avg_speed=round(avg_speed, 1),
         congestion_level=congestion_level,
         current_congestion=round(current_congestion_pct, 1),  # Real-time congestion percentage
-        zone_id=zone_id or (current_user.zone_id if current_user.role == models.UserRole.OPERATOR else None),
+        zone_id=zone_id,
     )
 
 @router.get("/traffic/history")
@@ -131,7 +191,7 @@ async def get_traffic_history(
         query = query.filter(models.Signal.zone_id == current_user.zone_id)
     
     signals = query.all()
-    signal_ids = [s.id for s in signals]
+    signal_keys = [s.log_key for s in signals]
     
     # Parse time range
     start_time = datetime.fromisoformat(start.replace('Z', '+00:00'))
@@ -139,7 +199,7 @@ async def get_traffic_history(
     
     # Get real traffic logs
     logs = db.query(models.TrafficLog).filter(
-        models.TrafficLog.signal_id.in_(signal_ids),
+        models.TrafficLog.signal_key.in_(signal_keys),
         models.TrafficLog.timestamp >= start_time,
         models.TrafficLog.timestamp <= end_time
     ).order_by(models.TrafficLog.timestamp).all()
@@ -157,7 +217,7 @@ async def get_traffic_history(
             }
         history_dict[hour_key]["vehicle_counts"].append(log.vehicle_count)
         history_dict[hour_key]["densities"].append(log.density)
-        history_dict[hour_key]["signal_ids"].add(log.signal_id)
+        history_dict[hour_key]["signal_ids"].add(log.signal_key)
     
     # Convert to response format
     history = []
@@ -172,40 +232,154 @@ async def get_traffic_history(
     
     return {"history": history}
 
+@router.get("/traffic/history/export")
+async def export_traffic_history(
+    start: str,
+    end: str,
+    format: str = "csv",
+    zone_id: Optional[str] = None,
+    signal_id: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream raw traffic logs as CSV or NDJSON without loading them into memory"""
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'csv' or 'ndjson'"
+        )
+    
+    # Parse time range
+    start_time = datetime.fromisoformat(start.replace('Z', '+00:00'))
+    end_time = datetime.fromisoformat(end.replace('Z', '+00:00'))
+    
+    # Select plain columns (no ORM entities) joined to signals for zone filtering
+    query = db.query(
+        models.TrafficLog.timestamp,
+        models.Signal.id,
+        models.Signal.signal_id,
+        models.Signal.zone_id,
+        models.TrafficLog.vehicle_count,
+        models.TrafficLog.pedestrian_count,
+        models.TrafficLog.queue_length,
+        models.TrafficLog.density,
+    ).join(
+        models.Signal, models.TrafficLog.signal_key == models.Signal.log_key
+    ).filter(
+        models.TrafficLog.timestamp >= start_time,
+        models.TrafficLog.timestamp <= end_time
+    )
+    
+    # Filter by zone
+    if zone_id:
+        query = query.filter(models.Signal.zone_id == zone_id)
+    elif current_user.role == models.UserRole.OPERATOR and current_user.zone_id:
+        query = query.filter(models.Signal.zone_id == current_user.zone_id)
+    
+    if signal_id:
+        query = query.filter(models.Signal.id == signal_id)
+    
+    # yield_per streams rows from a server-side cursor instead of buffering the result
+    rows = query.order_by(models.TrafficLog.timestamp).yield_per(EXPORT_CHUNK_ROWS)
+    
+    def serialize(row) -> list:
+        values = list(row)
+        values[0] = values[0].isoformat() if values[0] else None
+        return values
+    
+    def iter_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(serialize(row))
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    def iter_ndjson():
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(dict(zip(EXPORT_COLUMNS, serialize(row)))))
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+    
+    if format == "csv":
+        body, media_type = iter_csv(), "text/csv"
+    else:
+        body, media_type = iter_ndjson(), "application/x-ndjson"
+    
+    filename = f"traffic_history_{start_time:%Y%m%d%H%M}_{end_time:%Y%m%d%H%M}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/traffic/zones")
 async def get_traffic_zones(
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get zones with real traffic data"""
-    if current_user.role == models.UserRole.OPERATOR and current_user.zone_id:
-        zones = db.query(models.Zone).filter(models.Zone.id == current_user.zone_id).all()
-    else:
-        zones = db.query(models.Zone).all()
-    
-    result = []
+    scope = get_zone_scope(None, current_user)
+    etag = data_versions.etag(scope)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await response_cache.get_or_compute(
+        "traffic_zones", scope, None, lambda: calculate_traffic_zones(scope, db)
+    )
+
+async def calculate_traffic_zones(zone_id: Optional[str], db: Session) -> dict:
+    """Compute per-zone traffic aggregates for a zone scope (None = all zones)"""
     one_hour_ago = datetime.utcnow() - timedelta(hours=1)
     
-    for zone in zones:
-        signals = db.query(models.Signal).filter(models.Signal.zone_id == zone.id).all()
-        signal_ids = [s.id for s in signals]
-        
-        # Get real traffic data for this zone
-        recent_logs = db.query(models.TrafficLog).filter(
-            models.TrafficLog.signal_id.in_(signal_ids),
-            models.TrafficLog.timestamp >= one_hour_ago
-        ).all()
-        
-        total_vehicles = sum(log.vehicle_count for log in recent_logs) if recent_logs else 0
-        avg_congestion = (sum(log.density for log in recent_logs) / len(recent_logs) * 100) if recent_logs else 0
-        
+    # One grouped query: zones -> signals -> last hour of logs, aggregated per zone.
+    # Signal counts use DISTINCT because each signal row repeats once per joined log.
+    active_signal_id = case(
+        (models.Signal.status == models.SignalStatus.ACTIVE, models.Signal.id)
+    )
+    query = db.query(
+        models.Zone.id,
+        models.Zone.name,
+        models.Zone.city,
+        func.count(distinct(models.Signal.id)).label("signal_count"),
+        func.count(distinct(active_signal_id)).label("active_signals"),
+        func.coalesce(func.sum(models.TrafficLog.vehicle_count), 0).label("total_vehicles"),
+        func.avg(models.TrafficLog.density).label("avg_density"),
+    ).outerjoin(
+        models.Signal, models.Signal.zone_id == models.Zone.id
+    ).outerjoin(
+        models.TrafficLog,
+        and_(
+            models.TrafficLog.signal_key == models.Signal.log_key,
+            models.TrafficLog.timestamp >= one_hour_ago,
+        )
+    )
+    
+    if zone_id:
+        query = query.filter(models.Zone.id == zone_id)
+    
+    rows = query.group_by(models.Zone.id, models.Zone.name, models.Zone.city).all()
+    
+    result = []
+    for row in rows:
+        avg_congestion = (row.avg_density * 100) if row.avg_density is not None else 0
         result.append({
-            "id": zone.id,
-            "name": zone.name,
-            "city": zone.city,
-            "signal_count": len(signals),
-            "active_signals": len([s for s in signals if s.status == models.SignalStatus.ACTIVE]),
-            "total_vehicles": total_vehicles,
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "signal_count": row.signal_count,
+            "active_signals": row.active_signals,
+            "total_vehicles": int(row.total_vehicles),
             "avg_congestion": round(avg_congestion, 1),
         })
     
@@ -213,37 +387,51 @@ async def get_traffic_zones(
 
 @router.get("/traffic/predictions")
 async def get_traffic_predictions(
+    request: Request,
+    response: Response,
     hours: int = 6,
     zone_id: Optional[str] = None,
+    signal_id: Optional[str] = None,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get traffic predictions for next N hours based on historical patterns"""
-    # Simple statistics without numpy
-    def mean(values):
-        return sum(values) / len(values) if values else 0
-    
-    # Filter signals by zone
-    query = db.query(models.Signal)
-    if zone_id:
-        query = query.filter(models.Signal.zone_id == zone_id)
-    elif current_user.role == models.UserRole.OPERATOR and current_user.zone_id:
-        query = query.filter(models.Signal.zone_id == current_user.zone_id)
-    
-    signals = query.all()
-    signal_ids = [s.id for s in signals]
-    
-    # Get historical data (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    logs = db.query(models.TrafficLog).filter(
-        models.TrafficLog.signal_id.in_(signal_ids),
-        models.TrafficLog.timestamp >= seven_days_ago
-    ).order_by(models.TrafficLog.timestamp).all()
+    scope = get_zone_scope(zone_id, current_user)
+    signal_key = None
+    if signal_id:
+        query = db.query(models.Signal.log_key).filter(models.Signal.id == signal_id)
+        if scope:
+            query = query.filter(models.Signal.zone_id == scope)
+        signal_key = query.scalar()
+        if signal_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Signal not found"
+            )
+    # Predictions are anchored to the current hour, so it is part of the version
+    current_hour = datetime.utcnow().strftime("%Y%m%d%H")
+    etag = data_versions.etag(scope, hours, signal_id or "", current_hour)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await response_cache.get_or_compute(
+        "traffic_predictions", scope, {"hours": hours, "signal_id": signal_id},
+        lambda: calculate_traffic_predictions(hours, scope, db, signal_key)
+    )
+
+async def calculate_traffic_predictions(hours: int, zone_id: Optional[str], db: Session,
+                                        signal_key: Optional[int] = None) -> dict:
+    """Predict the next N hours from the signal's or zone's hour-of-week demand profile"""
+    await demand_profiles.ensure_loaded_async()
+    if signal_key is not None:
+        profile = demand_profiles.get(signal_key=signal_key)
+    else:
+        profile = demand_profiles.get(zone_id=zone_id)
+    current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
     
-    if not logs:
+    if profile is None or not any(profile[0::STRIDE]):
         # Fallback: generate basic predictions
         predictions = []
-        current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
         for i in range(hours):
             hour_time = current_hour + timedelta(hours=i+1)
             predictions.append({
@@ -254,67 +442,76 @@ async def get_traffic_predictions(
             })
         return {"predictions": predictions}
     
-    # Group by hour of day to find patterns
-    hourly_patterns = {}
-    for log in logs:
-        hour = log.timestamp.hour
-        if hour not in hourly_patterns:
-            hourly_patterns[hour] = {"vehicles": [], "densities": []}
-        hourly_patterns[hour]["vehicles"].append(log.vehicle_count)
-        hourly_patterns[hour]["densities"].append(log.density)
-    
-    # Calculate averages per hour
-    hourly_avg = {}
-    for hour, data in hourly_patterns.items():
-        hourly_avg[hour] = {
-            "vehicles": mean(data["vehicles"]) if data["vehicles"] else 0,
-            "density": mean(data["densities"]) if data["densities"] else 0.5,
-        }
-    
-    # Generate predictions based on time-of-day patterns
     predictions = []
-    current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
-    
     for i in range(hours):
         future_hour = current_hour + timedelta(hours=i+1)
-        hour_of_day = future_hour.hour
-        
-        # Get pattern for this hour
-        if hour_of_day in hourly_avg:
-            base_vehicles = hourly_avg[hour_of_day]["vehicles"]
-            base_density = hourly_avg[hour_of_day]["density"]
-        else:
-            # Use overall average
-            all_vehicles = [v["vehicles"] for v in hourly_avg.values()]
-            all_densities = [v["density"] for v in hourly_avg.values()]
-            base_vehicles = mean(all_vehicles) if all_vehicles else 200
-            base_density = mean(all_densities) if all_densities else 0.5
-        
-        # Apply trend (rush hour adjustments)
-        # Morning rush: 7-9 AM, Evening rush: 5-7 PM
-        if 7 <= hour_of_day <= 9 or 17 <= hour_of_day <= 19:
-            multiplier = 1.3  # 30% increase during rush hours
-        elif 22 <= hour_of_day or hour_of_day <= 5:
-            multiplier = 0.7  # 30% decrease during night
-        else:
-            multiplier = 1.0
-        
-        # Add some variance
-        import random
-        variance = 0.1  # 10% variance
-        predicted_vehicles = int(base_vehicles * multiplier * (1 + random.uniform(-variance, variance)))
-        predicted_density = min(1.0, base_density * multiplier * (1 + random.uniform(-variance, variance)))
-        
-        # Confidence decreases with time
-        confidence = max(0.5, 0.9 - (i * 0.05))
+        samples, vehicles, vehicles_var, density, density_var = demand_profiles.lookup(
+            profile, slot_of(future_hour)
+        )
         
         predictions.append({
             "timestamp": future_hour.isoformat(),
-            "predicted_vehicles": predicted_vehicles,
-            "predicted_congestion": round(predicted_density * 100, 1),
-            "confidence": round(confidence, 2),
-            "hour_of_day": hour_of_day,
+            "predicted_vehicles": int(round(vehicles)),
+            "predicted_congestion": round(min(1.0, density) * 100, 1),
+            "confidence": round(confidence_from_variance(samples, vehicles, vehicles_var), 2),
+            "hour_of_day": future_hour.hour,
+            "vehicles_stddev": round(math.sqrt(vehicles_var), 1),
+            "congestion_stddev": round(math.sqrt(density_var) * 100, 1),
+            "sample_count": samples,
         })
     
     return {"predictions": predictions}
 
+@router.get("/traffic/forecast")
+async def get_traffic_forecast(
+    zone_id: Optional[str] = None,
+    signal_id: Optional[str] = None,
+    horizons: str = "5,10,15",
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get short-horizon (minutes ahead) per-signal forecasts"""
+    try:
+        horizon_minutes = [float(h) for h in horizons.split(",") if h.strip()]
+    except ValueError:
+        horizon_minutes = []
+    if not horizon_minutes or not all(0 < h <= 60 for h in horizon_minutes):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="horizons must be a comma-separated list of minutes between 0 and 60"
+        )
+    
+    query = db.query(models.Signal.id, models.Signal.signal_id, models.Signal.log_key)
+    scope = get_zone_scope(zone_id, current_user)
+    if scope:
+        query = query.filter(models.Signal.zone_id == scope)
+    if signal_id:
+        query = query.filter(models.Signal.id == signal_id)
+    signals = query.order_by(models.Signal.signal_id).all()
+    
+    await forecaster.ensure_loaded_async()
+    now = datetime.utcnow()
+    result = forecaster.forecast([s.log_key for s in signals], horizon_minutes, now=now)
+    mean, stddev, known = result["mean"], result["stddev"], result["known"]
+    
+    forecasts = []
+    for i, signal in enumerate(signals):
+        points = []
+        if known[i]:
+            for j, minutes in enumerate(horizon_minutes):
+                points.append({
+                    "minutes": minutes,
+                    "timestamp": (now + timedelta(minutes=minutes)).isoformat(),
+                    "predicted_vehicles": int(round(mean[i, j, 0])),
+                    "vehicles_stddev": round(float(stddev[i, j, 0]), 1),
+                    "predicted_congestion": round(min(1.0, float(mean[i, j, 1])) * 100, 1),
+                    "congestion_stddev": round(float(stddev[i, j, 1]) * 100, 1),
+                })
+        forecasts.append({
+            "signal_id": signal.id,
+            "signal_code": signal.signal_id,
+            "model_ready": bool(known[i]),
+            "horizons": points,
+        })
+    
+    return {"generated_at": now.isoformat(), "forecasts": forecasts}
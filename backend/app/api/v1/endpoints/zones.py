@@ -6,6 +6,7 @@ from typing import Optional
 from app.db.database import get_db
 from app.db import models
 from app.api.v1.endpoints.auth import get_current_user
+from app.services.data_version import data_versions
 
 router = APIRouter()
 
@@ -87,6 +88,7 @@ async def create_zone(
     db.add(zone)
     db.commit()
     db.refresh(zone)
+    data_versions.bump(zone.id)
     
     return ZoneResponse(
         id=zone.id,
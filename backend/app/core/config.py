@@ -4,6 +4,7 @@ from typing import List
 class Settings(BaseSettings):
     # Database - Default to SQLite for easy setup
     DATABASE_URL: str = "sqlite:///./urbanflow.db"
+    AUTO_CREATE_SCHEMA: bool = True  # Create a fresh database at startup; existing ones use scripts/migrate.py
     
     # JWT
     SECRET_KEY: str = "your-secret-key-change-in-production-min-32-characters"
@@ -18,6 +19,32 @@ class Settings(BaseSettings):
         "http://127.0.0.1:5173",
     ]
     
+    # Response cache (dashboard endpoints are invalidated on every simulator/realtime tick;
+    # the TTL only caps staleness when no writer is running)
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    
+    # Weeks of logs used to bootstrap hour-of-week demand profiles
+    DEMAND_PROFILE_WEEKS: int = 4
+    
+    # Short-horizon forecaster: nominal smoothing step and warm-up history
+    FORECAST_STEP_SECONDS: int = 15
+    FORECAST_WARMUP_MINUTES: int = 60
+    
+    # Road network graph (scripts/build_road_graph.py builds it from an OSM extract)
+    ROAD_GRAPH_PATH: str = ""  # Memory-mapped graph file; empty = data/road_graph.bin
+    ROAD_GRAPH_OSM_CACHE: str = ""  # Cached Overpass response; empty = data/osm/mumbai_roads.osm.json
+    ROAD_GRAPH_FETCH_ENABLED: bool = True  # Download from Overpass once when neither exists
+    ROUTING_LANDMARKS: int = 16  # ALT landmarks precomputed with the graph (0 = plain A*)
+    ROUTING_SNAP_RADIUS_M: float = 500.0  # Farthest a route end or signal may be from the road graph
+    ROAD_SEGMENTS_SOURCE: str = "auto"  # Live segment congestion: "graph" edges, "mumbai_roads" polylines, auto = graph if built
+    ROAD_SEGMENT_SNAP_M: float = 250.0  # Farthest a signal may be from a MUMBAI_ROADS polyline to join it
+
+    # Weather (one cached value shared by the realtime tick, road congestion and /realtime/weather)
+    WEATHER_BACKEND: str = "simulated"  # "simulated", "file" (JSON file) or "http" (e.g. OpenWeatherMap URL)
+    WEATHER_SOURCE: str = ""  # File path or URL for the file and http backends
+    WEATHER_TTL_SECONDS: float = 300.0
+    WEATHER_TIMEOUT_SECONDS: float = 5.0
+
     # Mapbox
     MAPBOX_TOKEN: str = ""
     
@@ -25,6 +52,41 @@ class Settings(BaseSettings):
     MQTT_BROKER: str = "localhost"
     MQTT_PORT: int = 1883
     
+    # Edge detector ingestion gateway (line protocol over UDP/TCP, optional MQTT)
+    EDGE_INGEST_ENABLED: bool = False
+    EDGE_INGEST_HOST: str = "0.0.0.0"
+    EDGE_UDP_PORT: int = 9070
+    EDGE_TCP_PORT: int = 9071
+    EDGE_FLUSH_INTERVAL_SECONDS: float = 1.0
+    EDGE_MAX_PENDING_READINGS: int = 200000
+    EDGE_FLUSH_MAX_RETRIES: int = 5  # Consecutive failed writes before a batch is dropped
+    EDGE_MAX_READING_AGE_HOURS: float = 168.0  # Older reading stamps (e.g. replayed agent spools) are rejected
+    EDGE_MQTT_ENABLED: bool = False
+    EDGE_MQTT_TOPIC: str = "urbanflow/edge/+/readings"
+    EDGE_AGENT_TOKEN: str = ""  # Shared secret for edge agent uploads; empty disables /edge/batches
+    EDGE_AGENT_MAX_BATCH_BYTES: int = 1048576  # Decompressed body limit
+    
+    # Monitoring
+    METRICS_ENABLED: bool = True  # Prometheus text format at /metrics
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+    LOOP_WATCHDOG_ENABLED: bool = True  # Sample the loop thread's stack while it is blocked
+    LOOP_BLOCK_THRESHOLD_MS: float = 200.0
+    QUERY_PROFILER_ENABLED: bool = False  # Per-request SQL attribution and slow-request log
+    SLOW_REQUEST_MS: float = 500.0
+    SLOW_REQUEST_QUERIES: int = 50
+    SLOW_QUERY_MS: float = 100.0
+    
+    # Multi-worker deployments: one elected worker runs the producers, the others share its updates
+    WORKER_COORDINATION_ENABLED: bool = True
+    WORKER_LOCK_PATH: str = ""  # Leader lock file; empty = per-database file in the temp dir
+    WORKER_BUS_PATH: str = ""  # Unix socket of the worker bus; empty = next to the lock file
+    WORKER_BUS_PORT: int = 9072  # Localhost TCP port used where Unix sockets are unavailable
+    LEADER_RETRY_SECONDS: float = 2.0
+    SIGNAL_STATE_ENABLED: bool = True  # Serve /signals and /traffic/stats from shared memory
+    SIGNAL_STATE_CAPACITY: int = 65536  # Signals (about 140 bytes each)
+    SIGNAL_STATE_ZONE_CAPACITY: int = 1024
+    SIGNAL_STATE_RESYNC_SECONDS: float = 5.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1 @@
+# Static datasets shipped with the app
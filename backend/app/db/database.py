@@ -12,9 +12,8 @@ if database_url.startswith("sqlite://") or not database_url.startswith("postgres
     # Use SQLite for easier setup
     db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "urbanflow.db")
     database_url = f"sqlite:///{db_path}"
-    print(f"Using SQLite database at: {db_path}")
 
-# Create engine with appropriate settings
+# Create engine with appropriate settings (no connection is opened until first use)
 if database_url.startswith("sqlite://"):
     engine = create_engine(
         database_url,
@@ -38,3 +37,19 @@ def get_db():
         db.close()
 
 
+
+def init_db():
+    """Startup step: create a fresh database from the models, or report pending migrations"""
+    from app.db import models  # Registers the tables on Base
+    from app.db.migrations import MigrationRunner
+    if database_url.startswith("sqlite://"):
+        print(f"Using SQLite database at: {database_url[len('sqlite:///'):]}")
+    MigrationRunner(engine).init_schema(models.Base.metadata)
+
+def run_with_session(function):
+    """Call function(db) with a session of its own (for work moved to a worker thread)"""
+    db = SessionLocal()
+    try:
+        return function(db)
+    finally:
+        db.close()
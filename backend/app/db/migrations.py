@@ -0,0 +1,409 @@
+"""
+Versioned schema migrations
+Migrations are numbered and run once, in order; applied versions are
+recorded in schema_migrations. The helpers on MigrationContext make
+performance-schema changes without downtime: indexes are built with
+CREATE INDEX CONCURRENTLY on PostgreSQL, and SQLite table rebuilds copy rows
+in short batched transactions (writers keep going between batches) before a
+brief final swap. Long steps report progress. Every step checks the live
+schema first, so re-running a migration after a failure is safe.
+
+A fresh database is created from the models and stamped with the latest
+version; existing databases are upgraded with scripts/migrate.py.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+BATCH_SIZE = 50000  # Rows copied per transaction in table rebuilds
+PROGRESS_SECONDS = 2.0  # Minimum interval between progress lines
+LOCK_TIMEOUT = "5s"  # PostgreSQL: give up on DDL instead of queueing every query behind it
+SOURCE_KEY = "rebuild_source_key"  # Temporary column of copied keys in rebuilds with a non-monotonic key
+ADVISORY_LOCK_ID = 720_240_044  # PostgreSQL: one migration run at a time
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Float, nullable=False),
+)
+
+class Progress:
+    """Throttled [INFO] progress lines for a long step"""
+
+    def __init__(self, label: str, total: Optional[int] = None):
+        self.label = label
+        self.total = total
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, done: int, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self._last < PROGRESS_SECONDS:
+            return
+        self._last = now
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed > 0 else 0
+        share = f" ({done / self.total:.0%})" if self.total else ""
+        total = f"/{self.total}" if self.total is not None else ""
+        print(f"[INFO] {self.label}: {done}{total}{share}, {rate:,.0f}/s, {elapsed:.1f}s")
+
+class MigrationContext:
+    """Schema helpers handed to each migration"""
+
+    def __init__(self, engine: Engine, batch_size: int = BATCH_SIZE):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.batch_size = batch_size
+
+    def tables(self) -> List[str]:
+        return inspect(self.engine).get_table_names()
+
+    def columns(self, table: str) -> List[str]:
+        return [column["name"] for column in inspect(self.engine).get_columns(table)]
+
+    def indexes(self, table: str) -> List[str]:
+        return [index["name"] for index in inspect(self.engine).get_indexes(table)]
+
+    def is_unique(self, table: str, columns: Sequence[str]) -> bool:
+        """Whether a unique constraint or unique index already covers exactly these columns"""
+        inspector = inspect(self.engine)
+        keys = [c["column_names"] for c in inspector.get_unique_constraints(table)]
+        keys += [i["column_names"] for i in inspector.get_indexes(table) if i["unique"]]
+        return list(columns) in keys
+
+    def execute(self, sql: str, params: Optional[dict] = None):
+        """Run one statement in its own transaction"""
+        with self.engine.begin() as conn:
+            if self.dialect == "postgresql":
+                conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            return conn.execute(text(sql), params or {})
+
+    def add_column(self, table: str, name: str, ddl: str):
+        """ALTER TABLE ... ADD COLUMN unless the column exists (constant defaults are instant on PostgreSQL 11+)"""
+        if name in self.columns(table):
+            return
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+        print(f"[OK] Added {table}.{name}")
+
+    def create_index(self, name: str, table: str, columns: Sequence[str], unique: bool = False):
+        """Build an index without blocking writes where the database supports it"""
+        unique_sql = "UNIQUE " if unique else ""
+        column_sql = ", ".join(columns)
+        started = time.perf_counter()
+        if self.dialect == "postgresql":
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                valid = conn.execute(text(
+                    "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name"
+                ), {"name": name}).scalar()
+                if valid:
+                    return
+                if valid is False:
+                    # Left INVALID by an interrupted concurrent build
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                done = threading.Event()
+                watcher = threading.Thread(target=self._watch_index_build, args=(table, name, done), daemon=True)
+                watcher.start()
+                try:
+                    conn.execute(text(f"CREATE {unique_sql}INDEX CONCURRENTLY {name} ON {table} ({column_sql})"))
+                finally:
+                    done.set()
+                    watcher.join()
+        else:
+            if name in self.indexes(table):
+                return
+            # SQLite has no concurrent build; writers wait (up to their busy timeout) while it runs
+            self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({column_sql})")
+        print(f"[OK] Built index {name} in {time.perf_counter() - started:.1f}s")
+
+    def _watch_index_build(self, table: str, name: str, done: threading.Event):
+        """PostgreSQL: report pg_stat_progress_create_index while a concurrent build runs"""
+        try:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                while not done.wait(PROGRESS_SECONDS):
+                    row = conn.execute(text(
+                        "SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total "
+                        "FROM pg_stat_progress_create_index WHERE relid = to_regclass(:table)"
+                    ), {"table": table}).first()
+                    if row is None:
+                        continue
+                    phase, blocks_done, blocks_total, tuples_done, tuples_total = row
+                    if blocks_total:
+                        detail = f"{blocks_done}/{blocks_total} blocks"
+                    else:
+                        detail = f"{tuples_done}/{tuples_total} tuples"
+                    print(f"[INFO] Index {name}: {phase}, {detail}")
+        except Exception as e:
+            print(f"[WARNING] Index build progress unavailable: {e}")
+
+    def rebuild_table(self, table: str, create_sql: str, insert_columns: Sequence[str], select_sql: str,
+                      key: str, indexes: Sequence[str] = (), key_type: Optional[str] = None):
+        """
+        Online table rebuild: copy rows into a new table in key-ordered batches, each in its own
+        transaction, then copy the rows written meanwhile and swap the tables in one short transaction.
+        create_sql and indexes are formatted with {table}; select_sql with {batch}, the key range
+        condition of a batch. key is a unique, ordered column of the source table, qualified with
+        the alias select_sql gives the table if it has one (e.g. "l.rowid").
+        If new rows can sort below keys already copied (e.g. a UUID key), pass the key's SQL type as
+        key_type and end select_sql's column list with the key: copied keys are kept in a temporary
+        column and the catch-up copies every row not among them instead of the rows after the last key.
+        """
+        column = key.split(".")[-1]
+        rebuilt = f"{table}_rebuild"
+        self.execute(f"DROP TABLE IF EXISTS {rebuilt}")
+        self.execute(create_sql.format(table=rebuilt))
+        insert_columns = list(insert_columns)
+        if key_type:
+            self.execute(f"ALTER TABLE {rebuilt} ADD COLUMN {SOURCE_KEY} {key_type}")
+            insert_columns.append(SOURCE_KEY)
+        insert_sql = f"INSERT INTO {rebuilt} ({', '.join(insert_columns)}) {select_sql}"
+        with self.engine.connect() as conn:
+            total = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+        progress = Progress(f"Copying {table}", total)
+
+        def batch(after, until):
+            bounds = [f"{key} > :after"] if after is not None else []
+            if until is not None:
+                bounds.append(f"{key} <= :until")
+            return text(insert_sql.format(batch=" AND ".join(bounds) or "1 = 1"))
+
+        after, copied = None, 0
+        while True:
+            with self.engine.begin() as conn:
+                # Last key of the next full batch; None once less than a batch remains
+                bound_sql = f"SELECT {column} FROM {table}" + (f" WHERE {column} > :after" if after is not None else "")
+                until = conn.execute(text(f"{bound_sql} ORDER BY {column} LIMIT 1 OFFSET :offset"),
+                                     {"after": after, "offset": self.batch_size - 1}).scalar()
+                if until is None:
+                    break
+                copied += conn.execute(batch(after, until), {"after": after, "until": until}).rowcount
+            after = until
+            progress.update(copied)
+        if key_type:
+            # Built before the lock is taken, so the catch-up's anti-join is an index probe per row
+            self.execute(f"CREATE INDEX ix_{rebuilt}_source ON {rebuilt} ({SOURCE_KEY})")
+
+        # Catch-up and swap in one transaction: writers wait for this step only
+        with self.engine.begin() as conn:
+            if self.dialect == "postgresql":
+                conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+                conn.execute(text(f"LOCK TABLE {table} IN EXCLUSIVE MODE"))
+            # On SQLite this INSERT takes the write lock, so nothing is written between it and the swap
+            if key_type:
+                missing = f"NOT EXISTS (SELECT 1 FROM {rebuilt} copied WHERE copied.{SOURCE_KEY} = {key})"
+                copied += conn.execute(text(insert_sql.format(batch=missing))).rowcount
+            else:
+                copied += conn.execute(batch(after, None), {"after": after}).rowcount
+            conn.execute(text(f"DROP TABLE {table}"))
+            conn.execute(text(f"ALTER TABLE {rebuilt} RENAME TO {table}"))
+            if key_type:
+                conn.execute(text(f"DROP INDEX ix_{rebuilt}_source"))
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {SOURCE_KEY}"))
+            for index_sql in indexes:
+                conn.execute(text(index_sql.format(table=table)))
+        progress.update(copied, force=True)
+        if copied < total:
+            print(f"[WARNING] {total - copied} {table} rows were not carried over (filtered by the copy query)")
+
+class Migration:
+    def __init__(self, version: int, name: str, upgrade: Callable[[MigrationContext], None]):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+
+MIGRATIONS: List[Migration] = []
+
+def migration(version: int, name: str):
+    """Register a migration function"""
+    def register(upgrade: Callable[[MigrationContext], None]):
+        MIGRATIONS.append(Migration(version, name, upgrade))
+        return upgrade
+    return register
+
+class MigrationRunner:
+    def __init__(self, engine: Engine, migrations: Optional[List[Migration]] = None):
+        self.engine = engine
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda m: m.version)
+
+    @property
+    def head(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def applied(self) -> Dict[int, dict]:
+        """version -> schema_migrations row"""
+        migration_metadata.create_all(bind=self.engine)
+        with self.engine.connect() as conn:
+            rows = conn.execute(schema_migrations.select()).mappings().all()
+        return {row["version"]: dict(row) for row in rows}
+
+    def current(self) -> int:
+        return max(self.applied(), default=0)
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied()
+        return [m for m in self.migrations if m.version not in applied]
+
+    def _record(self, migration: Migration, duration_ms: float):
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version, name=migration.name,
+                    applied_at=datetime.utcnow(), duration_ms=round(duration_ms, 3),
+                ))
+        except IntegrityError:
+            pass  # Recorded concurrently by another process
+
+    def upgrade(self, target: Optional[int] = None, batch_size: int = BATCH_SIZE) -> int:
+        """Apply pending migrations up to target (default: all); returns how many ran"""
+        context = MigrationContext(self.engine, batch_size)
+        lock = None
+        if context.dialect == "postgresql":
+            # Session-level lock on an autocommit connection, so it holds no snapshot that
+            # CREATE INDEX CONCURRENTLY would wait for
+            lock = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            if lock is not None:
+                lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+            ran = 0
+            for migration in self.pending():
+                if target is not None and migration.version > target:
+                    break
+                print(f"[INFO] Applying migration {migration.version:04d} {migration.name}...")
+                started = time.perf_counter()
+                try:
+                    migration.upgrade(context)
+                except Exception as e:
+                    print(f"[ERROR] Migration {migration.version:04d} {migration.name} failed: {e}")
+                    raise
+                duration_ms = (time.perf_counter() - started) * 1000
+                self._record(migration, duration_ms)
+                print(f"[OK] Migration {migration.version:04d} {migration.name} applied in {duration_ms / 1000:.1f}s")
+                ran += 1
+            return ran
+        finally:
+            if lock is not None:
+                lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+                lock.close()
+
+    def stamp(self, target: Optional[int] = None):
+        """Mark migrations up to target as applied without running them"""
+        for migration in self.pending():
+            if target is None or migration.version <= target:
+                self._record(migration, 0.0)
+
+    def init_schema(self, metadata: MetaData):
+        """Startup: create a fresh database from the models; only report pending migrations otherwise"""
+        existing = [name for name in inspect(self.engine).get_table_names() if name != schema_migrations.name]
+        if not existing:
+            metadata.create_all(bind=self.engine)
+            self.stamp()
+            print(f"[OK] Database schema created at version {self.head}")
+            return
+        pending = self.pending()
+        if pending:
+            names = ", ".join(f"{m.version:04d} {m.name}" for m in pending)
+            print(f"[WARNING] Database schema has {len(pending)} pending migration(s): {names}. "
+                  f"Run: python scripts/migrate.py upgrade")
+        else:
+            print(f"[OK] Database schema at version {self.current()}")
+
+# Migrations. Each one checks the live schema, so it is a no-op where the change already exists
+# (databases created from the current models start at the latest version).
+
+@migration(1, "baseline_tables")
+def create_baseline_tables(ctx: MigrationContext):
+    """Create any model table that is missing (existing tables are left alone)"""
+    from app.db import models
+    models.Base.metadata.create_all(bind=ctx.engine)
+
+@migration(2, "zone_location_columns")
+def add_zone_location_columns(ctx: MigrationContext):
+    """City, coordinates and pincodes on zones (formerly scripts/fix_zones_schema.py)"""
+    ctx.add_column("zones", "city", "VARCHAR DEFAULT 'Mumbai'")
+    ctx.add_column("zones", "latitude", "FLOAT DEFAULT 19.0760")
+    ctx.add_column("zones", "longitude", "FLOAT DEFAULT 72.8777")
+    ctx.add_column("zones", "pincode", "VARCHAR")
+    ctx.add_column("zones", "pincodes", "VARCHAR")
+    ctx.execute("UPDATE zones SET city = 'Mumbai' WHERE city IS NULL OR city = ''")
+    ctx.execute("UPDATE zones SET latitude = 19.0760 WHERE latitude IS NULL OR latitude = 0")
+    ctx.execute("UPDATE zones SET longitude = 72.8777 WHERE longitude IS NULL OR longitude = 0")
+
+@migration(3, "compact_traffic_logs")
+def compact_traffic_logs(ctx: MigrationContext):
+    """
+    Integer signal keys and the compact traffic_logs layout (formerly compact_traffic_logs.py,
+    add_density_column.py, fix_traffic_logs_schema.py and fix_traffic_density_nullable.py)
+    """
+    ctx.add_column("signals", "log_key", "INTEGER")
+    with ctx.engine.connect() as conn:
+        highest = conn.execute(text("SELECT COALESCE(MAX(log_key), 0) FROM signals")).scalar()
+    if ctx.dialect == "sqlite":
+        ctx.execute("UPDATE signals SET log_key = rowid + :highest WHERE log_key IS NULL", {"highest": highest})
+    else:
+        ctx.execute("""
+            UPDATE signals SET log_key = numbered.key FROM (
+                SELECT id, row_number() OVER (ORDER BY created_at, id) + :highest AS key
+                FROM signals WHERE log_key IS NULL
+            ) numbered WHERE signals.id = numbered.id
+        """, {"highest": highest})
+    if not ctx.is_unique("signals", ["log_key"]):
+        ctx.create_index("ix_signals_log_key", "signals", ["log_key"], unique=True)
+
+    columns = ctx.columns("traffic_logs")
+    if "signal_key" in columns:
+        return
+    # Legacy layout: UUID id and signal_id, density possibly split over density / traffic_density
+    density = [f"l.{name}" for name in ("density", "traffic_density") if name in columns]
+    density_expr = f"COALESCE({', '.join(density + ['0.0'])})"
+    # SQLite rowids grow with every insert; PostgreSQL has only the UUID id, which is not
+    # chronological, so rows added during the copy are found by an anti-join instead
+    key = "l.rowid" if ctx.dialect == "sqlite" else "l.id"
+    tracked = "" if ctx.dialect == "sqlite" else f", {key}"
+    ctx.rebuild_table(
+        "traffic_logs",
+        create_sql="""
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                signal_key INTEGER NOT NULL REFERENCES signals (log_key),
+                vehicle_count INTEGER,
+                pedestrian_count INTEGER,
+                queue_length INTEGER,
+                density FLOAT,
+                timestamp DATETIME DEFAULT (CURRENT_TIMESTAMP)
+            )
+        """ if ctx.dialect == "sqlite" else """
+            CREATE TABLE {table} (
+                id SERIAL PRIMARY KEY,
+                signal_key INTEGER NOT NULL REFERENCES signals (log_key),
+                vehicle_count INTEGER,
+                pedestrian_count INTEGER,
+                queue_length INTEGER,
+                density FLOAT,
+                timestamp TIMESTAMPTZ DEFAULT now()
+            )
+        """,
+        insert_columns=["signal_key", "vehicle_count", "pedestrian_count", "queue_length", "density", "timestamp"],
+        # Oldest first, so the new integer ids keep time order
+        select_sql=f"""
+            SELECT s.log_key, l.vehicle_count, l.pedestrian_count, l.queue_length, {density_expr}, l.timestamp{tracked}
+            FROM traffic_logs l JOIN signals s ON s.id = l.signal_id
+            WHERE {{batch}} ORDER BY {key}
+        """,
+        key=key,
+        indexes=["CREATE INDEX ix_traffic_logs_signal_key_timestamp ON {table} (signal_key, timestamp)"],
+        key_type=None if ctx.dialect == "sqlite" else "VARCHAR",
+    )
+
+@migration(4, "performance_indexes")
+def add_performance_indexes(ctx: MigrationContext):
+    """Indexes declared on the models after their tables were first created"""
+    ctx.create_index("ix_signals_zone_id_signal_id", "signals", ["zone_id", "signal_id"])
+    ctx.create_index("ix_traffic_logs_signal_key_timestamp", "traffic_logs", ["signal_key", "timestamp"])
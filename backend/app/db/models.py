@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy import event, select
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, Session
 from sqlalchemy.sql import func
 import uuid
 import enum
@@ -61,6 +62,8 @@ class Signal(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     signal_id = Column(String, unique=True, index=True, nullable=False)
+    # Compact integer key referenced by traffic_logs instead of the 36-char UUID
+    log_key = Column(Integer, unique=True, nullable=False)
     zone_id = Column(String, ForeignKey("zones.id"), nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
@@ -75,29 +78,29 @@ class Signal(Base):
     zone = relationship("Zone", back_populates="signals")
     traffic_logs = relationship("TrafficLog", back_populates="signal")
     ai_explanations = relationship("AIExplanation", back_populates="signal")
+    
+    __table_args__ = (
+        # Keyset pagination of /signals within a zone
+        Index("ix_signals_zone_id_signal_id", "zone_id", "signal_id"),
+    )
 
 class TrafficLog(Base):
     __tablename__ = "traffic_logs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    signal_id = Column(String, ForeignKey("signals.id"), nullable=False)
+    # Hot, append-only table: integer rowid PK, integer signal key, density stored once
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    signal_key = Column(Integer, ForeignKey("signals.log_key"), nullable=False)
     vehicle_count = Column(Integer, default=0)
     pedestrian_count = Column(Integer, default=0)
     queue_length = Column(Integer, default=0)
     density = Column(Float, default=0.0)  # Traffic density (0.0 to 1.0)
-    traffic_density = Column(Float, default=0.0)  # Legacy column (NOT NULL), synced with density
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     
     signal = relationship("Signal", back_populates="traffic_logs")
     
-    def __init__(self, **kwargs):
-        # Sync traffic_density with density if density is set but traffic_density is not
-        if 'density' in kwargs and 'traffic_density' not in kwargs:
-            kwargs['traffic_density'] = kwargs.get('density', 0.0)
-        super().__init__(**kwargs)
-        # Ensure traffic_density is set even after init
-        if self.density is not None and self.traffic_density is None:
-            self.traffic_density = self.density
+    __table_args__ = (
+        Index("ix_traffic_logs_signal_key_timestamp", "signal_key", "timestamp"),
+    )
 
 class AIExplanation(Base):
     __tablename__ = "ai_explanations"
@@ -124,4 +127,16 @@ class EmergencyRoute(Base):
     is_active = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-
+@event.listens_for(Session, "before_flush")
+def assign_signal_log_keys(session, flush_context, instances):
+    """Assign sequential log keys to new signals before they are inserted"""
+    new_signals = [
+        obj for obj in session.new
+        if isinstance(obj, Signal) and obj.log_key is None
+    ]
+    if not new_signals:
+        return
+    next_key = session.execute(select(func.max(Signal.log_key))).scalar() or 0
+    for signal in new_signals:
+        next_key += 1
+        signal.log_key = next_key
@@ -1,26 +1,93 @@
+import asyncio
+from datetime import datetime
 from fastapi import FastAPI, WebSocket
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.api.v1.websocket import websocket_endpoint
-from app.db.database import engine
-from app.db import models
+from app.db.database import engine, init_db
 from app.services.traffic_simulator import traffic_simulator
 from app.services.realtime_data_service import realtime_data_service
+from app.services.edge_ingestion import edge_gateway
+from app.services.metrics import (
+    metrics_registry, instrument_engine, websocket_clients, queue_depth, response_cache_requests, edge_readings,
+    worker_leader, worker_bus_messages,
+)
+from app.services.loop_monitor import loop_monitor
+from app.services.response_cache import response_cache
+from app.services.query_profiler import query_profiler
+from app.services.data_version import data_versions
+from app.services.demand_profiles import demand_profiles
+from app.services.forecasting import forecaster
+from app.services.worker_bus import worker_bus
+from app.services.leader import leader_election
+from app.services.signal_state import signal_state
+from app.services.road_segments import road_segments
+from app.services.weather import weather_provider
+from app.api.middleware import RequestMetricsMiddleware, QueryProfilerMiddleware
 
-# Create database tables
-try:
-    models.Base.metadata.create_all(bind=engine)
-    print("[OK] Database tables ready")
-except Exception as e:
-    print(f"Warning: Could not create database tables: {e}")
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    websocket_clients.set_function(lambda: len(traffic_simulator.websocket_connections), "traffic_simulator")
+    websocket_clients.set_function(lambda: len(realtime_data_service.websocket_connections), "realtime_data_service")
+    queue_depth.set_function(lambda: edge_gateway.pending_readings, "edge_pending_readings")
+    queue_depth.set_function(lambda: response_cache.stats()["inflight"], "response_cache_inflight")
+    for result in ("hits", "coalesced", "misses"):
+        response_cache_requests.set_function(lambda result=result: getattr(response_cache, result), result)
+    for outcome in ("received", "accepted", "rejected", "unknown_signal", "dropped", "requeued", "dropped_on_error"):
+        edge_readings.set_function(lambda outcome=outcome: edge_gateway.stats[outcome], outcome)
+    worker_leader.set_function(lambda: int(leader_election.is_leader or not settings.WORKER_COORDINATION_ENABLED))
+    for direction in ("published", "delivered", "dropped"):
+        worker_bus_messages.set_function(lambda direction=direction: worker_bus.stats[direction], direction)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
+if settings.QUERY_PROFILER_ENABLED:
+    query_profiler.install(engine)
+    print("[INFO] SQL query profiler enabled")
+
+def deliver_broadcast(payload: dict):
+    """Worker bus handler: pass a producer's broadcast on to this worker's WebSocket clients"""
+    service = traffic_simulator if payload.get("service") == "traffic_simulator" else realtime_data_service
+    return service.deliver(payload["message"])
+
+def apply_readings(payload: dict):
+    """Worker bus handler: keep this worker's demand profiles, forecasts and road segments current"""
+    timestamp = datetime.fromisoformat(payload["timestamp"])
+    demand_profiles.observe_many(timestamp, payload["readings"])
+    forecaster.observe_many(timestamp, payload["readings"])
+    road_segments.observe_many(timestamp, payload["readings"])
+
+def apply_weather(payload: dict):
+    """Worker bus handler: serve the leader's weather instead of fetching our own"""
+    fetched_at = payload.get("fetched_at")
+    weather_provider.apply(payload["weather"], datetime.fromisoformat(fetched_at) if fetched_at else None)
+
+def publish_weather(value: dict, fetched_at):
+    worker_bus.publish("weather", {
+        "weather": value, "fetched_at": fetched_at.isoformat() if fetched_at else None,
+    }, retain=True)
+
+def publish_bump(zone_id):
+    # The prefix tells workers reading the same shared counters that this bump is already counted
+    worker_bus.publish("bump", {"zone_id": zone_id, "prefix": data_versions.prefix()})
+
+if settings.WORKER_COORDINATION_ENABLED:
+    worker_bus.on("broadcast", deliver_broadcast)
+    worker_bus.on("bump", lambda payload: data_versions.apply(payload.get("zone_id"), payload.get("prefix")))
+    worker_bus.on("readings", apply_readings)
+    worker_bus.on("weather", apply_weather)
+    weather_provider.is_source = lambda: leader_election.is_leader
+    weather_provider.subscribe(publish_weather)
+    data_versions.shared = signal_state if signal_state.enabled else None
+    data_versions.subscribe(publish_bump)
+
+async def start_producers():
+    """Start the background writers; with several workers only the elected leader runs them"""
+    if signal_state.enabled:
+        signal_state.start()
+    
     print("[OK] Starting traffic simulator...")
-    import asyncio
     traffic_simulator.running = True
     asyncio.create_task(traffic_simulator.simulate_traffic())
     asyncio.create_task(traffic_simulator.simulate_signal_updates())
@@ -28,11 +95,18 @@ async def lifespan(app: FastAPI):
     print("[OK] Starting real-time data service...")
     realtime_data_service.start()
     
-    yield
+    if settings.EDGE_INGEST_ENABLED:
+        print("[OK] Starting edge ingestion gateway...")
+        await edge_gateway.start(
+            settings.EDGE_INGEST_HOST, settings.EDGE_UDP_PORT, settings.EDGE_TCP_PORT
+        )
+
+async def stop_producers():
+    if edge_gateway.running:
+        print("[OK] Stopping edge ingestion gateway...")
+        await edge_gateway.stop()
     
-    # Shutdown
     print("[OK] Stopping real-time data service...")
-    import asyncio
     try:
         loop = asyncio.get_event_loop()
         if loop.is_running():
@@ -43,6 +117,34 @@ async def lifespan(app: FastAPI):
         pass
     print("[OK] Stopping traffic simulator...")
     traffic_simulator.stop()
+    await signal_state.stop()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    if settings.AUTO_CREATE_SCHEMA:
+        try:
+            await asyncio.to_thread(init_db)
+        except Exception as e:
+            print(f"Warning: Could not initialize the database schema: {e}")
+    
+    if settings.WORKER_COORDINATION_ENABLED:
+        await leader_election.start(start_producers)
+    else:
+        await start_producers()
+    
+    if settings.METRICS_ENABLED:
+        loop_monitor.start()
+    
+    yield
+    
+    # Shutdown
+    await loop_monitor.stop()
+    
+    if not settings.WORKER_COORDINATION_ENABLED or leader_election.is_leader:
+        await stop_producers()
+    if settings.WORKER_COORDINATION_ENABLED:
+        await leader_election.stop()
 
 app = FastAPI(
     title="Urban Flow API",
@@ -57,6 +159,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Add CORS headers manually for health check
@@ -68,6 +171,11 @@ async def add_cors_header(request, call_next):
     response.headers["Access-Control-Allow-Headers"] = "*"
     return response
 
+if settings.QUERY_PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
 
@@ -84,6 +192,12 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.options("/health")
 async def health_options():
     return {"status": "ok"}
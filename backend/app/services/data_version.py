@@ -0,0 +1,72 @@
+"""Monotonic data versions per zone, used for ETags and cache invalidation
+
+Writers call bump(zone_id) after committing signal updates or traffic logs
+(bump() with no zone for city-wide ticks). Readers turn the version of
+their zone scope into an ETag without touching the database. With several
+workers the counters live in the shared signal state segment, so every
+worker hands out the same ETag; each process counts for itself only while
+that segment is unavailable.
+"""
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+class DataVersions:
+    def __init__(self):
+        # Distinguishes ETags across restarts, when counters start again from zero
+        self.boot_id = uuid.uuid4().hex[:8]
+        # Counters shared by all workers (the signal state segment); set by main when workers coordinate
+        self.shared = None
+        self.total = 0  # Every bump; version of the all-zones scope
+        self.city_wide = 0  # Bumps that touched every zone
+        self._zones: Dict[str, int] = {}
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]):
+        """Call listener(zone_id) on every bump (zone_id None = all zones)"""
+        self._listeners.append(listener)
+
+    def prefix(self) -> str:
+        """Identifies the counters in use: the shared segment's id, else this process's boot id"""
+        segment = self.shared.segment_id() if self.shared is not None else None
+        return segment or self.boot_id
+
+    def bump(self, zone_id: Optional[str] = None):
+        """Record a data change in one zone, or in all zones if zone_id is None"""
+        if self.shared is None or not self.shared.bump_version(zone_id):
+            self.total += 1
+            if zone_id is None:
+                self.city_wide += 1
+            else:
+                self._zones[zone_id] = self._zones.get(zone_id, 0) + 1
+        for listener in self._listeners:
+            listener(zone_id)
+
+    def apply(self, zone_id: Optional[str], prefix: Optional[str]):
+        """A bump made in another worker: counted again unless it went to the counters this worker reads"""
+        if prefix is not None and prefix == self.prefix():
+            for listener in self._listeners:
+                listener(zone_id)
+        else:
+            self.bump(zone_id)
+
+    def _current(self, zone_id: Optional[str]) -> Tuple[str, int]:
+        shared = self.shared.data_version(zone_id) if self.shared is not None else None
+        if shared is not None:
+            return shared
+        if zone_id is None:
+            return self.boot_id, self.total
+        return self.boot_id, self.city_wide + self._zones.get(zone_id, 0)
+
+    def version(self, zone_id: Optional[str] = None) -> int:
+        """Current version of a zone scope (None = all zones)"""
+        return self._current(zone_id)[1]
+
+    def etag(self, zone_id: Optional[str] = None, *extra) -> str:
+        """Weak ETag for a zone scope; extra values (e.g. params) are folded in"""
+        prefix, version = self._current(zone_id)
+        parts = [prefix, zone_id or "all", str(version)]
+        parts.extend(str(value) for value in extra)
+        return 'W/"' + "-".join(parts) + '"'
+
+# Global instance
+data_versions = DataVersions()
@@ -0,0 +1,190 @@
+"""Hour-of-week demand profiles for traffic predictions
+
+Keeps, per signal, per zone and city-wide, 168 hour-of-week slots (Monday
+00:00 UTC = slot 0) with streaming mean/variance of vehicle count and
+density (Welford). The store is bootstrapped once from recent logs with a
+grouped query and then updated incrementally by the writers as they insert
+logs, so predictions are a deterministic lookup.
+"""
+import asyncio
+import math
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import run_with_session
+
+SLOTS = 168  # 7 days x 24 hours
+# Per-slot layout: count, vehicle mean, vehicle M2, density mean, density M2
+N, MEAN_V, M2_V, MEAN_D, M2_D = range(5)
+STRIDE = 5
+
+def slot_of(timestamp: datetime) -> int:
+    """Hour-of-week slot for a UTC timestamp"""
+    return timestamp.weekday() * 24 + timestamp.hour
+
+def merge_slot(profile: array, slot: int, n: float, mean_v: float, m2_v: float, mean_d: float, m2_d: float):
+    """Merge a batch of (n, mean, M2) statistics into a slot (Chan et al.)"""
+    if n <= 0:
+        return
+    base = slot * STRIDE
+    n_a = profile[base + N]
+    total = n_a + n
+    delta_v = mean_v - profile[base + MEAN_V]
+    delta_d = mean_d - profile[base + MEAN_D]
+    profile[base + MEAN_V] += delta_v * n / total
+    profile[base + MEAN_D] += delta_d * n / total
+    profile[base + M2_V] += m2_v + delta_v * delta_v * n_a * n / total
+    profile[base + M2_D] += m2_d + delta_d * delta_d * n_a * n / total
+    profile[base + N] = total
+
+def add_sample(profile: array, slot: int, vehicles: float, density: float):
+    """Welford update of a slot with a single reading"""
+    base = slot * STRIDE
+    n = profile[base + N] + 1
+    profile[base + N] = n
+    delta_v = vehicles - profile[base + MEAN_V]
+    profile[base + MEAN_V] += delta_v / n
+    profile[base + M2_V] += delta_v * (vehicles - profile[base + MEAN_V])
+    delta_d = density - profile[base + MEAN_D]
+    profile[base + MEAN_D] += delta_d / n
+    profile[base + M2_D] += delta_d * (density - profile[base + MEAN_D])
+
+def read_slot(profile: array, slot: int) -> Tuple[int, float, float, float, float]:
+    """(count, vehicle mean, vehicle variance, density mean, density variance)"""
+    base = slot * STRIDE
+    n = int(profile[base + N])
+    if n == 0:
+        return 0, 0.0, 0.0, 0.0, 0.0
+    var_v = profile[base + M2_V] / (n - 1) if n > 1 else 0.0
+    var_d = profile[base + M2_D] / (n - 1) if n > 1 else 0.0
+    return n, profile[base + MEAN_V], var_v, profile[base + MEAN_D], var_d
+
+def new_profile() -> array:
+    return array('d', bytes(8 * SLOTS * STRIDE))
+
+class DemandProfileStore:
+    def __init__(self, weeks: int):
+        self.weeks = weeks
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self.signals: Dict[int, array] = {}
+        self.zones: Dict[str, array] = {}
+        self.city = new_profile()
+
+    def _profile(self, store: dict, key) -> array:
+        profile = store.get(key)
+        if profile is None:
+            profile = store[key] = new_profile()
+        return profile
+
+    def load(self, db: Session):
+        """Bootstrap all profiles from the last `weeks` of logs in one grouped query"""
+        since = datetime.utcnow() - timedelta(weeks=self.weeks)
+        dow = func.extract("dow", models.TrafficLog.timestamp)  # 0 = Sunday
+        hour = func.extract("hour", models.TrafficLog.timestamp)
+        vehicles = models.TrafficLog.vehicle_count
+        density = models.TrafficLog.density
+        rows = db.query(
+            models.TrafficLog.signal_key,
+            models.Signal.zone_id,
+            dow,
+            hour,
+            func.count(),
+            func.avg(vehicles),
+            func.avg(vehicles * vehicles),
+            func.avg(density),
+            func.avg(density * density),
+        ).join(
+            models.Signal, models.TrafficLog.signal_key == models.Signal.log_key
+        ).filter(
+            models.TrafficLog.timestamp >= since
+        ).group_by(
+            models.TrafficLog.signal_key, models.Signal.zone_id, dow, hour
+        ).all()
+
+        self.signals, self.zones, self.city = {}, {}, new_profile()
+        for signal_key, zone_id, day, hour_value, n, mean_v, sq_v, mean_d, sq_d in rows:
+            slot = ((int(day) + 6) % 7) * 24 + int(hour_value)  # Monday-based like weekday()
+            mean_v, mean_d = float(mean_v or 0.0), float(mean_d or 0.0)
+            # M2 = n * (E[x^2] - E[x]^2), clamped against rounding error
+            m2_v = max(0.0, n * (float(sq_v or 0.0) - mean_v * mean_v))
+            m2_d = max(0.0, n * (float(sq_d or 0.0) - mean_d * mean_d))
+            for profile in (
+                self._profile(self.signals, signal_key),
+                self._profile(self.zones, zone_id),
+                self.city,
+            ):
+                merge_slot(profile, slot, n, mean_v, m2_v, mean_d, m2_d)
+        self.loaded = True
+        print(f"[OK] Demand profiles loaded for {len(self.signals)} signals in {len(self.zones)} zones")
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            self.load(db)
+
+    async def ensure_loaded_async(self):
+        """ensure_loaded() with the bootstrap in a worker thread, run once for concurrent callers"""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if not self.loaded:
+                await asyncio.to_thread(run_with_session, self.load)
+
+    def observe(self, signal_key: int, zone_id: str, timestamp: datetime, vehicles: float, density: float):
+        """Fold one new reading into its signal, zone and city profiles"""
+        if not self.loaded:
+            # Not bootstrapped yet; load() will pick this reading up from the database
+            return
+        slot = slot_of(timestamp)
+        for profile in (
+            self._profile(self.signals, signal_key),
+            self._profile(self.zones, zone_id),
+            self.city,
+        ):
+            add_sample(profile, slot, vehicles, density)
+
+    def observe_many(self, timestamp: datetime, readings: Iterable[Tuple[int, str, float, float]]):
+        """Fold a tick's (signal_key, zone_id, vehicles, density) readings into the profiles"""
+        for signal_key, zone_id, vehicles, density in readings:
+            self.observe(signal_key, zone_id, timestamp, vehicles, density)
+
+    def get(self, zone_id: Optional[str] = None, signal_key: Optional[int] = None) -> Optional[array]:
+        """Profile for a signal, a zone, or the whole city"""
+        if signal_key is not None:
+            return self.signals.get(signal_key)
+        if zone_id is not None:
+            return self.zones.get(zone_id)
+        return self.city
+
+    def lookup(self, profile: array, slot: int) -> Tuple[int, float, float, float, float]:
+        """Slot statistics, falling back to the same hour on other days, then the whole week"""
+        stats = read_slot(profile, slot)
+        if stats[0]:
+            return stats
+        hour = slot % 24
+        return self._pooled(profile, range(hour, SLOTS, 24)) or self._pooled(profile, range(SLOTS))
+
+    def _pooled(self, profile: array, slots: Iterable[int]):
+        pooled = array('d', bytes(8 * STRIDE))  # A single slot
+        for slot in slots:
+            base = slot * STRIDE
+            merge_slot(pooled, 0, *profile[base:base + STRIDE])
+        stats = read_slot(pooled, 0)
+        return stats if stats[0] else None
+
+def confidence_from_variance(n: int, mean: float, variance: float) -> float:
+    """Confidence in [0.05, 0.99] from coefficient of variation and sample size"""
+    if n == 0:
+        return 0.05
+    cv = math.sqrt(variance) / mean if mean > 0 else 1.0
+    sample_weight = n / (n + 10)  # Few samples -> low confidence
+    return max(0.05, min(0.99, sample_weight / (1 + cv)))
+
+# Global instance
+demand_profiles = DemandProfileStore(weeks=settings.DEMAND_PROFILE_WEEKS)
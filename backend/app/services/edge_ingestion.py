@@ -0,0 +1,425 @@
+"""
+Edge Detector Ingestion Gateway
+Accepts readings from intersection controllers over UDP/TCP (and optionally
+MQTT), validates and coalesces them per signal, writes them to traffic_logs
+with batched inserts and pushes them to WebSocket clients.
+
+Line protocol (one reading per line, UTF-8/ASCII):
+    <signal_code>,<vehicle_count>,<pedestrian_count>,<queue_length>,<density>[,<epoch_ms>]
+e.g. MUM-S-001,42,3,12,0.53,1760000000000
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db import models
+from app.services.data_version import data_versions
+from app.services.demand_profiles import demand_profiles
+from app.services.forecasting import forecaster
+from app.services.metrics import record_rows
+from app.services.worker_bus import worker_bus
+from app.services.signal_state import signal_state
+from app.services.road_segments import road_segments
+from app.services.realtime_data_service import realtime_data_service
+
+MAX_COUNT = 10000  # Sanity bound for per-reading counts
+MAX_CLOCK_SKEW_MS = 5 * 60 * 1000  # Readings stamped further in the future are rejected
+
+# Pending slot layout per (signal, interval): n, vehicles, pedestrians, queue, density (sums), latest epoch ms, zone
+N, VEHICLES, PEDESTRIANS, QUEUE, DENSITY, LATEST, ZONE = range(7)
+LIVE = 0  # Interval of live readings: everything since the last flush, observed at flush time
+
+def stamp_window(now_ms: Optional[int] = None) -> Tuple[int, int]:
+    """(oldest, newest) epoch ms accepted for a reading stamp"""
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    return now_ms - int(settings.EDGE_MAX_READING_AGE_HOURS * 3600 * 1000), now_ms + MAX_CLOCK_SKEW_MS
+
+def reading_time(stamp: int, default: datetime) -> datetime:
+    """UTC time of an epoch ms stamp; default for unstamped or unrepresentable stamps"""
+    if not stamp:
+        return default
+    try:
+        return datetime.utcfromtimestamp(stamp / 1000)
+    except (OverflowError, OSError, ValueError):
+        return default
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, gateway: "EdgeIngestionGateway"):
+        self.gateway = gateway
+
+    def datagram_received(self, data: bytes, addr):
+        self.gateway.feed(data, from_datagram=True)
+
+class _TCPProtocol(asyncio.Protocol):
+    def __init__(self, gateway: "EdgeIngestionGateway"):
+        self.gateway = gateway
+        self.transport = None
+        self.partial = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.gateway.tcp_transports.add(transport)
+        if self.gateway.paused:
+            transport.pause_reading()
+
+    def connection_lost(self, exc):
+        self.gateway.tcp_transports.discard(self.transport)
+
+    def data_received(self, data: bytes):
+        # Keep an incomplete trailing line for the next chunk
+        data = self.partial + data
+        end = data.rfind(b"\n")
+        if end < 0:
+            self.partial = data
+            return
+        self.partial = data[end + 1:]
+        self.gateway.feed(data[:end])
+
+class EdgeIngestionGateway:
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.running = False
+        self.signals: Dict[bytes, Tuple[int, str]] = {}  # signal_code -> (log_key, zone_id)
+        self.pending: Dict[Tuple[int, int], list] = {}  # (log_key, interval) -> slot
+        self.pending_readings = 0
+        self.paused = False
+        self.tcp_transports = set()
+        self._servers = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._mqtt = None
+        self._registry_refreshed = 0.0
+        self._failed_flushes = 0  # Consecutive failed writes of the current backlog
+        self.stats = {
+            "received": 0,
+            "accepted": 0,
+            "rejected": 0,
+            "unknown_signal": 0,
+            "dropped": 0,
+            "rows_written": 0,
+            "write_errors": 0,
+            "requeued": 0,
+            "dropped_on_error": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "backpressure_pauses": 0,
+        }
+
+    def load_signals(self):
+        """Refresh the signal_code -> (log_key, zone_id) registry"""
+        db = SessionLocal()
+        try:
+            rows = db.query(models.Signal.signal_id, models.Signal.log_key, models.Signal.zone_id).all()
+            self.signals = {code.encode(): (key, zone_id) for code, key, zone_id in rows}
+        finally:
+            db.close()
+        self._registry_refreshed = time.monotonic()
+
+    def feed(self, data: bytes, from_datagram: bool = False):
+        """Parse, validate and coalesce one or more newline-separated readings"""
+        if self.pending_readings >= self.max_pending:
+            if from_datagram:
+                # UDP cannot be paused; shed load and count it
+                self.stats["dropped"] += data.count(b"\n") + 1
+                return
+            self._apply_backpressure()
+
+        signals = self.signals
+        pending = self.pending
+        stats = self.stats
+        oldest, newest = stamp_window()
+        unknown = False
+        for line in data.split(b"\n"):
+            if not line:
+                continue
+            stats["received"] += 1
+            parts = line.split(b",")
+            signal = signals.get(parts[0].strip())
+            if signal is None:
+                stats["unknown_signal"] += 1
+                unknown = True
+                continue
+            try:
+                vehicles = int(parts[1])
+                pedestrians = int(parts[2])
+                queue = int(parts[3])
+                density = float(parts[4])
+                stamp = int(parts[5]) if len(parts) > 5 else 0
+            except (IndexError, ValueError):
+                stats["rejected"] += 1
+                continue
+            if not (0 <= vehicles <= MAX_COUNT and 0 <= pedestrians <= MAX_COUNT
+                    and 0 <= queue <= MAX_COUNT and 0.0 <= density <= 1.0
+                    and (stamp == 0 or oldest <= stamp <= newest)):
+                stats["rejected"] += 1
+                continue
+            slot = pending.get((signal[0], LIVE))
+            if slot is None:
+                pending[(signal[0], LIVE)] = [1, vehicles, pedestrians, queue, density, stamp, signal[1]]
+            else:
+                slot[N] += 1
+                slot[VEHICLES] += vehicles
+                slot[PEDESTRIANS] += pedestrians
+                slot[QUEUE] += queue
+                slot[DENSITY] += density
+                if stamp > slot[LATEST]:
+                    slot[LATEST] = stamp
+            stats["accepted"] += 1
+            self.pending_readings += 1
+
+        # New controllers may appear after startup; re-read the registry at most every 30 s
+        if unknown and time.monotonic() - self._registry_refreshed > 30:
+            self._registry_refreshed = time.monotonic()
+            asyncio.get_running_loop().run_in_executor(None, self.load_signals)
+
+        if self.pending_readings >= self.max_pending and self._flush_now is not None:
+            self._flush_now.set()
+
+    def submit(self, readings: List[Tuple[str, int, int, int, float, int, int]]) -> int:
+        """Queue already-validated (code, vehicles, pedestrians, queue, density, epoch_ms, interval_ms) readings.
+
+        Used for edge-agent summary batches posted over HTTP. Each summary keeps its own
+        row and timestamp, so a replayed backlog lands in the history as it happened; only
+        summaries of the same signal and interval are coalesced. Returns the number accepted.
+        """
+        accepted = 0
+        oldest, newest = stamp_window()
+        for code, vehicles, pedestrians, queue, density, stamp, interval_ms in readings:
+            self.stats["received"] += 1
+            signal = self.signals.get(code.encode())
+            if signal is None:
+                self.stats["unknown_signal"] += 1
+                continue
+            if stamp and not oldest <= stamp <= newest:
+                self.stats["rejected"] += 1
+                continue
+            key = (signal[0], stamp // max(interval_ms, 1) + 1 if stamp else LIVE)
+            slot = self.pending.get(key)
+            if slot is None:
+                self.pending[key] = [1, vehicles, pedestrians, queue, density, stamp, signal[1]]
+            else:
+                slot[N] += 1
+                slot[VEHICLES] += vehicles
+                slot[PEDESTRIANS] += pedestrians
+                slot[QUEUE] += queue
+                slot[DENSITY] += density
+                if stamp > slot[LATEST]:
+                    slot[LATEST] = stamp
+            accepted += 1
+        self.stats["accepted"] += accepted
+        self.pending_readings += accepted
+        if self.pending_readings >= self.max_pending and self._flush_now is not None:
+            self._flush_now.set()
+        return accepted
+
+    def _apply_backpressure(self):
+        if not self.paused:
+            self.paused = True
+            self.stats["backpressure_pauses"] += 1
+            for transport in self.tcp_transports:
+                transport.pause_reading()
+
+    def _release_backpressure(self):
+        if self.paused:
+            self.paused = False
+            for transport in self.tcp_transports:
+                transport.resume_reading()
+
+    def _write_rows(self, rows: List[dict]):
+        """Bulk insert one batch (runs in a worker thread)"""
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.TrafficLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _requeue(self, batch: Dict[Tuple[int, int], list]):
+        """Put a batch whose write failed back in front of the readings that arrived meanwhile"""
+        readings = sum(slot[N] for slot in batch.values())
+        self._failed_flushes += 1
+        if self._failed_flushes > settings.EDGE_FLUSH_MAX_RETRIES:
+            self._failed_flushes = 0
+            self.stats["dropped_on_error"] += readings
+            print(f"[ERROR] Edge ingestion dropped {readings} readings after "
+                  f"{settings.EDGE_FLUSH_MAX_RETRIES} failed retries")
+            return
+        for key, slot in batch.items():
+            newer = self.pending.get(key)
+            if newer is not None:
+                for field in (N, VEHICLES, PEDESTRIANS, QUEUE, DENSITY):
+                    slot[field] += newer[field]
+                slot[LATEST] = max(slot[LATEST], newer[LATEST])
+            self.pending[key] = slot
+        self.pending_readings += readings
+        self.stats["requeued"] += readings
+
+    async def flush(self) -> int:
+        """Write coalesced readings as one batch and publish them"""
+        if not self.pending:
+            return 0
+        batch, self.pending, self.pending_readings = self.pending, {}, 0
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        rows = []
+        observed: Dict[datetime, list] = {}  # Observation time -> (reading, queue length) pairs
+        updates = []
+        for (signal_key, interval), slot in batch.items():
+            n = slot[N]
+            vehicles = round(slot[VEHICLES] / n)
+            density = round(slot[DENSITY] / n, 3)
+            timestamp = reading_time(slot[LATEST], now)
+            rows.append({
+                "signal_key": signal_key,
+                "vehicle_count": vehicles,
+                "pedestrian_count": round(slot[PEDESTRIANS] / n),
+                "queue_length": round(slot[QUEUE] / n),
+                "density": density,
+                "timestamp": timestamp,
+            })
+            observed.setdefault(now if interval == LIVE else timestamp, []).append(
+                ((signal_key, slot[ZONE], vehicles, density), rows[-1]["queue_length"]))
+            updates.append({
+                "signal_key": signal_key,
+                "zone_id": slot[ZONE],
+                "vehicle_count": vehicles,
+                "queue_length": rows[-1]["queue_length"],
+                "density": density,
+                "readings": n,
+                "timestamp": timestamp.isoformat(),
+            })
+
+        try:
+            await asyncio.to_thread(self._write_rows, rows)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"Edge ingestion flush error: {e}")
+            # Retried with the next flush, so a transient error (e.g. a locked database) loses nothing
+            self._requeue(batch)
+            return 0
+        finally:
+            self._release_backpressure()
+        self._failed_flushes = 0
+
+        # Oldest first, so replayed intervals reach the profiles and forecasts in order
+        for timestamp in sorted(observed):
+            readings = [reading for reading, _ in observed[timestamp]]
+            demand_profiles.observe_many(timestamp, readings)
+            forecaster.observe_many(timestamp, readings)
+            road_segments.observe_many(timestamp, readings)
+            signal_state.observe_many(timestamp, readings, [queue for _, queue in observed[timestamp]])
+            worker_bus.publish_readings(timestamp, readings)
+        data_versions.bump()
+
+        self.stats["rows_written"] += len(rows)
+        self.stats["flushes"] += 1
+        self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        record_rows("edge", len(rows), time.perf_counter() - started)
+
+        await realtime_data_service.broadcast("edge_traffic_update", {
+            "signals": updates,
+            "timestamp": now.isoformat(),
+        })
+        return len(rows)
+
+    async def _flush_loop(self):
+        while self.running:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Edge ingestion flush loop error: {e}")
+
+    async def start(self, host: str, udp_port: int, tcp_port: int):
+        """Load the signal registry and start UDP/TCP listeners and the flush loop"""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.load_signals)
+        self.running = True
+        self._flush_now = asyncio.Event()
+
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPProtocol(self), local_addr=(host, udp_port)
+        )
+        self._servers.append(transport)
+        server = await loop.create_server(lambda: _TCPProtocol(self), host, tcp_port)
+        self._servers.append(server)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+        if settings.EDGE_MQTT_ENABLED:
+            try:
+                self.start_mqtt()
+            except Exception as e:
+                print(f"[WARNING] Edge MQTT subscription unavailable: {e}")
+        print(f"[OK] Edge ingestion listening on udp/{udp_port} and tcp/{tcp_port}")
+
+    def start_mqtt(self, client=None):
+        """Subscribe to edge readings on the MQTT broker.
+
+        The client connects from its network thread and keeps reconnecting, so an
+        unreachable broker never blocks the event loop; the subscription is made on
+        every (re)connect. `client` can be any object with paho-mqtt's Client
+        interface, which lets a local broker stand-in be used instead of a real broker.
+        """
+        loop = asyncio.get_running_loop()
+        if client is None:
+            import paho.mqtt.client as mqtt
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+
+        def on_connect(connected, _userdata, _flags, reason_code, _properties=None):
+            if reason_code != 0:
+                print(f"[WARNING] Edge MQTT connection refused: {reason_code}")
+                return
+            connected.subscribe(settings.EDGE_MQTT_TOPIC)
+
+        def on_message(_client, _userdata, message):
+            # paho delivers on its network thread; hand the payload to the event loop
+            loop.call_soon_threadsafe(self.feed, message.payload, True)
+
+        client.on_connect = on_connect
+        client.on_message = on_message
+        client.connect_async(settings.MQTT_BROKER, settings.MQTT_PORT)
+        client.loop_start()
+        self._mqtt = client
+
+    async def stop(self):
+        """Stop listeners and write whatever is still pending"""
+        if not self.running:
+            return
+        self.running = False
+        if self._mqtt is not None:
+            self._mqtt.disconnect()
+            self._mqtt.loop_stop()
+            self._mqtt = None
+        for server in self._servers:
+            server.close()
+        self._servers = []
+        for transport in list(self.tcp_transports):
+            transport.close()
+        if self._flush_task:
+            self._flush_now.set()
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+        print("[OK] Edge ingestion stopped")
+
+# Global instance
+edge_gateway = EdgeIngestionGateway(
+    flush_interval=settings.EDGE_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.EDGE_MAX_PENDING_READINGS,
+)
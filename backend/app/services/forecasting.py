@@ -0,0 +1,199 @@
+"""Short-horizon (5-15 min) traffic forecasting
+
+Damped-trend exponential smoothing (Holt) of vehicle count and density for
+every signal at once. State lives in NumPy arrays indexed by signal row, so
+a tick of readings is one vectorized O(1)-per-signal update instead of a
+refit. Readings arrive at irregular intervals, so elapsed time is measured
+in nominal steps of FORECAST_STEP_SECONDS.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import run_with_session
+
+METRICS = ("vehicle_count", "density")
+
+def epoch_seconds(timestamp: datetime) -> float:
+    """Epoch seconds, treating naive timestamps as UTC (as stored by the writers)"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+class ShortHorizonForecaster:
+    def __init__(self, step_seconds: float, alpha: float = 0.3, beta: float = 0.1,
+                 phi: float = 0.9, capacity: int = 1024):
+        self.step_seconds = step_seconds
+        self.alpha = alpha  # Level smoothing
+        self.beta = beta  # Trend smoothing
+        self.phi = phi  # Trend damping per step
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self.rows: Dict[int, int] = {}  # signal_key -> row
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.level = np.zeros((capacity, len(METRICS)))
+        self.trend = np.zeros((capacity, len(METRICS)))
+        self.error_var = np.zeros((capacity, len(METRICS)))  # EWMA of squared one-step errors
+        self.last_seen = np.zeros(capacity)  # Epoch seconds of the last reading
+        self.initialized = np.zeros(capacity, dtype=bool)
+
+    def _grow(self, needed: int):
+        capacity = len(self.last_seen)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        old = (self.level, self.trend, self.error_var, self.last_seen, self.initialized)
+        self._allocate(new_capacity)
+        for new, previous in zip(
+            (self.level, self.trend, self.error_var, self.last_seen, self.initialized), old
+        ):
+            new[:capacity] = previous
+
+    def row_indices(self, signal_keys: Sequence[int], create: bool = True) -> np.ndarray:
+        """Map signal keys to state rows (-1 for unknown keys when create is False)"""
+        rows = np.empty(len(signal_keys), dtype=np.int64)
+        for i, key in enumerate(signal_keys):
+            row = self.rows.get(key)
+            if row is None:
+                if not create:
+                    rows[i] = -1
+                    continue
+                row = self.rows[key] = len(self.rows)
+            rows[i] = row
+        self._grow(len(self.rows))
+        return rows
+
+    def _damped_sum(self, steps: np.ndarray) -> np.ndarray:
+        """phi + phi^2 + ... + phi^h for (possibly fractional) h steps"""
+        if self.phi >= 1.0:
+            return steps
+        return self.phi * (1 - self.phi ** steps) / (1 - self.phi)
+
+    def update_rows(self, rows: np.ndarray, values: np.ndarray, timestamp: float):
+        """One smoothing step for the given rows; values has shape (len(rows), len(METRICS))"""
+        new = ~self.initialized[rows]
+        if new.any():
+            fresh = rows[new]
+            self.level[fresh] = values[new]
+            self.trend[fresh] = 0.0
+            self.error_var[fresh] = 0.0
+            self.last_seen[fresh] = timestamp
+            self.initialized[fresh] = True
+        known = rows[~new]
+        if len(known):
+            steps = np.maximum((timestamp - self.last_seen[known]) / self.step_seconds, 1e-3)[:, None]
+            trend = self.trend[known]
+            predicted = self.level[known] + trend * self._damped_sum(steps)
+            error = values[~new] - predicted
+            self.level[known] = predicted + self.alpha * error
+            self.trend[known] = trend * self.phi ** steps + self.alpha * self.beta * error
+            self.error_var[known] += self.alpha * (error * error - self.error_var[known])
+            self.last_seen[known] = timestamp
+
+    def observe_many(self, timestamp: datetime, readings: Iterable[Tuple[int, str, float, float]]):
+        """Fold a tick's (signal_key, zone_id, vehicles, density) readings into the models"""
+        if not self.loaded:
+            # Not warmed up yet; fit() will pick these readings up from the database
+            return
+        readings = list(readings)
+        if not readings:
+            return
+        rows = self.row_indices([r[0] for r in readings])
+        values = np.array([(r[2], r[3]) for r in readings], dtype=float)
+        self.update_rows(rows, values, epoch_seconds(timestamp))
+
+    def fit(self, signal_keys: Sequence[int], times: np.ndarray, values: np.ndarray, mask: np.ndarray):
+        """Batch-fit from history for all signals at once.
+
+        times: (T,) epoch seconds; values: (N, T, len(METRICS)); mask: (N, T) True where observed.
+        Loops over time steps only; every step is vectorized across signals.
+        """
+        rows = self.row_indices(signal_keys)
+        self.initialized[rows] = False
+        for t in range(len(times)):
+            present = mask[:, t]
+            if present.any():
+                self.update_rows(rows[present], values[present, t], float(times[t]))
+
+    def load(self, db: Session):
+        """Warm up from recent logs bucketed to the nominal step, then switch to O(1) updates"""
+        since = datetime.utcnow() - timedelta(minutes=settings.FORECAST_WARMUP_MINUTES)
+        start = epoch_seconds(since)
+        # Buckets are computed by the database: one row per signal and step, not per log
+        offset = (func.extract("epoch", models.TrafficLog.timestamp) - start) / self.step_seconds
+        bucket = cast(offset, Integer) if db.bind.dialect.name == "sqlite" else func.floor(offset)
+        rows = db.query(
+            models.TrafficLog.signal_key,
+            bucket,
+            func.count(),
+            func.sum(func.coalesce(models.TrafficLog.vehicle_count, 0)),
+            func.sum(func.coalesce(models.TrafficLog.density, 0.0)),
+        ).filter(
+            models.TrafficLog.timestamp >= since
+        ).group_by(models.TrafficLog.signal_key, bucket).all()
+
+        if rows:
+            data = np.array([tuple(float(value or 0) for value in row) for row in rows])
+            keys, key_rows = np.unique(data[:, 0].astype(np.int64), return_inverse=True)
+            buckets = int(settings.FORECAST_WARMUP_MINUTES * 60 // self.step_seconds) + 1
+            slots = np.clip(data[:, 1].astype(np.int64), 0, buckets - 1)
+            sums = np.zeros((len(keys), buckets, len(METRICS)))
+            counts = np.zeros((len(keys), buckets))
+            np.add.at(counts, (key_rows, slots), data[:, 2])
+            np.add.at(sums, (key_rows, slots, 0), data[:, 3])
+            np.add.at(sums, (key_rows, slots, 1), data[:, 4])
+            mask = counts > 0
+            values = np.divide(sums, counts[:, :, None], out=np.zeros_like(sums), where=mask[:, :, None])
+            times = start + (np.arange(buckets) + 1) * self.step_seconds
+            self.fit(keys.tolist(), times, values, mask)
+
+        self.loaded = True
+        print(f"[OK] Forecaster warmed up for {len(self.rows)} signals")
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            self.load(db)
+
+    async def ensure_loaded_async(self):
+        """ensure_loaded() with the warm-up in a worker thread, run once for concurrent callers"""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if not self.loaded:
+                await asyncio.to_thread(run_with_session, self.load)
+
+    def forecast(self, signal_keys: Sequence[int], horizons_minutes: Sequence[float],
+                 now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """Forecast every metric for each signal and horizon.
+
+        Returns arrays of shape (N, H, len(METRICS)) for "mean" and "stddev",
+        and a (N,) "known" mask for signals that have a fitted model.
+        """
+        now_ts = epoch_seconds(now or datetime.utcnow())
+        rows = self.row_indices(signal_keys, create=False)
+        known = rows >= 0
+        known[known] = self.initialized[rows[known]]
+        safe_rows = np.where(known, rows, 0)
+
+        horizons = np.asarray(horizons_minutes, dtype=float) * 60
+        # Steps from each signal's last reading to now + horizon: (N, H)
+        steps = (now_ts + horizons[None, :] - self.last_seen[safe_rows][:, None]) / self.step_seconds
+        steps = np.maximum(steps, 0.0)
+        damped = self._damped_sum(steps)[:, :, None]
+        mean = self.level[safe_rows][:, None, :] + self.trend[safe_rows][:, None, :] * damped
+        mean = np.maximum(mean, 0.0)
+        # Forecast variance grows roughly linearly with horizon for smoothing models
+        growth = 1.0 + self.alpha * self.alpha * steps[:, :, None]
+        stddev = np.sqrt(self.error_var[safe_rows][:, None, :] * growth)
+        return {"mean": mean, "stddev": stddev, "known": known}
+
+# Global instance
+forecaster = ShortHorizonForecaster(step_seconds=settings.FORECAST_STEP_SECONDS)
@@ -0,0 +1,109 @@
+"""
+Leader election between uvicorn worker processes on one host
+Workers race for an exclusive, non-blocking lock on a file. The winner runs
+the producers (simulator, real-time service, edge gateway) and hosts the
+worker bus hub; the others serve HTTP/WebSocket only, join the hub and keep
+retrying the lock. The OS releases the lock when the leader process exits,
+so a follower takes over within LEADER_RETRY_SECONDS.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.services.worker_bus import WorkerBus, runtime_path, worker_bus
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        """Take the lock without blocking; False if another process holds it"""
+        if self._file is not None:
+            return True
+        handle = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+class LeaderElection:
+    def __init__(self, lock: FileLock, bus: WorkerBus, retry_seconds: float):
+        self.lock = lock
+        self.bus = bus
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callable[[], Awaitable[None]]] = None
+
+    async def _campaign(self):
+        while not self.is_leader:
+            if self.lock.try_acquire():
+                self.is_leader = True
+                await self.bus.become_hub()
+                print(f"[OK] Worker {os.getpid()} elected leader; starting producers")
+                await self._on_elected()
+                return
+            self.bus.join()
+            await asyncio.sleep(self.retry_seconds)
+
+    async def start(self, on_elected: Callable[[], Awaitable[None]]):
+        """Try to become leader now; otherwise join as a follower and keep trying in the background"""
+        self._on_elected = on_elected
+        if self.lock.try_acquire():
+            self.is_leader = True
+            await self.bus.become_hub()
+            await on_elected()
+            return
+        print(f"[INFO] Worker {os.getpid()} running as follower (producers run in the leader)")
+        self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.bus.stop()
+        self.lock.release()
+        self.is_leader = False
+
+# Global instance
+leader_election = LeaderElection(
+    lock=FileLock(settings.WORKER_LOCK_PATH or runtime_path("lock")),
+    bus=worker_bus,
+    retry_seconds=settings.LEADER_RETRY_SECONDS,
+)
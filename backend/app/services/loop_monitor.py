@@ -0,0 +1,135 @@
+"""
+Event-loop lag monitor and blocking-call detector
+A periodic timer on the loop measures scheduling lag and refreshes a
+heartbeat. A watchdog thread checks the heartbeat; while it is older than
+the threshold the loop is blocked, so the thread samples the loop thread's
+stack. When the stall ends, the most frequently sampled stack (the blocking
+call) is logged and kept for /api/v1/metrics/loop.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Optional
+
+from app.core.config import settings
+from app.services.metrics import (
+    event_loop_lag, event_loop_lag_last, event_loop_stalls, event_loop_stall_duration,
+)
+
+STACK_DEPTH = 15  # Innermost frames kept per sample
+RECENT_STALLS = 50
+
+class LoopLagMonitor:
+    def __init__(self, interval: float, block_threshold: float, watchdog: bool = True):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.watchdog = watchdog
+        self.running = False
+        self.max_lag = 0.0
+        self.heartbeat = time.monotonic()
+        self.stalls: Deque[dict] = deque(maxlen=RECENT_STALLS)
+        self.stall_count = 0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def _run(self):
+        while self.running:
+            expected = time.perf_counter() + self.interval
+            self.heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = time.monotonic()
+            # Anything past the deadline is time the loop spent on other (blocking) work
+            lag = max(0.0, time.perf_counter() - expected)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def _sample_stack(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return "".join(traceback.format_stack(frame)[-STACK_DEPTH:])
+
+    def _watch(self):
+        """Watchdog thread: sample the loop thread's stack while the heartbeat is stale"""
+        # The heartbeat is refreshed every `interval`, so allow for that before calling it a stall
+        limit = self.interval + self.block_threshold
+        check = min(self.block_threshold / 2, 0.05)
+        samples: Counter = Counter()
+        stall_started = None
+        while not self._stop.wait(check):
+            stale = time.monotonic() - self.heartbeat
+            if stale > limit:
+                if stall_started is None:
+                    stall_started = self.heartbeat + self.interval
+                stack = self._sample_stack()
+                if stack:
+                    samples[stack] += 1
+            elif stall_started is not None:
+                self._record_stall(self.heartbeat - stall_started, samples)
+                samples = Counter()
+                stall_started = None
+
+    def _record_stall(self, duration: float, samples: Counter):
+        duration = max(duration, self.block_threshold)
+        stack, hits = samples.most_common(1)[0] if samples else ("", 0)
+        self.stall_count += 1
+        event_loop_stalls.inc()
+        event_loop_stall_duration.observe(duration)
+        self.stalls.append({
+            "detected_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration * 1000, 1),
+            "samples": sum(samples.values()),
+            "stack_samples": hits,
+            "stack": stack,
+        })
+        print(f"[WARNING] Event loop blocked for ~{duration * 1000:.0f} ms; blocking stack:\n{stack}")
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.heartbeat = time.monotonic()
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._run())
+        if self.watchdog:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._thread.start()
+
+    async def stop(self):
+        self.running = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "block_threshold_ms": self.block_threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+# Global instance
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_LAG_INTERVAL_SECONDS,
+    block_threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+    watchdog=settings.LOOP_WATCHDOG_ENABLED,
+)
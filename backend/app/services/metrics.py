@@ -0,0 +1,276 @@
+"""
+In-process metrics registry with Prometheus text exposition
+Counters, gauges and histograms keyed by label values. Recording is a dict
+lookup plus a few additions under an uncontended lock, so it is cheap
+enough for per-request and per-query use. Gauges (and counters) can also be
+backed by a function that is only evaluated when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+ROWS_BUCKETS = (10, 100, 1000, 5000, 10000, 50000, 100000, 500000)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()  # Export unlabeled metrics from the start
+
+    def labels(self, *values) -> "_Metric":
+        """Child for one combination of label values"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def set_function(self, function: Callable[[], float], *values):
+        """Evaluate function() at scrape time instead of storing a value"""
+        self._functions[tuple(str(value) for value in values)] = function
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        return self.labels()
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(suffix, label string, value) for every child"""
+        for key, child in list(self._children.items()):
+            if key not in self._functions:
+                yield from child.samples(self.labelnames, key)
+        for key, function in list(self._functions.items()):
+            try:
+                value = float(function())
+            except Exception:
+                continue
+            yield "", _format_labels(self.labelnames, key), value
+
+class _CounterChild:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, names, key):
+        yield "_total", _format_labels(names, key), self.value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def samples(self):
+        for suffix, labels, value in super().samples():
+            yield suffix or "_total", labels, value
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def samples(self, names, key):
+        yield "", _format_labels(names, key), self.value
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, names, key):
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            yield "_bucket", _format_labels(names, key, f'le="{_format_value(bound)}"'), cumulative
+        yield "_sum", _format_labels(names, key), self.sum
+        yield "_count", _format_labels(names, key), cumulative
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "urbanflow"):
+        self.prefix = prefix
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.prefix}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.prefix}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.prefix}_{name}", documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Global registry and the metrics recorded across the app
+metrics_registry = MetricsRegistry()
+
+http_requests = metrics_registry.counter(
+    "http_requests", "HTTP requests by route template and status", ("method", "route", "status"))
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+db_queries = metrics_registry.counter(
+    "db_queries", "SQL statements executed")
+db_query_duration = metrics_registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time")
+db_queries_per_request = metrics_registry.histogram(
+    "db_queries_per_request", "SQL statements issued while serving one request", ("route",), COUNT_BUCKETS)
+db_time_per_request = metrics_registry.histogram(
+    "db_time_per_request_seconds", "SQL time spent while serving one request", ("route",))
+tick_duration = metrics_registry.histogram(
+    "tick_duration_seconds", "Duration of one background loop tick", ("loop",))
+rows_written = metrics_registry.counter(
+    "rows_written", "Traffic log rows written", ("source",))
+rows_per_tick = metrics_registry.histogram(
+    "rows_per_tick", "Traffic log rows written per tick", ("source",), ROWS_BUCKETS)
+websocket_clients = metrics_registry.gauge(
+    "websocket_clients", "Connected WebSocket clients per broadcasting service", ("service",))
+websocket_send_failures = metrics_registry.counter(
+    "websocket_send_failures", "Failed WebSocket sends (client dropped)", ("service",))
+queue_depth = metrics_registry.gauge(
+    "queue_depth", "Items waiting in in-process queues", ("queue",))
+response_cache_requests = metrics_registry.counter(
+    "response_cache_requests", "Response cache lookups by result", ("result",))
+edge_readings = metrics_registry.counter(
+    "edge_readings", "Edge ingestion readings by outcome", ("outcome",))
+worker_leader = metrics_registry.gauge(
+    "worker_leader", "1 if this worker runs the producers (elected leader), else 0")
+worker_bus_messages = metrics_registry.counter(
+    "worker_bus_messages", "Worker bus messages by direction", ("direction",))
+signal_state_reads = metrics_registry.counter(
+    "signal_state_reads", "Shared signal state reads by result", ("result",))
+event_loop_lag = metrics_registry.histogram(
+    "event_loop_lag_seconds", "Event-loop scheduling lag (timer overshoot)")
+event_loop_lag_last = metrics_registry.gauge(
+    "event_loop_lag_last_seconds", "Most recent event-loop lag sample")
+event_loop_stalls = metrics_registry.counter(
+    "event_loop_stalls", "Times the event loop was blocked longer than LOOP_BLOCK_THRESHOLD_MS")
+event_loop_stall_duration = metrics_registry.histogram(
+    "event_loop_stall_duration_seconds", "Duration of detected event-loop stalls")
+
+def record_rows(source: str, rows: int, seconds: Optional[float] = None):
+    """Record one tick of a writer: rows written and, if given, its duration"""
+    rows_written.labels(source).inc(rows)
+    rows_per_tick.labels(source).observe(rows)
+    if seconds is not None:
+        tick_duration.labels(source).observe(seconds)
+
+# [query count, query seconds] of the request being served, set by RequestMetricsMiddleware
+request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+def instrument_engine(engine):
+    """Count and time every SQL statement, attributing it to the current request if any"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_queries.inc()
+        db_query_duration.observe(elapsed)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
@@ -0,0 +1,193 @@
+"""
+Per-request SQL query profiler (opt-in, QUERY_PROFILER_ENABLED)
+Attributes every statement executed while serving a request to that
+request, logs requests that exceed the slow thresholds together with their
+most expensive statements, and keeps aggregated per-route and
+per-statement stats for /api/v1/metrics/queries.
+"""
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+TOP_STATEMENTS = 5
+MAX_FINGERPRINTS = 2000  # Bound on distinct statements kept in the aggregate
+
+_whitespace = re.compile(r"\s+")
+_in_list = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))+\s*\)")
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_select_list = re.compile(r"^SELECT (?:DISTINCT )?(.{60,}?) FROM ")
+
+def summarize(statement: str, width: int = 160) -> str:
+    """Short form for log lines: long ORM column lists are elided so the FROM/WHERE part stays visible"""
+    return _select_list.sub("SELECT ... FROM ", statement, count=1)[:width]
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions that differ only in literals / IN-list length group together"""
+    statement = _whitespace.sub(" ", statement).strip()
+    statement = _in_list.sub("(?, ...)", statement)
+    statement = _literals.sub("?", statement)
+    return statement[:1000]
+
+class RequestProfile:
+    __slots__ = ("statements", "count", "seconds")
+
+    def __init__(self):
+        self.statements: Dict[str, List[float]] = {}  # fingerprint -> [count, seconds]
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, key: str, elapsed: float):
+        entry = self.statements.get(key)
+        if entry is None:
+            self.statements[key] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+        self.count += 1
+        self.seconds += elapsed
+
+    def top(self, n: int = TOP_STATEMENTS) -> List[dict]:
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:n]
+        return [
+            {"statement": key, "count": int(count), "total_ms": round(seconds * 1000, 3)}
+            for key, (count, seconds) in ranked
+        ]
+
+class QueryProfiler:
+    def __init__(self, slow_request_ms: float, slow_request_queries: int, slow_query_ms: float):
+        self.slow_request_ms = slow_request_ms
+        self.slow_request_queries = slow_request_queries
+        self.slow_query_ms = slow_query_ms
+        self.current: ContextVar[Optional[RequestProfile]] = ContextVar("query_profile", default=None)
+        self._fingerprints: Dict[str, str] = {}  # Raw statement -> fingerprint cache
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes: Dict[str, dict] = {}
+            self.statements: Dict[str, List[float]] = {}  # fingerprint -> [count, seconds, max seconds]
+            self.slow_requests = 0
+            self.slow_queries = 0
+            self.started = time.time()
+
+    def _fingerprint(self, statement: str) -> str:
+        key = self._fingerprints.get(statement)
+        if key is None:
+            key = fingerprint(statement)
+            if len(self._fingerprints) < MAX_FINGERPRINTS * 4:
+                self._fingerprints[statement] = key
+        return key
+
+    def install(self, engine):
+        """Hook the engine's cursor events"""
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["profiler_started"].pop()
+            self.record(statement, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def _handle_error(context):
+            started = context.connection.info.get("profiler_started") if context.connection else None
+            if started:
+                started.pop()
+
+    def record(self, statement: str, elapsed: float):
+        key = self._fingerprint(statement)
+        profile = self.current.get()
+        if profile is not None:
+            profile.add(key, elapsed)
+        with self._lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                if len(self.statements) < MAX_FINGERPRINTS:
+                    self.statements[key] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+            if elapsed * 1000 >= self.slow_query_ms:
+                self.slow_queries += 1
+                slow = True
+            else:
+                slow = False
+        if slow:
+            print(f"[WARNING] Slow query ({elapsed * 1000:.1f} ms): {summarize(key, 200)}")
+
+    def begin_request(self):
+        """Start attributing queries to a new request; returns (profile, token)"""
+        profile = RequestProfile()
+        return profile, self.current.set(profile)
+
+    def end_request(self, token, profile: RequestProfile, method: str, route: str, elapsed: float):
+        self.current.reset(token)
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = {
+                    "requests": 0, "queries": 0, "db_seconds": 0.0, "max_queries": 0, "slow_requests": 0,
+                }
+            stats["requests"] += 1
+            stats["queries"] += profile.count
+            stats["db_seconds"] += profile.seconds
+            stats["max_queries"] = max(stats["max_queries"], profile.count)
+            slow = elapsed * 1000 >= self.slow_request_ms or profile.count >= self.slow_request_queries
+            if slow:
+                stats["slow_requests"] += 1
+                self.slow_requests += 1
+        if slow:
+            print(f"[WARNING] Slow request {method} {route}: {elapsed * 1000:.1f} ms, "
+                  f"{profile.count} queries, {profile.seconds * 1000:.1f} ms in SQL")
+            for entry in profile.top():
+                print(f"    {entry['count']:4d}x {entry['total_ms']:9.3f} ms  {summarize(entry['statement'])}")
+
+    def stats(self, top: int = 20) -> dict:
+        """Per-route totals and the most expensive statements since the last reset"""
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": s["requests"],
+                    "queries_per_request": round(s["queries"] / s["requests"], 2),
+                    "max_queries": s["max_queries"],
+                    "db_ms_per_request": round(s["db_seconds"] / s["requests"] * 1000, 3),
+                    "slow_requests": s["slow_requests"],
+                }
+                for route, s in self.routes.items()
+            }
+            ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:top]
+            statements = [
+                {
+                    "statement": key,
+                    "count": int(count),
+                    "total_ms": round(seconds * 1000, 3),
+                    "avg_ms": round(seconds / count * 1000, 3),
+                    "max_ms": round(max_seconds * 1000, 3),
+                }
+                for key, (count, seconds, max_seconds) in ranked
+            ]
+            return {
+                "since": self.started,
+                "slow_requests": self.slow_requests,
+                "slow_queries": self.slow_queries,
+                "routes": dict(sorted(routes.items(), key=lambda item: -item[1]["queries_per_request"])),
+                "top_statements": statements,
+            }
+
+# Global instance
+query_profiler = QueryProfiler(
+    slow_request_ms=settings.SLOW_REQUEST_MS,
+    slow_request_queries=settings.SLOW_REQUEST_QUERIES,
+    slow_query_ms=settings.SLOW_QUERY_MS,
+)
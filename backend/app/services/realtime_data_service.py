@@ -4,26 +4,70 @@ Integrates free public APIs and data sources for real-time traffic information
 Final Year Project - Urban Flow Traffic Control System
 """
 import asyncio
+import importlib.util
+import os
 import random
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.database import SessionLocal
 from app.db import models
+from app.services.data_version import data_versions
+from app.services.demand_profiles import demand_profiles
+from app.services.forecasting import forecaster
+from app.services.metrics import record_rows, websocket_send_failures
+from app.services.worker_bus import worker_bus
+from app.services.signal_state import signal_state
+from app.services.road_graph import default_graph_path, default_osm_cache, road_graph
+from app.services.leader import FileLock
+from app.services.road_segments import congestion_level, road_segments
+from app.services.weather import WEATHER_MULTIPLIERS, weather_provider
 
-# Try to import aiohttp, fallback if not available
-try:
-    import aiohttp
-    HAS_AIOHTTP = True
-except ImportError:
-    HAS_AIOHTTP = False
+# aiohttp is optional and slow to import, so it is only loaded when the first API request is made
+HAS_AIOHTTP = importlib.util.find_spec("aiohttp") is not None
+if not HAS_AIOHTTP:
     print("[WARNING] aiohttp not installed. Install with: pip install aiohttp")
+if TYPE_CHECKING:
+    import aiohttp
+
+# Base readings scaled by the time-of-day and weather multipliers
+BASE_VEHICLE_COUNT = 30
+BASE_QUEUE_LENGTH = 10
+BASE_SPEED = 40  # km/h
+
+ROAD_CONGESTION_SEGMENTS = 200  # Most congested segments sent with each road_congestion_update
+
+def time_multiplier(hour: int, day_of_week: int) -> float:
+    """Demand multiplier for an hour of the day (day_of_week 0 = Monday), from Mumbai's rush hours"""
+    # Mumbai rush hours: 8-10 AM, 6-8 PM
+    # Weekend patterns are different
+    if day_of_week >= 5:
+        # Weekend: Lower traffic, more spread out
+        return 0.7 if 10 <= hour <= 20 else 0.4
+    # Weekday patterns
+    if 8 <= hour <= 10:  # Morning rush
+        return 1.5
+    if 18 <= hour <= 20:  # Evening rush
+        return 1.6
+    if 10 <= hour <= 12 or 14 <= hour <= 17:  # Mid-day
+        return 1.0
+    if 12 <= hour <= 14:  # Lunch time
+        return 0.8
+    if 20 <= hour <= 22:  # Late evening
+        return 0.7
+    return 0.3  # Night/Early morning
+
+def is_rush_hour(hour: int) -> bool:
+    return (8 <= hour <= 10) or (18 <= hour <= 20)
 
 class RealTimeDataService:
     def __init__(self):
         self.running = False
         self.websocket_connections = []
-        self.session: Optional[aiohttp.ClientSession] = None if not HAS_AIOHTTP else None
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self.osm_lock = asyncio.Lock()
         self.mumbai_bounds = {
             "min_lat": 18.9,
             "max_lat": 19.3,
@@ -41,15 +85,19 @@ class RealTimeDataService:
             self.websocket_connections.remove(ws)
     
     async def broadcast(self, message_type: str, data: dict):
-        """Broadcast message to all connected WebSocket clients"""
-        if not self.websocket_connections:
-            return
-        
+        """Broadcast message to all connected WebSocket clients, in every worker"""
         message = {
             "type": message_type,
             "data": data,
             "timestamp": datetime.utcnow().isoformat(),
         }
+        worker_bus.publish("broadcast", {"service": "realtime_data_service", "message": message})
+        await self.deliver(message)
+    
+    async def deliver(self, message: dict):
+        """Send a message to this worker's WebSocket clients"""
+        if not self.websocket_connections:
+            return
         
         disconnected = []
         for ws in self.websocket_connections:
@@ -61,6 +109,7 @@ class RealTimeDataService:
                     await ws.send_text(json.dumps(message))
             except Exception as e:
                 print(f"WebSocket broadcast error: {e}")
+                websocket_send_failures.labels("realtime_data_service").inc()
                 disconnected.append(ws)
         
         for ws in disconnected:
@@ -68,40 +117,88 @@ class RealTimeDataService:
     
     async def fetch_openstreetmap_traffic(self) -> Dict:
         """
-        Fetch road network data from OpenStreetMap Overpass API (Free)
-        This provides real road geometries and can be used to enhance our road network
+        Road network from OpenStreetMap, ingested once into the memory-mapped road graph
+        Overpass is only queried when neither the graph file nor a cached response
+        exists; the raw response is kept so the graph can be rebuilt offline
         """
+        graph = road_graph.get()
+        if graph is None:
+            async with self.osm_lock:  # Concurrent callers wait for one download (per process)
+                graph = road_graph.get()
+                if graph is None:
+                    error = await self.ingest_openstreetmap()
+                    if error:
+                        return {"success": False, "error": error}
+                    graph = road_graph.get()
+        return {"success": True, "data": graph.summary(), "source": "OpenStreetMap (cached road graph)"}
+    
+    async def ingest_openstreetmap(self) -> Optional[str]:
+        """Build the road graph from the cached Overpass response, downloading it first if needed.
+        A file lock next to the graph makes one worker download and build; the others wait for
+        it without blocking their event loop and then open the graph it saved"""
+        lock = FileLock(f"{default_graph_path()}.lock")
+        os.makedirs(os.path.dirname(os.path.abspath(lock.path)), exist_ok=True)
+        while not lock.try_acquire():
+            await asyncio.sleep(1.0)
+        try:
+            if road_graph.get() is not None:
+                return None  # Built by another worker while we waited
+            cache = default_osm_cache()
+            if not os.path.exists(cache):
+                if not settings.ROAD_GRAPH_FETCH_ENABLED:
+                    return "No road graph; build one with scripts/build_road_graph.py"
+                error = await self.download_openstreetmap(cache)
+                if error:
+                    return error
+            try:
+                await asyncio.to_thread(road_graph.build, cache)
+            except Exception as e:
+                print(f"[ERROR] Road graph build failed: {e}")
+                return str(e)
+            return None
+        finally:
+            lock.release()
+    
+    async def download_openstreetmap(self, cache: str) -> Optional[str]:
+        """Save the Mumbai road network from the OpenStreetMap Overpass API (Free) to cache"""
         if not HAS_AIOHTTP:
-            return {"success": False, "error": "aiohttp not installed"}
+            return "aiohttp not installed"
+        import aiohttp
         
         try:
             if not self.session:
                 self.session = aiohttp.ClientSession()
             
-            # Mumbai bounding box query
+            # Mumbai bounding box query: drivable ways, then their nodes (with traffic signal tags)
             overpass_url = "https://overpass-api.de/api/interpreter"
             query = f"""
-            [out:json][timeout:25];
+            [out:json][timeout:120];
             (
-              way["highway"~"^(primary|secondary|tertiary|trunk)$"]
+              way["highway"~"^(motorway|trunk|primary|secondary|tertiary|unclassified|residential)(_link)?$"]
               ({self.mumbai_bounds['min_lat']},{self.mumbai_bounds['min_lon']},{self.mumbai_bounds['max_lat']},{self.mumbai_bounds['max_lon']});
             );
-            out geom;
+            (._; >;);
+            out body qt;
             """
             
             async with self.session.post(
                 overpass_url,
                 data={"data": query},
-                timeout=aiohttp.ClientTimeout(total=10)
+                timeout=aiohttp.ClientTimeout(total=180)
             ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {"success": True, "data": data, "source": "OpenStreetMap"}
-                else:
-                    return {"success": False, "error": f"HTTP {response.status}"}
+                if response.status != 200:
+                    return f"HTTP {response.status}"
+                body = await response.read()
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            temporary = f"{cache}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(body)
+            os.replace(temporary, cache)
+            print(f"[OK] OpenStreetMap road network saved to {cache} ({len(body) / 1e6:.1f} MB)")
+            return None
         except Exception as e:
             print(f"OpenStreetMap fetch error: {e}")
-            return {"success": False, "error": str(e)}
+            return str(e)
     
     def get_time_based_traffic_pattern(self) -> Dict:
         """
@@ -112,100 +209,46 @@ class RealTimeDataService:
         hour = now.hour
         day_of_week = now.weekday()  # 0 = Monday, 6 = Sunday
         
-        # Mumbai rush hours: 8-10 AM, 6-8 PM
-        # Weekend patterns are different
-        is_weekend = day_of_week >= 5
-        
-        if is_weekend:
-            # Weekend: Lower traffic, more spread out
-            if 10 <= hour <= 20:
-                base_multiplier = 0.7
-            else:
-                base_multiplier = 0.4
-        else:
-            # Weekday patterns
-            if 8 <= hour <= 10:  # Morning rush
-                base_multiplier = 1.5
-            elif 18 <= hour <= 20:  # Evening rush
-                base_multiplier = 1.6
-            elif 10 <= hour <= 12 or 14 <= hour <= 17:  # Mid-day
-                base_multiplier = 1.0
-            elif 12 <= hour <= 14:  # Lunch time
-                base_multiplier = 0.8
-            elif 20 <= hour <= 22:  # Late evening
-                base_multiplier = 0.7
-            else:  # Night/Early morning
-                base_multiplier = 0.3
-        
         return {
-            "time_multiplier": base_multiplier,
+            "time_multiplier": time_multiplier(hour, day_of_week),
             "hour": hour,
             "day_of_week": day_of_week,
-            "is_rush_hour": (8 <= hour <= 10) or (18 <= hour <= 20),
-            "is_weekend": is_weekend,
+            "is_rush_hour": is_rush_hour(hour),
+            "is_weekend": day_of_week >= 5,
         }
     
     async def fetch_weather_data(self) -> Dict:
         """
-        Fetch weather data from OpenWeatherMap (Free tier available)
-        Weather affects traffic patterns
+        Current weather (affects traffic patterns), shared by all callers
+        The configured backend (simulated, JSON file or HTTP API) is queried
+        at most once per WEATHER_TTL_SECONDS
         """
-        # For demo, we simulate weather. Can integrate real API if needed
-        try:
-            # Simulate weather conditions that affect traffic
-            conditions = ["clear", "cloudy", "rainy", "foggy"]
-            current_condition = random.choice(conditions)
-            
-            # Weather impact on traffic
-            weather_multiplier = {
-                "clear": 1.0,
-                "cloudy": 1.1,
-                "rainy": 1.4,  # Rain increases traffic significantly
-                "foggy": 1.3,
-            }
-            
-            return {
-                "condition": current_condition,
-                "temperature": random.randint(25, 35),  # Mumbai temperature range
-                "humidity": random.randint(60, 90),
-                "traffic_multiplier": weather_multiplier.get(current_condition, 1.0),
-                "source": "simulated_weather",
-            }
-        except Exception as e:
-            print(f"Weather fetch error: {e}")
-            return {
-                "condition": "clear",
-                "traffic_multiplier": 1.0,
-                "source": "fallback",
-            }
+        return await weather_provider.get()
     
-    async def generate_realistic_traffic_data(self, signal: models.Signal) -> Dict:
+    async def generate_realistic_traffic_data(self, signal: models.Signal, time_pattern: Optional[Dict] = None,
+                                              weather: Optional[Dict] = None) -> Dict:
         """
         Generate realistic traffic data based on:
         - Time of day patterns
         - Weather conditions
         - Historical patterns
         - Random variations
+        A tick passes in one time pattern and weather for all of its signals
         """
-        time_pattern = self.get_time_based_traffic_pattern()
-        weather = await self.fetch_weather_data()
-        
-        # Base traffic values
-        base_vehicle_count = 30
-        base_queue_length = 10
-        base_speed = 40  # km/h
+        time_pattern = time_pattern or self.get_time_based_traffic_pattern()
+        weather = weather or await self.fetch_weather_data()
         
         # Apply multipliers
         vehicle_count = int(
-            base_vehicle_count * time_pattern["time_multiplier"] * weather["traffic_multiplier"]
+            BASE_VEHICLE_COUNT * time_pattern["time_multiplier"] * weather["traffic_multiplier"]
         ) + random.randint(-10, 20)
         
         queue_length = int(
-            base_queue_length * time_pattern["time_multiplier"] * weather["traffic_multiplier"]
+            BASE_QUEUE_LENGTH * time_pattern["time_multiplier"] * weather["traffic_multiplier"]
         ) + random.randint(-5, 15)
         
         speed = max(10, int(
-            base_speed / (time_pattern["time_multiplier"] * weather["traffic_multiplier"])
+            BASE_SPEED / (time_pattern["time_multiplier"] * weather["traffic_multiplier"])
         ) + random.randint(-10, 10))
         
         # Calculate density (0.0 to 1.0)
@@ -223,35 +266,49 @@ class RealTimeDataService:
     
     async def update_traffic_data(self):
         """Update traffic data for all signals using real-time patterns"""
+        started = time.perf_counter()
         db = SessionLocal()
         try:
             signals = db.query(models.Signal).filter(
                 models.Signal.status == models.SignalStatus.ACTIVE
             ).all()
             
+            time_pattern = self.get_time_based_traffic_pattern()
+            weather = await self.fetch_weather_data()
             updates = []
             for signal in signals:
-                traffic_data = await self.generate_realistic_traffic_data(signal)
+                traffic_data = await self.generate_realistic_traffic_data(signal, time_pattern, weather)
                 
                 # Create traffic log
                 traffic_log = models.TrafficLog(
-                    signal_id=signal.id,
+                    signal_key=signal.log_key,
                     vehicle_count=traffic_data["vehicle_count"],
                     pedestrian_count=traffic_data["pedestrian_count"],
                     queue_length=traffic_data["queue_length"],
                     density=traffic_data["density"],
-                    traffic_density=traffic_data["density"],  # Also populate legacy column
                 )
                 db.add(traffic_log)
                 
                 updates.append({
                     "signal_id": signal.signal_id,
                     "signal_id_db": signal.id,
+                    "signal_key": signal.log_key,
                     "zone_id": signal.zone_id,
                     **traffic_data,
                 })
             
             db.commit()
+            tick_time = datetime.utcnow()
+            readings = [
+                (u["signal_key"], u["zone_id"], u["vehicle_count"], u["density"]) for u in updates
+            ]
+            demand_profiles.observe_many(tick_time, readings)
+            forecaster.observe_many(tick_time, readings)
+            road_segments.observe_many(tick_time, readings)
+            signal_state.observe_many(tick_time, readings, [u["queue_length"] for u in updates])
+            worker_bus.publish_readings(tick_time, readings)
+            data_versions.bump()
+            record_rows("realtime", len(readings), time.perf_counter() - started)
             
             # Broadcast updates
             await self.broadcast("realtime_traffic_update", {
@@ -268,17 +325,19 @@ class RealTimeDataService:
         finally:
             db.close()
     
-    async def update_road_congestion(self):
-        """Update road congestion levels based on real-time data"""
-        # This would integrate with actual road data
-        # For now, we'll use time-based patterns
+    async def update_road_congestion(self, zone_id: Optional[str] = None, limit: int = ROAD_CONGESTION_SEGMENTS,
+                                     geometry: bool = False):
+        """City-wide congestion level plus the most congested road segments (live, per segment)"""
         time_pattern = self.get_time_based_traffic_pattern()
         weather = await self.fetch_weather_data()
-        
-        # Determine congestion level
         multiplier = time_pattern["time_multiplier"] * weather["traffic_multiplier"]
+        await road_segments.ensure_loaded()
         
-        if multiplier >= 1.5:
+        # Segment densities when signals report on them; the time and weather multiplier otherwise
+        density = road_segments.mean_density(zone_id)
+        if density is not None:
+            congestion = congestion_level(density)
+        elif multiplier >= 1.5:
             congestion = "severe"
         elif multiplier >= 1.2:
             congestion = "high"
@@ -292,6 +351,8 @@ class RealTimeDataService:
             "multiplier": round(multiplier, 2),
             "time_pattern": time_pattern,
             "weather": weather,
+            "summary": road_segments.summary(zone_id),
+            "segments": road_segments.segments(zone_id, limit, geometry, with_signals_only=True),
         }
     
     async def run_realtime_updates(self):
@@ -328,8 +389,6 @@ class RealTimeDataService:
     
     async def _async_start(self):
         """Async initialization"""
-        if HAS_AIOHTTP:
-            self.session = aiohttp.ClientSession()
         asyncio.create_task(self.run_realtime_updates())
         print("[OK] Real-time data service started")
     
@@ -0,0 +1,111 @@
+"""Response cache for read-heavy dashboard endpoints
+
+Entries are keyed by (endpoint, zone scope, params) and dropped whenever a
+writer (simulator tick, real-time tick, signal update) bumps the data
+version of their zone (see data_version.py).
+Concurrent misses for the same key share one recompute (single-flight).
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.data_version import data_versions
+
+class ResponseCache:
+    def __init__(self, ttl_seconds: float):
+        # TTL only bounds staleness if no writer is running; ticks normally invalidate first
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.recomputes = 0
+        self.recompute_seconds_total = 0.0
+        self.recompute_seconds_max = 0.0
+
+    @staticmethod
+    def make_key(endpoint: str, scope: Optional[str], params: Optional[dict] = None) -> Tuple:
+        """Build a hashable cache key"""
+        return (endpoint, scope, tuple(sorted((params or {}).items())))
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        scope: Optional[str],
+        params: Optional[dict],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached response, or compute it once for all concurrent callers"""
+        key = self.make_key(endpoint, scope, params)
+
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self.hits += 1
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self.generation
+        started = time.perf_counter()
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.recomputes += 1
+            self.recompute_seconds_total += elapsed
+            self.recompute_seconds_max = max(self.recompute_seconds_max, elapsed)
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        # Don't store a value computed from data that was invalidated mid-flight
+        if generation == self.generation:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, zone_id: Optional[str] = None):
+        """Drop cached responses for a zone and the all-zones scope (None = everything)"""
+        self.generation += 1
+        self.invalidations += 1
+        if zone_id is None:
+            self._entries.clear()
+            self._inflight.clear()
+            return
+        for store in (self._entries, self._inflight):
+            for key in [key for key in store if key[1] in (zone_id, None)]:
+                del store[key]
+
+    def stats(self) -> dict:
+        """Hit rate and recompute timings"""
+        served = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.coalesced) / served, 4) if served else 0.0,
+            "invalidations": self.invalidations,
+            "recomputes": self.recomputes,
+            "recompute_ms_avg": round(self.recompute_seconds_total / self.recomputes * 1000, 3) if self.recomputes else 0.0,
+            "recompute_ms_max": round(self.recompute_seconds_max * 1000, 3),
+        }
+
+# Global instance
+response_cache = ResponseCache(ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS)
+data_versions.subscribe(response_cache.invalidate)
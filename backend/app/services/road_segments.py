@@ -0,0 +1,364 @@
+"""
+Live congestion per road segment
+Segments are the road graph's directed edges or, without a graph, the
+MUMBAI_ROADS polylines. Signals are joined to segments once, when the store
+loads (a signal belongs to every edge at the junction it sits on, or to the
+nearest polyline), so a tick of readings only updates the signals' densities
+and recomputes each segment's density, speed and congestion level with a
+few array operations.
+"""
+import asyncio
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.road_graph import RoadGraph, RoadGraphStore, road_graph
+from app.services.routing import (
+    CONGESTION_ALPHA, CONGESTION_BETA, METERS_PER_DEGREE, RECENT_READING_MINUTES, SIGNAL_SNAP_M, NodeIndex,
+)
+
+LEVELS = ["low", "medium", "high", "severe"]
+LEVEL_THRESHOLDS = np.array([0.4, 0.6, 0.8])  # Density at which medium, high and severe start
+ROAD_FREE_SPEED_KMH = 50.0  # MUMBAI_ROADS carry no speed limit
+CHUNK = 65536  # Rows per distance matrix in the spatial joins
+INACTIVE_RECHECK_SECONDS = 300.0  # Reload at most this often while signals out of service keep reporting
+
+def congestion_level(density: float) -> str:
+    return LEVELS[int(np.searchsorted(LEVEL_THRESHOLDS, density, side="right"))]
+
+def _ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + count) for every pair"""
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(int(counts.sum())) - offsets + np.repeat(starts, counts)
+
+def _nearest_centre(lats: np.ndarray, lons: np.ndarray, centre_lats: np.ndarray,
+                    centre_lons: np.ndarray) -> np.ndarray:
+    """Index of the nearest centre for every point (equirectangular, chunked)"""
+    kx = math.cos(math.radians(float(np.mean(centre_lats))))
+    nearest = np.empty(len(lats), dtype=np.int64)
+    for start in range(0, len(lats), CHUNK):
+        dy = lats[start:start + CHUNK, None] - centre_lats[None, :]
+        dx = (lons[start:start + CHUNK, None] - centre_lons[None, :]) * kx
+        nearest[start:start + CHUNK] = np.argmin(dx * dx + dy * dy, axis=1)
+    return nearest
+
+def _point_polyline_distances(lats: np.ndarray, lons: np.ndarray, pieces: np.ndarray) -> np.ndarray:
+    """Metres from every point to every polyline piece; pieces is (P, 4) of lat1, lon1, lat2, lon2"""
+    kx = METERS_PER_DEGREE * math.cos(math.radians(float(np.mean(pieces[:, 0]))))
+    ax, ay = pieces[:, 1] * kx, pieces[:, 0] * METERS_PER_DEGREE
+    bx, by = pieces[:, 3] * kx, pieces[:, 2] * METERS_PER_DEGREE
+    vx, vy = bx - ax, by - ay
+    squared = np.maximum(vx * vx + vy * vy, 1e-9)
+    px, py = lons[:, None] * kx, lats[:, None] * METERS_PER_DEGREE
+    t = np.clip(((px - ax) * vx + (py - ay) * vy) / squared, 0.0, 1.0)
+    return np.hypot(px - (ax + t * vx), py - (ay + t * vy))
+
+class RoadSegmentStore:
+    """Per-segment density, speed and congestion level, updated from every tick of readings"""
+
+    def __init__(self, store: RoadGraphStore):
+        self.store = store
+        self.loaded = False
+        self.stale = False  # Readings arrived for signals the join has not seen
+        self.source: Optional[str] = None
+        self.graph: Optional[RoadGraph] = None
+        self.updated_at: Optional[datetime] = None
+        self.load_ms = 0.0
+        self.loaded_at = 0.0  # time.monotonic() of the last load
+        self._lock = asyncio.Lock()
+        self._guard = threading.Lock()  # load() swaps arrays in from a worker thread
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.roads: List[Dict] = []  # MUMBAI_ROADS source; graph edges take id, name and geometry from the graph
+        self.zone_ids: List[Optional[str]] = []
+        self.segment_zone = np.empty(0, dtype=np.int32)  # Index into zone_ids
+        self.length = np.empty(0, dtype=np.float64)
+        self.free_speed = np.empty(0, dtype=np.float64)
+        self.join_segment = np.empty(0, dtype=np.int64)
+        self.join_signal = np.empty(0, dtype=np.int64)
+        self.joined = np.empty(0, dtype=np.int64)  # Signals per segment
+        self.active = np.empty(0, dtype=np.int64)  # Segments with signals
+        self.join_slot = np.empty(0, dtype=np.int64)  # Position of each join's segment in active
+        self.signal_keys = np.empty(0, dtype=np.int64)  # Sorted
+        self.inactive_keys = np.empty(0, dtype=np.int64)  # Signals not in service; their readings are ignored
+        self.signal_density = np.empty(0, dtype=np.float64)
+        self.signal_vehicles = np.empty(0, dtype=np.float64)
+        self.signal_reported = np.empty(0, dtype=bool)  # A recent log or a reading since the load
+        self.reporting = np.empty(0, dtype=np.int64)  # Reporting signals per segment
+        self.density = np.empty(0, dtype=np.float64)
+        self.vehicles = np.empty(0, dtype=np.float64)
+        self.speed = np.empty(0, dtype=np.float64)
+        self.level = np.empty(0, dtype=np.uint8)
+
+    def needs_load(self) -> bool:
+        if not self.loaded or self.stale:
+            return True
+        return self.source == "graph" and self.store.get() is not self.graph
+
+    def load(self, db: Session):
+        """Build the segments, join the active signals to them and seed densities from recent logs"""
+        started = time.perf_counter()
+        rows = db.query(
+            models.Signal.log_key, models.Signal.zone_id, models.Signal.latitude, models.Signal.longitude,
+            models.Signal.status,
+        ).order_by(models.Signal.log_key).all()
+        signals = [row for row in rows if row.status == models.SignalStatus.ACTIVE]
+        inactive = np.array([row.log_key for row in rows if row.status != models.SignalStatus.ACTIVE],
+                            dtype=np.int64)
+        zones = db.query(models.Zone.id, models.Zone.name, models.Zone.latitude, models.Zone.longitude).all()
+        keys = np.array([row.log_key for row in signals], dtype=np.int64)
+        lats = np.array([row.latitude for row in signals], dtype=np.float64)
+        lons = np.array([row.longitude for row in signals], dtype=np.float64)
+        signal_zones = [row.zone_id for row in signals]
+
+        source = settings.ROAD_SEGMENTS_SOURCE
+        graph = self.store.get() if source in ("auto", "graph") else None
+        if source == "graph" and graph is None:
+            print("[WARNING] ROAD_SEGMENTS_SOURCE=graph but no road graph is built; using MUMBAI_ROADS")
+        if graph is not None:
+            segments = self._graph_segments(graph, lats, lons, signal_zones, zones)
+        else:
+            segments = self._road_segments(lats, lons, signal_zones, zones)
+
+        since = datetime.utcnow() - timedelta(minutes=RECENT_READING_MINUTES)
+        latest = {key: (vehicles, density) for key, vehicles, density in db.query(
+            models.TrafficLog.signal_key, models.TrafficLog.vehicle_count, models.TrafficLog.density
+        ).filter(models.TrafficLog.timestamp >= since).order_by(models.TrafficLog.timestamp).all()}
+        seeded = [latest.get(key, (None, None)) for key in keys.tolist()]
+
+        with self._guard:
+            self._reset()
+            (self.count, self.roads, self.zone_ids, self.segment_zone, self.length, self.free_speed,
+             self.join_segment, self.join_signal) = segments
+            self.graph = graph
+            self.source = "graph" if graph is not None else "mumbai_roads"
+            self.signal_keys = keys
+            self.inactive_keys = inactive
+            self.signal_vehicles = np.array([row[0] or 0 for row in seeded], dtype=np.float64)
+            self.signal_density = np.array([row[1] or 0.0 for row in seeded], dtype=np.float64)
+            self.signal_reported = np.array([row[1] is not None for row in seeded], dtype=bool)
+            self.joined = np.bincount(self.join_segment, minlength=self.count)
+            self.active, self.join_slot = np.unique(self.join_segment, return_inverse=True)
+            self.density, self.vehicles = np.zeros(self.count), np.zeros(self.count)
+            self.speed, self.level = self.free_speed.copy(), np.zeros(self.count, dtype=np.uint8)
+            self.reporting = np.zeros(self.count, dtype=np.int64)
+            self._recompute()
+            self.loaded, self.stale = True, False
+            self.loaded_at = time.monotonic()
+        self.load_ms = (time.perf_counter() - started) * 1000
+        print(f"[OK] Road segments loaded from {self.source}: {self.count} segments, "
+              f"{int((self.joined > 0).sum())} with signals, {len(self.join_signal)} signal joins "
+              f"in {self.load_ms:.0f} ms")
+
+    async def ensure_loaded(self):
+        """load() in a worker thread when the store is empty, stale or its graph was rebuilt"""
+        if not self.needs_load():
+            return
+        async with self._lock:
+            if not self.needs_load():
+                return
+
+            def load():
+                db = SessionLocal()
+                try:
+                    self.load(db)
+                finally:
+                    db.close()
+
+            await asyncio.to_thread(load)
+
+    def _graph_segments(self, graph: RoadGraph, lats, lons, signal_zones: List[str], zones) -> tuple:
+        """One segment per directed edge; a signal joins the edges into and out of its junction"""
+        edges = graph.edge_count
+        index = NodeIndex(graph)
+        nodes = index.nearest_many(lats, lons, SIGNAL_SNAP_M)
+        mapped = np.flatnonzero(nodes >= 0)
+        node = nodes[mapped]
+        out_starts, out_counts = graph.indptr[node], graph.indptr[node + 1] - graph.indptr[node]
+        in_starts, in_counts = graph.rev_indptr[node], graph.rev_indptr[node + 1] - graph.rev_indptr[node]
+        join_segment = np.concatenate([_ranges(out_starts, out_counts),
+                                       graph.rev_edges[_ranges(in_starts, in_counts)]]).astype(np.int64)
+        join_signal = np.concatenate([np.repeat(mapped, out_counts), np.repeat(mapped, in_counts)])
+
+        # Zone of a segment: its first joined signal's, else the nearest zone centre to its midpoint
+        zone_ids = sorted({zone_id for zone_id in signal_zones} | {zone.id for zone in zones})
+        zone_row = {zone_id: row for row, zone_id in enumerate(zone_ids)}
+        signal_zone = np.array([zone_row[zone_id] for zone_id in signal_zones], dtype=np.int32)
+        segment_zone = np.full(edges, -1, dtype=np.int32)
+        order = np.argsort(join_segment, kind="stable")[::-1]  # Last write wins: the first join
+        segment_zone[join_segment[order]] = signal_zone[join_signal[order]]
+        if zones:
+            missing = np.flatnonzero(segment_zone < 0)
+            source, target = graph.edge_source[missing], graph.edge_target[missing]
+            mid_lat = (graph.node_lat[source] + graph.node_lat[target]) / 2.0
+            mid_lon = (graph.node_lon[source] + graph.node_lon[target]) / 2.0
+            centres = _nearest_centre(mid_lat, mid_lon, np.array([zone.latitude for zone in zones]),
+                                      np.array([zone.longitude for zone in zones]))
+            segment_zone[missing] = np.array([zone_row[zone.id] for zone in zones], dtype=np.int32)[centres]
+
+        return (edges, [], zone_ids, segment_zone, graph.edge_length.astype(np.float64),
+                graph.edge_speed.astype(np.float64), join_segment, join_signal)
+
+    def _road_segments(self, lats, lons, signal_zones: List[str], zones) -> tuple:
+        """One segment per MUMBAI_ROADS polyline; a signal joins the nearest road within the snap radius"""
+        from app.data.mumbai_roads import MUMBAI_ROADS
+
+        pieces, piece_road = [], []
+        for row, road in enumerate(MUMBAI_ROADS):
+            points = np.array(road["coordinates"], dtype=np.float64)  # [lon, lat]
+            pieces.append(np.column_stack([points[:-1, 1], points[:-1, 0], points[1:, 1], points[1:, 0]]))
+            piece_road.extend([row] * (len(points) - 1))
+        pieces = np.concatenate(pieces)
+        piece_road = np.array(piece_road, dtype=np.int64)
+        kx = METERS_PER_DEGREE * math.cos(math.radians(float(np.mean(pieces[:, 0]))))
+        piece_length = np.hypot((pieces[:, 3] - pieces[:, 1]) * kx, (pieces[:, 2] - pieces[:, 0]) * METERS_PER_DEGREE)
+        length = np.bincount(piece_road, weights=piece_length, minlength=len(MUMBAI_ROADS))
+
+        join_signal = np.empty(0, dtype=np.int64)
+        join_segment = np.empty(0, dtype=np.int64)
+        if len(lats):
+            nearest = np.empty(len(lats), dtype=np.int64)
+            distance = np.empty(len(lats), dtype=np.float64)
+            for start in range(0, len(lats), CHUNK):
+                matrix = _point_polyline_distances(lats[start:start + CHUNK], lons[start:start + CHUNK], pieces)
+                best = np.argmin(matrix, axis=1)
+                nearest[start:start + CHUNK] = piece_road[best]
+                distance[start:start + CHUNK] = matrix[np.arange(len(best)), best]
+            join_signal = np.flatnonzero(distance <= settings.ROAD_SEGMENT_SNAP_M)
+            join_segment = nearest[join_signal]
+
+        by_name = {zone.name: zone.id for zone in zones}
+        zone_ids = sorted({zone_id for zone_id in signal_zones} | {zone.id for zone in zones})
+        zone_row = {zone_id: row for row, zone_id in enumerate(zone_ids)}
+        segment_zone = np.array([zone_row.get(by_name.get(road["zone"]), -1) for road in MUMBAI_ROADS],
+                                dtype=np.int32)
+        return (len(MUMBAI_ROADS), MUMBAI_ROADS, zone_ids, segment_zone, length,
+                np.full(len(MUMBAI_ROADS), ROAD_FREE_SPEED_KMH), join_segment, join_signal)
+
+    def _recompute(self):
+        """Density and vehicles (means over joined signals), speed and level of the segments with signals"""
+        active, slots, divisor = self.active, self.join_slot, self.joined[self.active]
+        density = np.bincount(slots, weights=self.signal_density[self.join_signal], minlength=len(active)) / divisor
+        self.density[active] = density
+        self.vehicles[active] = np.bincount(slots, weights=self.signal_vehicles[self.join_signal],
+                                            minlength=len(active)) / divisor
+        self.speed[active] = self.free_speed[active] / (1 + CONGESTION_ALPHA * np.clip(density, 0, 1) ** CONGESTION_BETA)
+        self.level[active] = np.searchsorted(LEVEL_THRESHOLDS, density, side="right")
+        self.reporting[active] = np.bincount(slots, weights=self.signal_reported[self.join_signal],
+                                             minlength=len(active))
+
+    def observe_many(self, timestamp: datetime, readings: Iterable[Tuple[int, str, float, float]]):
+        """Fold a tick's (signal_key, zone_id, vehicles, density) readings into the segments"""
+        readings = list(readings)
+        if not self.loaded or not readings:
+            return
+        keys = np.fromiter((reading[0] for reading in readings), dtype=np.int64, count=len(readings))
+        vehicles = np.fromiter((reading[2] for reading in readings), dtype=np.float64, count=len(readings))
+        densities = np.fromiter((reading[3] for reading in readings), dtype=np.float64, count=len(readings))
+        with self._guard:
+            if not len(self.signal_keys):
+                known = np.zeros(len(keys), dtype=bool)
+                rows = np.zeros(len(keys), dtype=np.int64)
+            else:
+                rows = np.minimum(np.searchsorted(self.signal_keys, keys), len(self.signal_keys) - 1)
+                known = self.signal_keys[rows] == keys
+            if not known.all():
+                # Readings of signals that are not in service are ignored (one of them may have
+                # been switched back on, so those are rechecked now and then); any other unknown
+                # key is a new signal, joined on the next ensure_loaded()
+                if not np.isin(keys[~known], self.inactive_keys).all() \
+                        or time.monotonic() - self.loaded_at > INACTIVE_RECHECK_SECONDS:
+                    self.stale = True
+                if not known.any():
+                    return
+            self.signal_vehicles[rows[known]] = vehicles[known]
+            self.signal_density[rows[known]] = densities[known]
+            self.signal_reported[rows[known]] = True
+            self._recompute()
+            self.updated_at = timestamp
+
+    def _describe(self, row: int) -> Tuple[str, Optional[str], list]:
+        """(id, name, [lon, lat] coordinates) of a segment"""
+        if self.source == "graph":
+            return f"osm-{int(self.graph.edge_way[row])}-{row}", self.graph.name(row), self.graph.edge_geometry(row)
+        road = self.roads[row]
+        return road["id"], road["name"], road["coordinates"]
+
+    def _rows(self, zone_id: Optional[str]) -> np.ndarray:
+        if zone_id is None:
+            return np.arange(self.count)
+        if zone_id not in self.zone_ids:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.segment_zone == self.zone_ids.index(zone_id))
+
+    def mean_density(self, zone_id: Optional[str] = None) -> Optional[float]:
+        """Length-weighted density over segments with reporting signals; None if none have any"""
+        with self._guard:
+            return self._mean_density(zone_id)
+
+    def _mean_density(self, zone_id: Optional[str]) -> Optional[float]:
+        rows = self._rows(zone_id)
+        rows = rows[self.reporting[rows] > 0]
+        if not len(rows):
+            return None
+        weights = np.maximum(self.length[rows], 1.0)
+        return float(np.dot(self.density[rows], weights) / weights.sum())
+
+    def summary(self, zone_id: Optional[str] = None) -> Dict:
+        with self._guard:
+            rows = self._rows(zone_id)
+            levels = np.bincount(self.level[rows[self.reporting[rows] > 0]], minlength=len(LEVELS))
+            mean = self._mean_density(zone_id)
+            with_signals = int((self.joined[rows] > 0).sum())
+            reporting = int((self.reporting[rows] > 0).sum())
+        return {
+            "source": self.source,
+            "segments": len(rows),
+            "with_signals": with_signals,
+            "reporting": reporting,
+            "by_congestion": dict(zip(LEVELS, levels.tolist())),
+            "mean_density": None if mean is None else round(mean, 3),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def segments(self, zone_id: Optional[str] = None, limit: int = 1000, geometry: bool = True,
+                 with_signals_only: bool = False) -> List[Dict]:
+        """Segments of a zone (or the city), most congested first"""
+        with self._guard:
+            rows = self._rows(zone_id)
+            if with_signals_only:
+                rows = rows[self.joined[rows] > 0]
+            rows = rows[np.argsort(-self.density[rows], kind="stable")][:limit]
+            items = []
+            for row in rows.tolist():
+                segment_id, name, coordinates = self._describe(row)
+                zone = int(self.segment_zone[row])
+                item = {
+                    "id": segment_id,
+                    "name": name,
+                    "zone_id": self.zone_ids[zone] if zone >= 0 else None,
+                    "congestion": LEVELS[int(self.level[row])],
+                    "density": round(float(self.density[row]), 3),
+                    "speed_kmh": round(float(self.speed[row]), 1),
+                    "free_speed_kmh": round(float(self.free_speed[row]), 1),
+                    "vehicle_count": int(round(float(self.vehicles[row]))),
+                    "signals": int(self.joined[row]),
+                    "length_m": round(float(self.length[row]), 1),
+                }
+                if geometry:
+                    item["coordinates"] = coordinates
+                items.append(item)
+        return items
+
+# Global instance
+road_segments = RoadSegmentStore(road_graph)
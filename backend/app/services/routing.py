@@ -0,0 +1,318 @@
+"""
+Shortest-path routing over the road graph for emergency vehicles
+Bidirectional A* with ALT potentials: lower bounds on travel time come
+from the landmark distance tables stored with the graph (triangle
+inequality), averaged between the two searches so both stay consistent.
+Edge weights are free-flow travel times scaled by the live congestion at
+the signal each edge leads into. Congestion only slows edges down, so the
+free-flow landmark bounds stay admissible. Route ends and database signals
+are snapped to graph nodes through a grid index.
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.road_graph import NODE_ROUTABLE, RoadGraph, RoadGraphStore, road_graph
+from app.services.signal_state import signal_state
+
+# Edges into a signal with density d take (1 + ALPHA * d^BETA) times their free-flow time (BPR-style)
+CONGESTION_ALPHA = 2.0
+CONGESTION_BETA = 2.0
+CONGESTION_TTL_SECONDS = 5.0  # How long one set of live edge weights is reused
+RECENT_READING_MINUTES = 10  # Older readings count as free flow
+ACTIVE_LANDMARKS = 4  # Landmarks used per query (the best bounds for its endpoints)
+SIGNAL_SNAP_M = 100.0  # A signal belongs to the nearest junction within this distance
+ACCESS_SPEED_KMH = 30.0  # From the requested coordinate to the nearest routable node
+CELL_M = 250.0  # Grid index cell size
+METERS_PER_DEGREE = 111320.0
+
+class NodeIndex:
+    """Nearest routable node lookup over a uniform grid of cells (equirectangular metres)"""
+
+    def __init__(self, graph: RoadGraph):
+        if graph.landmarks is not None:
+            nodes = np.flatnonzero(graph.node_flags & NODE_ROUTABLE)
+        else:
+            nodes = np.flatnonzero((np.diff(graph.indptr) > 0) & (np.diff(graph.rev_indptr) > 0))
+        self.nodes = nodes
+        self.lat0 = float(np.mean(graph.node_lat[nodes])) if len(nodes) else 0.0
+        self.kx = METERS_PER_DEGREE * math.cos(math.radians(self.lat0))
+        x = graph.node_lon[nodes] * self.kx
+        y = graph.node_lat[nodes] * METERS_PER_DEGREE
+        keys = self._keys(x, y)
+        order = np.argsort(keys, kind="stable")
+        self.keys, self.nodes, self.x, self.y = keys[order], nodes[order], x[order], y[order]
+
+    @staticmethod
+    def _keys(x, y):
+        return (np.floor(x / CELL_M).astype(np.int64) << 32) + np.floor(y / CELL_M).astype(np.int64)
+
+    def nearest(self, lat: float, lon: float, max_m: float) -> Tuple[int, float]:
+        """(node, distance in metres), or (-1, inf) if none within max_m"""
+        x, y = lon * self.kx, lat * METERS_PER_DEGREE
+        reach = int(math.ceil(max_m / CELL_M))
+        cx, cy = math.floor(x / CELL_M), math.floor(y / CELL_M)
+        columns = np.arange(cx - reach, cx + reach + 1, dtype=np.int64)
+        rows = np.arange(cy - reach, cy + reach + 1, dtype=np.int64)
+        cells = ((columns[:, None] << 32) + rows[None, :]).ravel()
+        starts = np.searchsorted(self.keys, cells, "left")
+        ends = np.searchsorted(self.keys, cells, "right")
+        candidates = np.concatenate([np.arange(a, b) for a, b in zip(starts, ends) if b > a] or [np.empty(0, int)])
+        if not len(candidates):
+            return -1, math.inf
+        distances = np.hypot(self.x[candidates] - x, self.y[candidates] - y)
+        best = int(np.argmin(distances))
+        if distances[best] > max_m:
+            return -1, math.inf
+        return int(self.nodes[candidates[best]]), float(distances[best])
+
+    def nearest_many(self, lats: np.ndarray, lons: np.ndarray, max_m: float) -> np.ndarray:
+        """Nearest node for each point (-1 where none within max_m), one distance matrix per occupied cell"""
+        result = np.full(len(lats), -1, dtype=np.int64)
+        if not len(lats) or not len(self.nodes):
+            return result
+        x = np.asarray(lons, dtype=np.float64) * self.kx
+        y = np.asarray(lats, dtype=np.float64) * METERS_PER_DEGREE
+        keys = self._keys(x, y)
+        reach = int(math.ceil(max_m / CELL_M))
+        offsets = np.array([(dx << 32) + dy for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)],
+                           dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        cells, starts = np.unique(keys[order], return_index=True)
+        for cell, points in zip(cells.tolist(), np.split(order, starts[1:])):
+            near = cell + offsets
+            lo = np.searchsorted(self.keys, near, "left")
+            hi = np.searchsorted(self.keys, near, "right")
+            candidates = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi) if b > a] or [np.empty(0, int)])
+            if not len(candidates):
+                continue
+            distances = np.hypot(self.x[candidates][None, :] - x[points][:, None],
+                                 self.y[candidates][None, :] - y[points][:, None])
+            best = np.argmin(distances, axis=1)
+            within = distances[np.arange(len(points)), best] <= max_m
+            result[points[within]] = self.nodes[candidates[best[within]]]
+        return result
+
+def signal_snapshot(db: Session) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """(ids, latitudes, longitudes, densities) of active signals, from shared state or the database"""
+    records = signal_state.active_signals()
+    if records is not None:
+        fresh = records["reading_at"] >= time.time() - RECENT_READING_MINUTES * 60
+        return ([value.decode() for value in records["id"].tolist()], records["latitude"], records["longitude"],
+                np.where(fresh, records["density"], 0.0))
+    rows = db.query(
+        models.Signal.id, models.Signal.log_key, models.Signal.latitude, models.Signal.longitude
+    ).filter(models.Signal.status == models.SignalStatus.ACTIVE).all()
+    since = datetime.utcnow() - timedelta(minutes=RECENT_READING_MINUTES)
+    latest = dict(db.query(models.TrafficLog.signal_key, models.TrafficLog.density).filter(
+        models.TrafficLog.timestamp >= since
+    ).order_by(models.TrafficLog.timestamp).all())
+    return ([row.id for row in rows], np.array([row.latitude for row in rows], dtype=np.float64),
+            np.array([row.longitude for row in rows], dtype=np.float64),
+            np.array([latest.get(row.log_key) or 0.0 for row in rows], dtype=np.float64))
+
+class RoutingEngine:
+    def __init__(self, store: RoadGraphStore):
+        self.store = store
+        self.graph: Optional[RoadGraph] = None  # Graph the caches below were built for
+        self.index: Optional[NodeIndex] = None
+        self.free_flow: Optional[np.ndarray] = None
+        self._signal_key = None
+        self._signal_ids: List[str] = []
+        self._signal_nodes = np.empty(0, dtype=np.int64)
+        self._weights = None
+        self._weights_expire = 0.0
+        self.queries = 0
+        self.last_query_ms = 0.0
+        # Queries run in worker threads; the caches above are rebuilt and read under this lock.
+        # The search is pure Python, so holding it for a whole query costs no parallelism.
+        self._lock = threading.Lock()
+
+    def _prepare(self) -> Optional[RoadGraph]:
+        graph = self.store.get()
+        if graph is not None and graph is not self.graph:
+            started = time.perf_counter()
+            self.graph = graph
+            self.index = NodeIndex(graph)
+            self.free_flow = graph.travel_times()
+            self._views = (memoryview(graph.indptr), memoryview(graph.edge_target), memoryview(graph.rev_indptr),
+                           memoryview(graph.rev_edges), memoryview(graph.edge_source))
+            self._signal_key = None
+            self._weights_expire = 0.0
+            print(f"[OK] Routing prepared: {len(self.index.nodes)} routable nodes, "
+                  f"{0 if graph.landmarks is None else len(graph.landmarks)} landmarks "
+                  f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return graph
+
+    def _map_signals(self, ids: List[str], lats: np.ndarray, lons: np.ndarray):
+        """Snap signals to junctions, only when the set of signals or their positions change"""
+        key = (len(ids), hash(tuple(ids)), lats.tobytes(), lons.tobytes())
+        if key == self._signal_key:
+            return
+        nodes = self.index.nearest_many(lats, lons, SIGNAL_SNAP_M)
+        self._signal_key, self._signal_ids, self._signal_nodes = key, ids, nodes
+
+    def _live_weights(self, db: Session) -> memoryview:
+        """Edge travel times under current congestion, refreshed every CONGESTION_TTL_SECONDS"""
+        now = time.monotonic()
+        if self._weights is not None and now < self._weights_expire:
+            return self._weights
+        ids, lats, lons, densities = signal_snapshot(db)
+        self._map_signals(ids, lats, lons)
+        mapped = self._signal_nodes >= 0
+        node_factor = np.ones(self.graph.node_count, dtype=np.float32)
+        factors = 1 + CONGESTION_ALPHA * np.clip(densities[mapped], 0, 1) ** CONGESTION_BETA
+        np.maximum.at(node_factor, self._signal_nodes[mapped], factors.astype(np.float32))
+        self._weights = memoryview(self.free_flow * node_factor[self.graph.edge_target])
+        self._weights_expire = now + CONGESTION_TTL_SECONDS
+        return self._weights
+
+    def _potential(self, source: int, target: int):
+        """Forward potential p(v) = (lower bound to target - lower bound from source) / 2"""
+        graph = self.graph
+        if graph.landmarks is not None and len(graph.landmarks):
+            lm_from, lm_to = graph.lm_from, graph.lm_to
+            # The landmarks that give the best bound on the source-target distance
+            bounds = np.maximum(lm_to[:, source] - lm_to[:, target], lm_from[:, target] - lm_from[:, source])
+            chosen = np.argsort(-bounds)[:ACTIVE_LANDMARKS]
+            tables = [(memoryview(lm_from[k]), memoryview(lm_to[k]), float(lm_from[k, source]),
+                       float(lm_to[k, source]), float(lm_from[k, target]), float(lm_to[k, target]))
+                      for k in chosen.tolist()]
+
+            def bound(v: int) -> float:
+                to_target = from_source = 0.0
+                for frm, to, from_s, to_s, from_t, to_t in tables:
+                    f, t = frm[v], to[v]
+                    # Comparisons rather than max(): this runs for every node the search reaches
+                    if t - to_t > to_target:
+                        to_target = t - to_t
+                    if from_t - f > to_target:
+                        to_target = from_t - f
+                    if f - from_s > from_source:
+                        from_source = f - from_s
+                    if to_s - t > from_source:
+                        from_source = to_s - t
+                return (to_target - from_source) / 2
+            return bound
+
+        # No landmarks: straight-line distance at the top speed in the graph
+        top_speed = float(graph.edge_speed.max()) / 3.6 if graph.edge_count else 1.0
+        lat, lon = memoryview(graph.node_lat), memoryview(graph.node_lon)
+        kx = METERS_PER_DEGREE * math.cos(math.radians(lat[source]))
+
+        def straight(a: int, b: int) -> float:
+            return math.hypot((lon[a] - lon[b]) * kx, (lat[a] - lat[b]) * METERS_PER_DEGREE) / top_speed
+
+        return lambda v: (straight(v, target) - straight(v, source)) / 2
+
+    def shortest_path(self, source: int, target: int, weights) -> Optional[Tuple[float, List[int], int]]:
+        """(seconds, edge ids, nodes settled) of the fastest path, None if unreachable"""
+        indptr, edge_target, rev_indptr, rev_edges, edge_source = self._views
+        potential = self._potential(source, target)
+        cache: Dict[int, float] = {}
+
+        def p(v: int) -> float:
+            value = cache.get(v)
+            if value is None:
+                value = cache[v] = potential(v)
+            return value
+
+        # Forward keys g + p, reverse keys g - p; stop once the two tops reach the best meeting cost
+        dist = ({source: 0.0}, {target: 0.0})
+        parent = ({source: -1}, {target: -1})
+        heaps = ([(p(source), source)], [(-p(target), target)])
+        settled = (set(), set())
+        best, meet = math.inf, -1
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            _, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+            g = dist[side][u]
+            mine, other = dist[side], dist[1 - side]
+            if side == 0:
+                edges = range(indptr[u], indptr[u + 1])
+            else:
+                edges = (rev_edges[i] for i in range(rev_indptr[u], rev_indptr[u + 1]))
+            for e in edges:
+                v = edge_target[e] if side == 0 else edge_source[e]
+                candidate = g + weights[e]
+                if candidate < mine.get(v, math.inf):
+                    mine[v] = candidate
+                    parent[side][v] = e
+                    key = candidate + p(v) if side == 0 else candidate - p(v)
+                    if key != math.inf:
+                        heapq.heappush(heaps[side], (key, v))
+                    if v in other and candidate + other[v] < best:
+                        best, meet = candidate + other[v], v
+        if meet < 0:
+            return None
+        edges = []
+        node = meet
+        while parent[0][node] >= 0:
+            edges.append(parent[0][node])
+            node = edge_source[parent[0][node]]
+        edges.reverse()
+        node = meet
+        while parent[1][node] >= 0:
+            edges.append(parent[1][node])
+            node = edge_target[parent[1][node]]
+        return best, edges, len(settled[0]) + len(settled[1])
+
+    def route(self, start_lat: float, start_lon: float, end_lat: float, end_lon: float,
+              db: Session) -> Optional[dict]:
+        """Fastest road route with its geometry, the signals on it and a congestion-aware ETA;
+        None when there is no graph or either end is off the mapped network. Blocking: call it
+        from a worker thread"""
+        with self._lock:
+            return self._route(start_lat, start_lon, end_lat, end_lon, db)
+
+    def _route(self, start_lat: float, start_lon: float, end_lat: float, end_lon: float,
+               db: Session) -> Optional[dict]:
+        graph = self._prepare()
+        if graph is None:
+            return None
+        started = time.perf_counter()
+        source, start_gap = self.index.nearest(start_lat, start_lon, settings.ROUTING_SNAP_RADIUS_M)
+        target, end_gap = self.index.nearest(end_lat, end_lon, settings.ROUTING_SNAP_RADIUS_M)
+        if source < 0 or target < 0:
+            return None
+        weights = self._live_weights(db)
+        found = self.shortest_path(source, target, weights) if source != target else (0.0, [], 0)
+        if found is None:
+            return None
+        seconds, edges, settled = found
+
+        path = [[start_lon, start_lat], [float(graph.node_lon[source]), float(graph.node_lat[source])]]
+        for e in edges:
+            path.extend(graph.edge_geometry(e)[1:])
+        path.append([end_lon, end_lat])
+        nodes = {source} | {int(graph.edge_target[e]) for e in edges}
+        on_route = np.isin(self._signal_nodes, np.fromiter(nodes, dtype=np.int64, count=len(nodes)))
+        access_seconds = (start_gap + end_gap) / (ACCESS_SPEED_KMH / 3.6)
+
+        self.queries += 1
+        self.last_query_ms = (time.perf_counter() - started) * 1000
+        return {
+            "path": path,
+            "distance_m": sum(graph.edge_length[edges].tolist()) + start_gap + end_gap,
+            "duration_s": seconds + access_seconds,
+            "free_flow_s": sum(self.free_flow[edges].tolist()) + access_seconds,
+            "signal_ids": [self._signal_ids[i] for i in np.flatnonzero(on_route).tolist()],
+            "settled_nodes": settled,
+            "query_ms": self.last_query_ms,
+        }
+
+# Global instance
+emergency_router = RoutingEngine(road_graph)
@@ -0,0 +1,672 @@
+"""
+Live signal state shared between worker processes
+A shared-memory segment holds a fixed-layout snapshot of every signal
+(phase, timings, mode, latest reading) plus per-zone, per-minute reading
+totals for the last hour. The elected leader creates and loads it; any
+worker can update it, with writers serializing on a file lock. Readers
+never lock: a seqlock counter (odd while a write is in progress) tells them
+to retry a read that overlapped a write. /signals and /traffic/stats are
+served from it, falling back to the database when it is unavailable.
+The segment also holds the data version counters behind ETags, so every
+worker reports the same version; its id tells ETags of one leader's
+counters apart from the next.
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db import models
+from app.services.forecasting import epoch_seconds
+from app.services.metrics import signal_state_reads
+from app.services.worker_bus import deployment_id, runtime_path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+HEADER_DTYPE = np.dtype([
+    ("seq", "<u8"),  # Seqlock counter: odd while a writer is active
+    ("layout", "<u8"),  # Bumped on every full reload (row order may change)
+    ("ready", "<u4"),  # 0 until loaded, or after a change that needs a reload
+    ("count", "<u4"),
+    ("capacity", "<u4"),
+    ("zone_count", "<u4"),
+    ("zone_capacity", "<u4"),
+    ("updated_at", "<f8"),
+    ("total", "<u8"),  # Data version of the all-zones scope
+    ("city_wide", "<u8"),  # Data changes that touched every zone
+    ("version_count", "<u4"),  # Zones in the version table
+])
+HEADER_SIZE = 64
+
+SIGNAL_DTYPE = np.dtype([
+    ("id", "S36"),
+    ("signal_id", "S40"),
+    ("zone", "<i4"),  # Row in the zone table
+    ("log_key", "<i8"),
+    ("latitude", "<f8"),
+    ("longitude", "<f8"),
+    ("status", "u1"),  # Enum member index
+    ("current_phase", "u1"),
+    ("mode", "u1"),
+    ("green_time", "<i4"),
+    ("yellow_time", "<i4"),
+    ("red_time", "<i4"),
+    ("vehicle_count", "<f4"),
+    ("queue_length", "<f4"),
+    ("density", "<f4"),
+    ("reading_at", "<f8"),  # Epoch seconds of the latest reading, 0 if none
+])
+ZONE_DTYPE = np.dtype("S36")
+# Per-zone data versions; rows are appended and never move within a segment
+VERSION_DTYPE = np.dtype([("zone", "S36"), ("version", "<u8")], align=True)
+BUCKET_DTYPE = np.dtype([
+    ("minute", "<i8"),  # Epoch minute the bucket currently holds
+    ("vehicles", "<f8"),
+    ("density", "<f8"),
+    ("logs", "<u4"),
+])
+MINUTES = 60  # Buckets per zone (one hour)
+RECENT_MINUTES = 10
+
+ENUMS = {
+    "status": list(models.SignalStatus),
+    "current_phase": list(models.SignalPhase),
+    "mode": list(models.ControlMode),
+}
+ENUM_VALUES = {name: [member.value for member in members] for name, members in ENUMS.items()}
+ACTIVE = ENUMS["status"].index(models.SignalStatus.ACTIVE)
+CONFIG_FIELDS = ("status", "current_phase", "mode", "green_time", "yellow_time", "red_time")
+
+READ_RETRIES = 100
+
+def segment_size(capacity: int, zone_capacity: int) -> int:
+    return (HEADER_SIZE + zone_capacity * VERSION_DTYPE.itemsize + capacity * SIGNAL_DTYPE.itemsize
+            + zone_capacity * ZONE_DTYPE.itemsize + zone_capacity * MINUTES * BUCKET_DTYPE.itemsize)
+
+def _untrack(shm: shared_memory.SharedMemory):
+    """Stop this process's resource tracker from unlinking the leader's segment when this worker exits"""
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+class SharedSignalState:
+    def __init__(self, prefix: str, pointer_path: str, lock_path: str, capacity: int, zone_capacity: int,
+                 resync_seconds: float = 5.0, enabled: bool = True):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.pointer_path = pointer_path  # Holds the name of the current leader's segment
+        self.lock_path = lock_path
+        self.capacity = capacity
+        self.zone_capacity = zone_capacity
+        self.resync_seconds = resync_seconds
+        self.owner = False
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._header = None
+        self._signals = None
+        self._zones = None
+        self._buckets = None
+        self._versions = None
+        self._version_rows: Dict[str, int] = {}  # zone_id -> row in the version table
+        self._lock_file = None
+        self._check_after = 0.0
+        self._layout = -1
+        self._rows: Dict[int, int] = {}  # log_key -> row
+        self._ids: Dict[str, int] = {}  # signal UUID -> row
+        self._task: Optional[asyncio.Task] = None
+        self.overflowed = False
+        self.loads = 0
+        self.last_load_ms = 0.0
+
+    # Segment lifecycle
+
+    def _map(self, shm: shared_memory.SharedMemory):
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf, offset=0)
+        capacity, zone_capacity = int(header["capacity"][0]), int(header["zone_capacity"][0])
+        offset = HEADER_SIZE
+        self._versions = np.ndarray((zone_capacity,), dtype=VERSION_DTYPE, buffer=shm.buf, offset=offset)
+        offset += zone_capacity * VERSION_DTYPE.itemsize
+        self._signals = np.ndarray((capacity,), dtype=SIGNAL_DTYPE, buffer=shm.buf, offset=offset)
+        offset += capacity * SIGNAL_DTYPE.itemsize
+        self._zones = np.ndarray((zone_capacity,), dtype=ZONE_DTYPE, buffer=shm.buf, offset=offset)
+        offset += zone_capacity * ZONE_DTYPE.itemsize
+        self._buckets = np.ndarray((zone_capacity, MINUTES), dtype=BUCKET_DTYPE, buffer=shm.buf, offset=offset)
+        self._header = header
+        self._shm = shm
+        self._layout = -1
+        self._version_rows = {}
+
+    def _publish_name(self, name: str):
+        temp = f"{self.pointer_path}.{os.getpid()}"
+        with open(temp, "w") as handle:
+            handle.write(name)
+        os.replace(temp, self.pointer_path)
+
+    def _current_name(self) -> str:
+        try:
+            with open(self.pointer_path) as handle:
+                return handle.read().strip()
+        except OSError:
+            return ""
+
+    def create(self):
+        """Create a fresh segment and point the other workers at it; called by the elected leader"""
+        self.detach()
+        previous = self._current_name()
+        # A new name per leader: workers still mapping a dead leader's segment notice the switch.
+        # The leader's resource tracker unlinks the segment if the leader dies without cleaning up.
+        name = f"{self.prefix}-{os.urandom(4).hex()}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(self.capacity, self.zone_capacity))
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf, offset=0)
+        header["capacity"] = self.capacity
+        header["zone_capacity"] = self.zone_capacity
+        del header
+        self._map(shm)
+        self.owner = True
+        self._publish_name(name)
+        if previous:
+            # Left by a leader that died; workers still mapping it keep their view until they switch
+            try:
+                stale = shared_memory.SharedMemory(name=previous)
+                stale.close()
+                stale.unlink()
+            except (FileNotFoundError, OSError):
+                pass
+
+    def attach(self) -> bool:
+        """Map the leader's current segment; the pointer file is checked at most once a second"""
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        if self.owner or now < self._check_after:
+            return self._shm is not None
+        self._check_after = now + 1.0
+        name = self._current_name()
+        if self._shm is not None and self._shm.name.lstrip("/") == name:
+            return True
+        self.detach()
+        if not name:
+            return False
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except (FileNotFoundError, OSError):
+            return False
+        _untrack(shm)
+        self._map(shm)
+        return True
+
+    def detach(self):
+        self._header = self._signals = self._zones = self._buckets = self._versions = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # A snapshot view is still referenced; the mapping goes away with it
+            self._shm = None
+
+    def close(self):
+        """Leader shutdown: withdraw and unlink the segment"""
+        if not self.owner:
+            self.detach()
+            return
+        self._publish_name("")
+        shm = self._shm
+        self.detach()
+        shm.unlink()
+        self.owner = False
+
+    # Writers
+
+    def _write_lock(self):
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, "a+")
+        return _FileLockContext(self._lock_file)
+
+    def _writing(self):
+        return _SeqlockWrite(self)
+
+    def _sync_index(self):
+        """Rebuild this process's row lookups after the leader reloaded the layout (call while writing)"""
+        layout = int(self._header["layout"][0])
+        if layout == self._layout:
+            return
+        count = int(self._header["count"][0])
+        keys = self._signals["log_key"][:count].tolist()
+        ids = self._signals["id"][:count].tolist()
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._ids = {signal_id.decode(): row for row, signal_id in enumerate(ids)}
+        self._layout = layout
+
+    def load(self, db):
+        """Full reload from the database: signal rows and the last hour of readings per zone"""
+        started = time.perf_counter()
+        self._apply(self._query(db), started)
+
+    async def load_async(self):
+        """load() with the database reads in a worker thread; only the copy-in runs on the loop"""
+        started = time.perf_counter()
+
+        def query():
+            db = SessionLocal()
+            try:
+                return self._query(db)
+            finally:
+                db.close()
+
+        self._apply(await asyncio.to_thread(query), started)
+
+    def _query(self, db) -> Optional[Tuple[np.ndarray, List[str], np.ndarray]]:
+        """(signal records, zone ids, minute buckets) from the database; None if over capacity"""
+        signals = db.query(
+            models.Signal.id, models.Signal.signal_id, models.Signal.zone_id, models.Signal.log_key,
+            models.Signal.latitude, models.Signal.longitude, models.Signal.status, models.Signal.current_phase,
+            models.Signal.mode, models.Signal.green_time, models.Signal.yellow_time, models.Signal.red_time,
+        ).order_by(models.Signal.signal_id).all()
+        zone_ids = sorted({row.zone_id for row in signals})
+        if len(signals) > self.capacity or len(zone_ids) > self.zone_capacity:
+            print(f"[WARNING] Shared signal state holds {self.capacity} signals / {self.zone_capacity} zones; "
+                  f"found {len(signals)} / {len(zone_ids)}. Serving from the database instead "
+                  f"(raise SIGNAL_STATE_CAPACITY / SIGNAL_STATE_ZONE_CAPACITY)")
+            return None
+        zone_rows = {zone_id: row for row, zone_id in enumerate(zone_ids)}
+
+        records = np.zeros(len(signals), dtype=SIGNAL_DTYPE)
+        records["id"] = [row.id for row in signals]
+        records["signal_id"] = [row.signal_id for row in signals]
+        records["zone"] = [zone_rows[row.zone_id] for row in signals]
+        records["log_key"] = [row.log_key for row in signals]
+        records["latitude"] = [row.latitude for row in signals]
+        records["longitude"] = [row.longitude for row in signals]
+        for name, members in ENUMS.items():
+            records[name] = [members.index(getattr(row, name)) for row in signals]
+        for name in ("green_time", "yellow_time", "red_time"):
+            records[name] = [getattr(row, name) or 0 for row in signals]
+        rows = {row.log_key: index for index, row in enumerate(signals)}
+
+        # Latest reading per signal and per-zone minute totals, both from the last hour of logs
+        since = datetime.utcnow() - timedelta(minutes=MINUTES)
+        newest = db.query(
+            models.TrafficLog.signal_key, func.max(models.TrafficLog.timestamp).label("timestamp")
+        ).filter(models.TrafficLog.timestamp >= since).group_by(models.TrafficLog.signal_key).subquery()
+        latest = db.query(
+            models.TrafficLog.signal_key, models.TrafficLog.vehicle_count, models.TrafficLog.queue_length,
+            models.TrafficLog.density, models.TrafficLog.timestamp,
+        ).join(newest, and_(
+            models.TrafficLog.signal_key == newest.c.signal_key, models.TrafficLog.timestamp == newest.c.timestamp
+        )).all()
+        for signal_key, vehicles, queue, density, timestamp in latest:
+            row = rows.get(signal_key)
+            if row is not None:
+                records["vehicle_count"][row] = vehicles
+                records["queue_length"][row] = queue
+                records["density"][row] = density
+                records["reading_at"][row] = epoch_seconds(timestamp)
+
+        # Writers stamp a tick's logs alike, so this is one row per zone per tick
+        totals = db.query(
+            models.Signal.zone_id, models.TrafficLog.timestamp, func.count(),
+            func.sum(models.TrafficLog.vehicle_count), func.sum(models.TrafficLog.density),
+        ).join(models.Signal, models.Signal.log_key == models.TrafficLog.signal_key).filter(
+            models.TrafficLog.timestamp >= since
+        ).group_by(models.Signal.zone_id, models.TrafficLog.timestamp).all()
+        buckets = np.zeros((len(zone_ids), MINUTES), dtype=BUCKET_DTYPE)
+        for zone_id, timestamp, logs, vehicles, density in totals:
+            minute = int(epoch_seconds(timestamp) // 60)
+            cell = (zone_rows[zone_id], minute % MINUTES)
+            if buckets["minute"][cell] != minute:
+                buckets[cell] = (minute, 0, 0, 0)
+            buckets["vehicles"][cell] += vehicles or 0
+            buckets["density"][cell] += density or 0
+            buckets["logs"][cell] += logs
+        return records, zone_ids, buckets
+
+    def _apply(self, snapshot, started: float):
+        """Copy a _query() result into the segment"""
+        if snapshot is None:
+            with self._writing():
+                self._header["ready"] = 0
+            self.overflowed = True
+            return
+        self.overflowed = False
+        records, zone_ids, buckets = snapshot
+        with self._writing():
+            self._signals[:len(records)] = records
+            self._zones[:len(zone_ids)] = [zone_id.encode() for zone_id in zone_ids]
+            self._buckets[:len(zone_ids)] = buckets
+            self._header["count"] = len(records)
+            self._header["zone_count"] = len(zone_ids)
+            self._header["layout"] += 1
+            self._header["ready"] = 1
+            self._sync_index()
+        self.loads += 1
+        self.last_load_ms = round((time.perf_counter() - started) * 1000, 3)
+        print(f"[OK] Shared signal state loaded: {len(records)} signals, {len(zone_ids)} zones "
+              f"in {self.last_load_ms:.0f} ms")
+
+    def observe_many(self, timestamp: datetime, readings: Sequence[Tuple[int, str, float, float]],
+                     queue_lengths: Optional[Sequence[float]] = None):
+        """Record a tick's (signal_key, zone_id, vehicles, density) readings"""
+        if not readings or not self.attach():
+            return
+        vehicles = np.array([reading[2] for reading in readings], dtype=float)
+        density = np.array([reading[3] for reading in readings], dtype=float)
+        at = epoch_seconds(timestamp)
+        minute = int(at // 60)
+        slot = minute % MINUTES
+        with self._writing():
+            if not self._header["ready"][0]:
+                return
+            self._sync_index()
+            rows = [self._rows.get(reading[0], -1) for reading in readings]
+            if -1 in rows:
+                # A signal added since the last load; the leader reloads on its next resync
+                self._header["ready"] = 0
+                return
+            signals = self._signals
+            signals["vehicle_count"][rows] = vehicles
+            signals["density"][rows] = density
+            signals["reading_at"][rows] = at
+            if queue_lengths is not None:
+                signals["queue_length"][rows] = queue_lengths
+            zones = signals["zone"][rows]
+            # Start this minute's bucket over in zones where it still holds the previous hour
+            touched = np.unique(zones)
+            stale = touched[self._buckets["minute"][touched, slot] != minute]
+            self._buckets["minute"][stale, slot] = minute
+            for name in ("vehicles", "density", "logs"):
+                self._buckets[name][stale, slot] = 0
+            np.add.at(self._buckets["vehicles"][:, slot], zones, vehicles)
+            np.add.at(self._buckets["density"][:, slot], zones, density)
+            np.add.at(self._buckets["logs"][:, slot], zones, 1)
+
+    def update_signals(self, signals: Iterable[models.Signal]):
+        """Copy phase, timings, status and mode of updated signals (call after commit)"""
+        signals = list(signals)
+        if not signals or not self.attach():
+            return
+        with self._writing():
+            if not self._header["ready"][0]:
+                return
+            self._sync_index()
+            for signal in signals:
+                row = self._ids.get(signal.id)
+                if row is None or self._signals["signal_id"][row] != signal.signal_id.encode() \
+                        or self._zones[self._signals["zone"][row]] != signal.zone_id.encode():
+                    # New signal or a changed sort/zone key: needs a full reload
+                    self._header["ready"] = 0
+                    return
+                for name in CONFIG_FIELDS:
+                    value = getattr(signal, name)
+                    self._signals[name][row] = ENUMS[name].index(value) if name in ENUMS else value or 0
+
+    # Data versions
+
+    def segment_id(self) -> Optional[str]:
+        """Id of the mapped segment (new for every leader); None if unavailable"""
+        if not self.attach():
+            return None
+        return self._shm.name.rsplit("-", 1)[-1]
+
+    def _version_row(self, zone_id: str, create: bool) -> int:
+        """Row of a zone in the version table, -1 if absent (create only under the write lock)"""
+        row = self._version_rows.get(zone_id)
+        if row is not None:
+            return row
+        key = zone_id.encode()
+        count = int(self._header["version_count"][0])
+        matches = np.flatnonzero(self._versions["zone"][:count] == key)
+        if len(matches):
+            row = int(matches[0])
+        elif create and count < len(self._versions):
+            row = count
+            self._versions["zone"][row] = key
+            self._header["version_count"] = count + 1
+        else:
+            return -1
+        self._version_rows[zone_id] = row
+        return row
+
+    def bump_version(self, zone_id: Optional[str]) -> bool:
+        """Count a data change in one zone (None = all zones); False if the segment is unavailable"""
+        if not self.attach():
+            return False
+        with self._write_lock():
+            self._header["total"] += 1
+            row = -1 if zone_id is None else self._version_row(zone_id, create=True)
+            if row < 0:
+                # City-wide, or the version table is full: every zone's version moves
+                self._header["city_wide"] += 1
+            else:
+                self._versions["version"][row] += 1
+        return True
+
+    def data_version(self, zone_id: Optional[str]) -> Optional[Tuple[str, int]]:
+        """(segment id, version) of a zone scope (None = all zones); None if the segment is unavailable"""
+        segment = self.segment_id()
+        if segment is None:
+            return None
+        header = self._header
+        if zone_id is None:
+            return segment, int(header["total"][0])
+        row = self._version_row(zone_id, create=False)
+        zone_version = int(self._versions["version"][row]) if row >= 0 else 0
+        return segment, int(header["city_wide"][0]) + zone_version
+
+    # Readers
+
+    def _read(self, reader: Callable[[], object]):
+        """Run reader() against a consistent snapshot; None if unavailable"""
+        if not self.attach():
+            signal_state_reads.labels("unavailable").inc()
+            return None
+        header = self._header
+        for _ in range(READ_RETRIES):
+            seq = int(header["seq"][0])
+            if seq % 2:
+                time.sleep(0)  # Writer in progress (another process); yield the GIL and retry
+                continue
+            if not header["ready"][0]:
+                signal_state_reads.labels("unavailable").inc()
+                return None
+            try:
+                result = reader()
+            except (IndexError, ValueError):
+                continue  # Saw a half-written layout; the sequence check would reject it anyway
+            if int(header["seq"][0]) == seq:
+                signal_state_reads.labels("shared").inc()
+                return result
+        signal_state_reads.labels("contended").inc()
+        return None
+
+    def _zone_row(self, zone_id: str) -> int:
+        """Row of a zone in the zone table, -1 if it has no signals (call inside a read)"""
+        zones = self._zones[:int(self._header["zone_count"][0])]
+        matches = np.flatnonzero(zones == zone_id.encode())
+        return int(matches[0]) if len(matches) else -1
+
+    def signals_page(self, zone_id: Optional[str], fields: List[str], after: Optional[str],
+                     limit: Optional[int]) -> Optional[Tuple[bytes, Optional[str]]]:
+        """One page of /signals for a zone scope, encoded like list_signals(); None = use the database"""
+        def read():
+            count = int(self._header["count"][0])
+            signals = self._signals[:count]
+            mask = np.ones(count, dtype=bool)
+            if zone_id:
+                mask &= signals["zone"] == self._zone_row(zone_id)
+            if after:
+                mask &= signals["signal_id"] > after.encode()
+            rows = np.flatnonzero(mask)
+            if limit:
+                rows = rows[:limit + 1]
+            return signals[rows].copy(), self._zones[:int(self._header["zone_count"][0])].copy()
+
+        snapshot = self._read(read)
+        if snapshot is None:
+            return None
+        records, zones = snapshot
+        next_cursor = None
+        if limit and len(records) > limit:
+            records = records[:limit]
+            next_cursor = records[-1]["signal_id"].decode()
+
+        columns = []
+        for name in fields:
+            if name == "zone_id":
+                values = [zone.decode() for zone in zones[records["zone"]].tolist()]
+            elif name in ENUM_VALUES:
+                lookup = ENUM_VALUES[name]
+                values = [lookup[code] for code in records[name].tolist()]
+            elif records.dtype[name].kind == "S":
+                values = [value.decode() for value in records[name].tolist()]
+            else:
+                values = records[name].tolist()
+            columns.append(values)
+        items = [dict(zip(fields, row)) for row in zip(*columns)] if columns else []
+        return json.dumps(items, separators=(",", ":")).encode("utf-8"), next_cursor
+
+    def traffic_totals(self, zone_id: Optional[str]) -> Optional[dict]:
+        """Signal counts and reading totals (last 10 minutes / last hour) for a zone scope"""
+        now_minute = int(time.time() // 60)
+
+        def read():
+            count = int(self._header["count"][0])
+            zone_count = int(self._header["zone_count"][0])
+            signals = self._signals[:count]
+            if zone_id:
+                zone = self._zone_row(zone_id)
+                in_scope = signals["zone"] == zone
+                buckets = self._buckets[zone:zone + 1] if zone >= 0 else self._buckets[:0]
+            else:
+                in_scope = np.ones(count, dtype=bool)
+                buckets = self._buckets[:zone_count]
+            age = now_minute - buckets["minute"]
+            hourly = (age >= 0) & (age < MINUTES)
+            recent = hourly & (age < RECENT_MINUTES)
+            return {
+                "total_signals": int(in_scope.sum()),
+                "active_signals": int((in_scope & (signals["status"] == ACTIVE)).sum()),
+                "recent_logs": int(buckets["logs"][recent].sum()),
+                "recent_vehicles": float(buckets["vehicles"][recent].sum()),
+                "recent_density": float(buckets["density"][recent].sum()),
+                "hourly_logs": int(buckets["logs"][hourly].sum()),
+                "hourly_vehicles": float(buckets["vehicles"][hourly].sum()),
+                "hourly_density": float(buckets["density"][hourly].sum()),
+            }
+
+        return self._read(read)
+
+    def active_signals(self) -> Optional[np.ndarray]:
+        """id, position and latest reading of every active signal; None = use the database"""
+        def read():
+            signals = self._signals[:int(self._header["count"][0])]
+            rows = signals[signals["status"] == ACTIVE]
+            return rows[["id", "latitude", "longitude", "density", "queue_length", "reading_at"]].copy()
+
+        return self._read(read)
+
+    # Leader
+
+    async def _resync_loop(self):
+        while True:
+            await asyncio.sleep(self.resync_seconds)
+            if self._header is not None and not self._header["ready"][0] and not self.overflowed:
+                await self._reload()
+
+    async def _reload(self):
+        try:
+            await self.load_async()
+        except Exception as e:
+            print(f"Shared signal state reload error: {e}")
+
+    async def _run(self):
+        await self._reload()
+        await self._resync_loop()
+
+    def start(self):
+        """Leader: create the segment and load it in the background (readers use the database until
+        it is ready), then reload whenever a worker invalidates it"""
+        self.create()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.close()
+
+    def stats(self) -> dict:
+        attached = self.attach()
+        return {
+            "segment": self._shm.name if self._shm is not None else None,
+            "owner": self.owner,
+            "attached": attached,
+            "ready": bool(attached and self._header["ready"][0]),
+            "signals": int(self._header["count"][0]) if attached else 0,
+            "zones": int(self._header["zone_count"][0]) if attached else 0,
+            "capacity": self.capacity,
+            "size_bytes": self._shm.size if self._shm is not None else 0,
+            "loads": self.loads,
+            "last_load_ms": self.last_load_ms,
+        }
+
+class _FileLockContext:
+    def __init__(self, handle):
+        self.handle = handle
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+class _SeqlockWrite:
+    """Writer side of the seqlock: cross-process lock, then odd sequence while writing"""
+
+    def __init__(self, state: SharedSignalState):
+        self.state = state
+        self.lock = state._write_lock()
+
+    def __enter__(self):
+        self.lock.__enter__()
+        self.state._header["seq"] += 1
+
+    def __exit__(self, *exc):
+        header = self.state._header
+        header["updated_at"] = time.time()
+        header["seq"] += 1
+        self.lock.__exit__(*exc)
+
+# Global instance
+signal_state = SharedSignalState(
+    prefix=f"uf-{deployment_id()}",
+    pointer_path=runtime_path("state"),
+    lock_path=runtime_path("state.lock"),
+    capacity=settings.SIGNAL_STATE_CAPACITY,
+    zone_capacity=settings.SIGNAL_STATE_ZONE_CAPACITY,
+    resync_seconds=settings.SIGNAL_STATE_RESYNC_SECONDS,
+    # Producers only run in one process when workers coordinate
+    enabled=settings.SIGNAL_STATE_ENABLED and settings.WORKER_COORDINATION_ENABLED,
+)
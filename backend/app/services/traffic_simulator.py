@@ -1,10 +1,18 @@
 """Traffic simulation service for generating realistic traffic data"""
 import asyncio
 import random
+import time
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
 from app.db import models
+from app.services.data_version import data_versions
+from app.services.demand_profiles import demand_profiles
+from app.services.forecasting import forecaster
+from app.services.metrics import record_rows, websocket_send_failures
+from app.services.worker_bus import worker_bus
+from app.services.signal_state import signal_state
+from app.services.road_segments import road_segments
 
 class TrafficSimulator:
     def __init__(self):
@@ -21,15 +29,19 @@ class TrafficSimulator:
             self.websocket_connections.remove(ws)
     
     async def broadcast(self, message_type: str, data: dict):
-        """Broadcast message to all connected WebSocket clients"""
-        if not self.websocket_connections:
-            return
-            
+        """Broadcast message to all connected WebSocket clients, in every worker"""
         message = {
             "type": message_type,
             "data": data,
             "timestamp": datetime.utcnow().isoformat(),
         }
+        worker_bus.publish("broadcast", {"service": "traffic_simulator", "message": message})
+        await self.deliver(message)
+    
+    async def deliver(self, message: dict):
+        """Send a message to this worker's WebSocket clients"""
+        if not self.websocket_connections:
+            return
         
         disconnected = []
         for ws in self.websocket_connections:
@@ -41,48 +53,66 @@ class TrafficSimulator:
                     await ws.send_text(json.dumps(message))
             except Exception as e:
                 print(f"WebSocket broadcast error: {e}")
+                websocket_send_failures.labels("traffic_simulator").inc()
                 disconnected.append(ws)
         
         for ws in disconnected:
             self.remove_websocket(ws)
     
+    def simulate_tick(self, db: Session) -> int:
+        """Write one round of simulated traffic logs; returns the number of signals updated"""
+        started = time.perf_counter()
+        # Get all active signals
+        signals = db.query(models.Signal).filter(
+            models.Signal.status == models.SignalStatus.ACTIVE
+        ).all()
+        
+        readings = []
+        queue_lengths = []
+        for signal in signals:
+            # Simulate traffic density changes
+            vehicle_count = random.randint(20, 80)
+            queue_length = random.randint(5, 40)
+            density = random.uniform(0.2, 0.9)
+            
+            # Create traffic log
+            traffic_log = models.TrafficLog(
+                signal_key=signal.log_key,
+                vehicle_count=vehicle_count,
+                pedestrian_count=random.randint(0, 15),
+                queue_length=queue_length,
+                density=density,
+            )
+            db.add(traffic_log)
+            readings.append((signal.log_key, signal.zone_id, vehicle_count, density))
+            queue_lengths.append(queue_length)
+            
+            # Update signal phase based on traffic
+            if queue_length > 30 and signal.current_phase == models.SignalPhase.NORTH:
+                # High queue, might need phase extension
+                pass
+        
+        db.commit()
+        tick_time = datetime.utcnow()
+        demand_profiles.observe_many(tick_time, readings)
+        forecaster.observe_many(tick_time, readings)
+        road_segments.observe_many(tick_time, readings)
+        signal_state.observe_many(tick_time, readings, queue_lengths)
+        worker_bus.publish_readings(tick_time, readings)
+        data_versions.bump()
+        record_rows("simulator", len(readings), time.perf_counter() - started)
+        return len(signals)
+    
     async def simulate_traffic(self):
         """Simulate traffic updates"""
         db = SessionLocal()
         try:
             while self.running:
-                # Get all active signals
-                signals = db.query(models.Signal).filter(
-                    models.Signal.status == models.SignalStatus.ACTIVE
-                ).all()
-                
-                for signal in signals:
-                    # Simulate traffic density changes
-                    vehicle_count = random.randint(20, 80)
-                    queue_length = random.randint(5, 40)
-                    density = random.uniform(0.2, 0.9)
-                    
-                    # Create traffic log
-                    traffic_log = models.TrafficLog(
-                        signal_id=signal.id,
-                        vehicle_count=vehicle_count,
-                        pedestrian_count=random.randint(0, 15),
-                        queue_length=queue_length,
-                        density=density,
-                        traffic_density=density,  # Also populate legacy column
-                    )
-                    db.add(traffic_log)
-                    
-                    # Update signal phase based on traffic
-                    if queue_length > 30 and signal.current_phase == models.SignalPhase.NORTH:
-                        # High queue, might need phase extension
-                        pass
-                
-                db.commit()
+                signals_updated = self.simulate_tick(db)
                 
                 # Broadcast updates
                 await self.broadcast("traffic_update", {
-                    "signals_updated": len(signals),
+                    "signals_updated": signals_updated,
                     "timestamp": datetime.utcnow().isoformat(),
                 })
                 
@@ -102,22 +132,37 @@ class TrafficSimulator:
                     models.Signal.status == models.SignalStatus.ACTIVE
                 ).all()
                 
+                phases = list(models.SignalPhase)
+                changed = []
                 for signal in signals:
                     # Randomly change phase
                     if random.random() < 0.1:  # 10% chance
-                        phases = list(models.SignalPhase)
                         current_index = phases.index(signal.current_phase)
                         next_index = (current_index + 1) % len(phases)
                         signal.current_phase = phases[next_index]
-                        
-                        db.commit()
-                        
-                        await self.broadcast("signal_update", {
-                            "signal_id": signal.id,
-                            "signal_id_display": signal.signal_id,
-                            "phase": signal.current_phase.value,
-                            "status": signal.status.value,
-                        })
+                        changed.append(signal)
+                
+                if changed:
+                    # One commit per pass; committing per signal kept the loop busy for
+                    # tens of seconds after startup in large cities
+                    updates = [{
+                        "signal_id": signal.id,
+                        "signal_id_display": signal.signal_id,
+                        "phase": signal.current_phase.value,
+                        "status": signal.status.value,
+                    } for signal in changed]
+                    zone_ids = {signal.zone_id for signal in changed}
+                    db.commit()
+                    # Reload the expired rows in one query rather than one per signal
+                    changed = db.query(models.Signal).filter(
+                        models.Signal.id.in_([update["signal_id"] for update in updates])
+                    ).all()
+                    signal_state.update_signals(changed)
+                    for zone_id in zone_ids:
+                        data_versions.bump(zone_id)
+                    
+                    for update in updates:
+                        await self.broadcast("signal_update", update)
                 
                 await asyncio.sleep(30)  # Check every 30 seconds
                 
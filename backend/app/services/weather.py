@@ -0,0 +1,209 @@
+"""
+Weather provider shared by every consumer of the current weather
+One backend (simulated, a JSON file, or an HTTP endpoint such as
+OpenWeatherMap or a local stand-in) is queried at most once per TTL; callers
+arriving while a refresh is in flight wait for that same refresh. Between
+refreshes get() returns the cached value, so all signals in a tick, the
+road congestion update and /realtime/weather see the same weather.
+With several workers only the leader queries the backend; it publishes each
+refresh over the worker bus and the other workers serve the value it sent.
+"""
+import asyncio
+import importlib.util
+import json
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+# Weather impact on traffic
+WEATHER_MULTIPLIERS = {
+    "clear": 1.0,
+    "cloudy": 1.1,
+    "rainy": 1.4,  # Rain increases traffic significantly
+    "foggy": 1.3,
+}
+
+# OpenWeatherMap "weather[0].main" groups
+OWM_CONDITIONS = {
+    "Clear": "clear",
+    "Clouds": "cloudy",
+    "Rain": "rainy",
+    "Drizzle": "rainy",
+    "Thunderstorm": "rainy",
+    "Snow": "rainy",
+    "Mist": "foggy",
+    "Fog": "foggy",
+    "Haze": "foggy",
+    "Smoke": "foggy",
+    "Dust": "foggy",
+}
+
+SIMULATED_PERSISTENCE = 0.8  # Chance the simulated condition carries over to the next refresh
+ERROR_RETRY_SECONDS = 30.0  # A failed refresh is retried after this long, not on every call
+
+def fallback_weather() -> Dict:
+    """Clear weather, served until a real value is available"""
+    return {"condition": "clear", "temperature": None, "humidity": None,
+            "traffic_multiplier": 1.0, "source": "fallback"}
+
+def parse_weather(payload: Dict, source: str) -> Dict:
+    """Weather dict from our own format or an OpenWeatherMap current weather response"""
+    if "weather" in payload and "main" in payload:
+        group = payload["weather"][0].get("main", "Clear") if payload["weather"] else "Clear"
+        condition = OWM_CONDITIONS.get(group, "cloudy")
+        temperature = payload["main"].get("temp")
+        if temperature is not None and temperature > 200:  # Kelvin unless units=metric was requested
+            temperature -= 273.15
+        humidity = payload["main"].get("humidity")
+    else:
+        condition = payload.get("condition", "clear")
+        temperature = payload.get("temperature")
+        humidity = payload.get("humidity")
+    if condition not in WEATHER_MULTIPLIERS:
+        raise ValueError(f"unknown weather condition {condition!r}")
+    return {
+        "condition": condition,
+        "temperature": None if temperature is None else round(float(temperature), 1),
+        "humidity": humidity,
+        "traffic_multiplier": WEATHER_MULTIPLIERS[condition],
+        "source": source,
+    }
+
+class SimulatedWeather:
+    """Random Mumbai weather that persists across refreshes rather than changing on every call"""
+    name = "simulated_weather"
+
+    def __init__(self):
+        self.condition: Optional[str] = None
+
+    async def fetch(self) -> Dict:
+        if self.condition is None or random.random() > SIMULATED_PERSISTENCE:
+            self.condition = random.choice(list(WEATHER_MULTIPLIERS))
+        return parse_weather({
+            "condition": self.condition,
+            "temperature": random.randint(25, 35),  # Mumbai temperature range
+            "humidity": random.randint(60, 90),
+        }, self.name)
+
+class FileWeather:
+    """Weather read from a JSON file (our format or a saved OpenWeatherMap response)"""
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def fetch(self) -> Dict:
+        def read():
+            with open(self.path) as f:
+                return json.load(f)
+        return parse_weather(await asyncio.to_thread(read), self.name)
+
+class HttpWeather:
+    """Weather from an HTTP endpoint returning either JSON format (e.g. OpenWeatherMap)"""
+    name = "http"
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self) -> Dict:
+        if importlib.util.find_spec("aiohttp") is None:
+            raise RuntimeError("aiohttp not installed")
+        import aiohttp
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(self.url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                return parse_weather(await response.json(content_type=None), self.name)
+
+def create_backend():
+    backend = settings.WEATHER_BACKEND
+    if backend == "file":
+        return FileWeather(settings.WEATHER_SOURCE)
+    if backend == "http":
+        return HttpWeather(settings.WEATHER_SOURCE, settings.WEATHER_TIMEOUT_SECONDS)
+    if backend != "simulated":
+        print(f"[WARNING] Unknown WEATHER_BACKEND {backend!r}; using simulated weather")
+    return SimulatedWeather()
+
+class WeatherProvider:
+    """TTL cache in front of one weather backend, refreshed by a single in-flight request"""
+
+    def __init__(self, backend=None, ttl: Optional[float] = None):
+        self._backend = backend
+        self.ttl = settings.WEATHER_TTL_SECONDS if ttl is None else ttl
+        self.value: Optional[Dict] = None
+        self.fetched_at: Optional[datetime] = None
+        self.expires = 0.0  # time.monotonic() deadline
+        self.refreshes = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.received = 0  # Values taken from the leader
+        self.is_source: Callable[[], bool] = lambda: True  # False in workers that follow the leader's weather
+        self._refresh: Optional[asyncio.Future] = None
+        self._listeners: List[Callable[[Dict, Optional[datetime]], None]] = []
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = create_backend()
+        return self._backend
+
+    def subscribe(self, listener: Callable[[Dict, Optional[datetime]], None]):
+        """Call listener(value, fetched_at) after every refresh"""
+        self._listeners.append(listener)
+
+    def apply(self, value: Dict, fetched_at: Optional[datetime]):
+        """Take a value refreshed by the leader; kept for a TTL should this worker become the leader"""
+        self.value, self.fetched_at = value, fetched_at
+        self.expires = time.monotonic() + self.ttl
+        self.received += 1
+
+    async def get(self) -> Dict:
+        """Current weather: the cached value while fresh, otherwise the result of one shared refresh"""
+        if self.value is not None and time.monotonic() < self.expires:
+            return self.value
+        if not self.is_source():
+            # The leader refreshes and publishes; keep serving its last value
+            return self.value or fallback_weather()
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._refresh)
+
+    async def _fetch(self) -> Dict:
+        try:
+            value = await self.backend.fetch()
+            self.refreshes += 1
+            self.value, self.fetched_at, self.last_error = value, datetime.utcnow(), None
+            self.expires = time.monotonic() + self.ttl
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Weather fetch error: {e}")
+            # Keep serving the last good value; clear weather until there is one
+            if self.value is None or self.value["source"] == "fallback":
+                self.value = fallback_weather()
+            self.expires = time.monotonic() + min(self.ttl, ERROR_RETRY_SECONDS)
+        for listener in self._listeners:
+            listener(self.value, self.fetched_at)
+        return self.value
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend.name,
+            "role": "source" if self.is_source() else "follower",
+            "ttl_seconds": self.ttl,
+            "fetched_at": self.fetched_at.isoformat() if self.fetched_at else None,
+            "age_seconds": round((datetime.utcnow() - self.fetched_at).total_seconds(), 1) if self.fetched_at else None,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "received": self.received,
+        }
+
+# Global instance
+weather_provider = WeatherProvider()
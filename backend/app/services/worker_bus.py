@@ -0,0 +1,215 @@
+"""
+In-host pub/sub between uvicorn worker processes
+The leader worker hosts a hub on a Unix socket (TCP on localhost where
+AF_UNIX is unavailable); every other worker connects to it. A message
+published in any worker is delivered to the handlers of every other worker:
+WebSocket broadcasts (so clients of any worker see producer updates), data
+version bumps (so ETags and response caches follow writes made elsewhere),
+tick readings (so demand profiles and forecasts stay current) and the
+leader's weather. The hub keeps the latest frame of retained kinds and sends
+it to followers as they connect, so a worker that joins late is not left
+without a value that is only published now and then.
+
+Frames are newline-delimited JSON: {"kind": ..., "payload": ...}.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.db.database import database_url
+
+MAX_FRAME = 16 * 1024 * 1024  # Largest message (a full tick of readings for a big city)
+MAX_PEER_BUFFER = 8 * 1024 * 1024  # Drop messages for a peer that stops reading
+RECONNECT_SECONDS = 1.0
+
+def deployment_id() -> str:
+    """Short hash of the database URL; workers of one deployment share it"""
+    return hashlib.sha1(database_url.encode()).hexdigest()[:12]
+
+def runtime_path(suffix: str) -> str:
+    """Per-deployment path in the temp dir, so separate deployments don't collide"""
+    return os.path.join(tempfile.gettempdir(), f"urbanflow-{deployment_id()}.{suffix}")
+
+class WorkerBus:
+    def __init__(self, path: str, port: int):
+        self.path = path
+        self.port = port
+        self.use_unix = hasattr(socket, "AF_UNIX") and hasattr(asyncio, "start_unix_server")
+        self.is_hub = False
+        self.running = False
+        self._handlers: Dict[str, Callable[[dict], object]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()  # Hub: connected workers
+        self._retained: Dict[str, bytes] = {}  # Hub: latest frame per retained kind
+        self._upstream: Optional[asyncio.StreamWriter] = None  # Follower: connection to the hub
+        self._client_task: Optional[asyncio.Task] = None
+        self._delivering = False
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "reconnects": 0}
+
+    def on(self, kind: str, handler: Callable[[dict], object]):
+        """Register the handler for messages of one kind published by other workers"""
+        self._handlers[kind] = handler
+
+    @property
+    def peers(self) -> int:
+        return len(self._peers) if self.is_hub else int(self._upstream is not None)
+
+    def publish(self, kind: str, payload: dict, retain: bool = False):
+        """Send a message to every other worker (no-op when there are none).
+
+        With retain, the hub also replays the latest such message to workers that connect later.
+        """
+        if self._delivering:
+            # Messages being delivered from another worker are not re-published
+            return
+        if not self.peers and not (retain and self.is_hub):
+            return
+        frame = (json.dumps({"kind": kind, "payload": payload}, separators=(",", ":"), default=str) + "\n").encode()
+        if retain and self.is_hub:
+            self._retained[kind] = frame
+        if not self.peers:
+            return
+        self.stats["published"] += 1
+        if self.is_hub:
+            self._fan_out(frame)
+        else:
+            self._write(self._upstream, frame)
+
+    def _write(self, writer: asyncio.StreamWriter, frame: bytes):
+        if writer.is_closing():
+            return  # Peer went away; its reader loop removes it
+        if writer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+            self.stats["dropped"] += 1
+            return
+        writer.write(frame)
+
+    def _fan_out(self, frame: bytes, exclude: Optional[asyncio.StreamWriter] = None):
+        for writer in list(self._peers):
+            if writer is not exclude:
+                self._write(writer, frame)
+
+    async def _deliver(self, line: bytes):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        handler = self._handlers.get(message.get("kind"))
+        if handler is None:
+            return
+        # Synchronous handlers run with publishing suppressed, so applying a remote
+        # version bump doesn't echo it back; async handlers must only deliver locally
+        self._delivering = True
+        try:
+            result = handler(message.get("payload") or {})
+            if asyncio.iscoroutine(result):
+                self._delivering = False
+                await result
+        except Exception as e:
+            print(f"Worker bus handler error ({message.get('kind')}): {e}")
+        finally:
+            self._delivering = False
+        self.stats["delivered"] += 1
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Hub side of one follower connection: relay its messages to everyone else"""
+        self._peers.add(writer)
+        for frame in list(self._retained.values()):
+            self._write(writer, frame)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._fan_out(line, exclude=writer)
+                await self._deliver(line)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def become_hub(self):
+        """Host the hub (called by the worker that won leader election)"""
+        await self._stop_client()
+        if self.use_unix:
+            if os.path.exists(self.path):
+                os.unlink(self.path)  # Left behind by a previous leader
+            self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path, limit=MAX_FRAME)
+        else:
+            self._server = await asyncio.start_server(self._serve_peer, "127.0.0.1", self.port, limit=MAX_FRAME)
+        self.is_hub = True
+        self.running = True
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self.use_unix:
+            return await asyncio.open_unix_connection(self.path, limit=MAX_FRAME)
+        return await asyncio.open_connection("127.0.0.1", self.port, limit=MAX_FRAME)
+
+    async def _client_loop(self):
+        """Follower side: stay connected to the hub, reconnecting after leader changes"""
+        while self.running and not self.is_hub:
+            try:
+                reader, writer = await self._connect()
+            except (OSError, ConnectionError):
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            self._upstream = writer
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    await self._deliver(line)
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                self._upstream = None
+                writer.close()
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def join(self):
+        """Connect to the hub as a follower"""
+        if self._client_task is None and not self.is_hub:
+            self.running = True
+            self._client_task = asyncio.create_task(self._client_loop())
+
+    async def _stop_client(self):
+        if self._client_task is not None:
+            self._client_task.cancel()
+            try:
+                await self._client_task
+            except asyncio.CancelledError:
+                pass
+            self._client_task = None
+        if self._upstream is not None:
+            self._upstream.close()
+            self._upstream = None
+
+    async def stop(self):
+        self.running = False
+        await self._stop_client()
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._peers):
+                writer.close()
+            self._peers.clear()
+            self._retained.clear()
+            self._server = None
+            if self.use_unix and os.path.exists(self.path):
+                os.unlink(self.path)
+        self.is_hub = False
+
+    def publish_readings(self, timestamp: datetime, readings: List[Tuple[int, str, float, float]]):
+        """Share a tick's (signal_key, zone_id, vehicles, density) readings with the other workers"""
+        if readings:
+            self.publish("readings", {"timestamp": timestamp.isoformat(), "readings": readings})
+
+# Global instance
+worker_bus = WorkerBus(path=settings.WORKER_BUS_PATH or runtime_path("sock"), port=settings.WORKER_BUS_PORT)
@@ -0,0 +1,141 @@
+"""
+Fixtures for the hot-path benchmark suite
+Builds a synthetic SQLite database of configurable size in a temporary
+directory, so benchmarks never touch urbanflow.db.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep simulator ticks from writing into a running server's shared signal state
+os.environ["SIGNAL_STATE_ENABLED"] = "false"
+
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.core.security import get_password_hash
+from app.services.signal_state import SharedSignalState
+from app.services.road_graph import SAMPLE_EXTRACT, build_from_file
+
+def pytest_addoption(parser):
+    group = parser.getgroup("urbanflow", "Urban Flow benchmark database size")
+    group.addoption("--bench-zones", type=int, default=4, help="Zones in the synthetic DB")
+    group.addoption("--bench-signals", type=int, default=200, help="Signals in the synthetic DB")
+    group.addoption("--bench-hours", type=int, default=24, help="Hours of traffic log history")
+    group.addoption("--bench-interval", type=int, default=10, help="Minutes between logs per signal")
+    group.addoption("--bench-ws-clients", type=int, default=200, help="WebSocket clients for fan-out")
+
+@pytest.fixture(scope="session")
+def bench_size(request):
+    option = request.config.getoption
+    return {
+        "zones": option("--bench-zones"),
+        "signals": option("--bench-signals"),
+        "hours": option("--bench-hours"),
+        "interval": option("--bench-interval"),
+        "ws_clients": option("--bench-ws-clients"),
+    }
+
+@pytest.fixture(scope="session")
+def bench_engine(tmp_path_factory, bench_size):
+    """Synthetic city: zones, signals around Mumbai and bench_hours of logs for every signal"""
+    rng = random.Random(42)
+    path = tmp_path_factory.mktemp("bench") / "bench.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+
+    zone_ids = [str(uuid.uuid4()) for _ in range(bench_size["zones"])]
+    signal_rows = []
+    for key in range(1, bench_size["signals"] + 1):
+        signal_rows.append({
+            "id": str(uuid.uuid4()),
+            "signal_id": f"BENCH-{key:06d}",
+            "log_key": key,
+            "zone_id": zone_ids[key % len(zone_ids)],
+            "latitude": rng.uniform(18.9, 19.3),
+            "longitude": rng.uniform(72.7, 73.0),
+            "status": models.SignalStatus.ACTIVE,
+            "current_phase": models.SignalPhase.NORTH,
+            "mode": models.ControlMode.AUTO,
+        })
+
+    now = datetime.utcnow()
+    steps = bench_size["hours"] * 60 // bench_size["interval"]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Zone), [
+            {"id": zone_id, "name": f"Bench Zone {i}", "city": "Bench",
+             "latitude": 19.0, "longitude": 72.85}
+            for i, zone_id in enumerate(zone_ids)
+        ])
+        conn.execute(insert(models.Signal), signal_rows)
+        conn.execute(insert(models.User), [{
+            "id": "bench-admin",
+            "email": "bench@urbanflow.gov",
+            "hashed_password": get_password_hash("Bench@2024"),
+            "name": "Bench Admin",
+            "role": models.UserRole.SUPER_ADMIN,
+        }])
+        for step in range(steps):
+            timestamp = now - timedelta(minutes=step * bench_size["interval"])
+            conn.execute(insert(models.TrafficLog), [
+                {
+                    "signal_key": key,
+                    "vehicle_count": rng.randint(10, 120),
+                    "pedestrian_count": rng.randint(0, 20),
+                    "queue_length": rng.randint(0, 40),
+                    "density": rng.random(),
+                    "timestamp": timestamp,
+                }
+                for key in range(1, bench_size["signals"] + 1)
+            ])
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(bench_engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+@pytest.fixture
+def zone_id(db):
+    return db.query(models.Zone.id).order_by(models.Zone.name).first()[0]
+
+@pytest.fixture
+def admin(db):
+    return db.query(models.User).filter(models.User.id == "bench-admin").one()
+
+@pytest.fixture
+def shared_state(db, tmp_path, bench_size):
+    """A private shared signal state segment loaded from the synthetic DB"""
+    state = SharedSignalState(
+        prefix=f"uf-bench-{os.getpid()}", pointer_path=str(tmp_path / "state"),
+        lock_path=str(tmp_path / "state.lock"), capacity=bench_size["signals"], zone_capacity=bench_size["zones"],
+    )
+    state.create()
+    state.load(db)
+    yield state
+    state.close()
+
+@pytest.fixture(scope="session")
+def road_graph_path(tmp_path_factory):
+    """Graph file built from the bundled sample OSM extract"""
+    path = str(tmp_path_factory.mktemp("road_graph") / "sample.graph")
+    build_from_file(SAMPLE_EXTRACT, path)
+    return path
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine function to completion on a dedicated event loop"""
+    loop = asyncio.new_event_loop()
+    yield lambda factory: loop.run_until_complete(factory())
+    loop.close()
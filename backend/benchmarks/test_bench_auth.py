@@ -0,0 +1,18 @@
+"""Benchmarks for JWT authentication"""
+from app.api.v1.endpoints.auth import get_current_user
+from app.core.security import create_access_token, decode_access_token
+
+def test_create_access_token(benchmark):
+    token = benchmark(create_access_token, {"sub": "bench-admin"})
+    assert token
+
+def test_decode_access_token(benchmark):
+    token = create_access_token({"sub": "bench-admin"})
+    payload = benchmark(decode_access_token, token)
+    assert payload["sub"] == "bench-admin"
+
+def test_get_current_user(benchmark, db):
+    """Token decode plus the per-request user lookup every authenticated endpoint pays"""
+    token = create_access_token({"sub": "bench-admin"})
+    user = benchmark(get_current_user, token, db)
+    assert user.id == "bench-admin"
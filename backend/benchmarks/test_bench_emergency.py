@@ -0,0 +1,18 @@
+"""Benchmarks for emergency routing"""
+from app.api.v1.endpoints.emergency import find_signals_along_route
+from app.services.road_graph import RoadGraphStore
+from app.services.routing import RoutingEngine
+
+def test_find_signals_along_route(benchmark, db):
+    # Colaba to Andheri: spans most of the synthetic city
+    result = benchmark(find_signals_along_route, 18.91, 72.81, 19.12, 72.85, db, 2.0)
+    assert isinstance(result, list)
+
+def test_road_graph_route(benchmark, road_graph_path, db):
+    store = RoadGraphStore()
+    store.open(road_graph_path)
+    router = RoutingEngine(store)
+    # Opposite corners of the sample street grid
+    plan = benchmark(router.route, 18.925, 72.825, 18.9448, 72.8459, db)
+    assert plan["path"][0] == [72.825, 18.925] and plan["path"][-1] == [72.8459, 18.9448]
+    assert plan["duration_s"] >= plan["free_flow_s"] > 0
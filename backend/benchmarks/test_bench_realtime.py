@@ -0,0 +1,57 @@
+"""Benchmarks for the simulator tick, live road segments, cached weather and WebSocket broadcast fan-out"""
+import json
+from datetime import datetime
+
+from app.core.config import settings
+from app.db import models
+from app.services.road_graph import RoadGraphStore
+from app.services.road_segments import RoadSegmentStore
+from app.services.weather import SimulatedWeather, WeatherProvider
+from app.services.traffic_simulator import TrafficSimulator
+
+class FakeWebSocket:
+    """Stands in for a Starlette WebSocket: serializes like send_json, discards the frame"""
+    def __init__(self):
+        self.frames = 0
+
+    async def send_json(self, data):
+        json.dumps(data, separators=(",", ":"))
+        self.frames += 1
+
+def test_simulator_tick(benchmark, db, bench_size):
+    simulator = TrafficSimulator()
+    updated = benchmark(simulator.simulate_tick, db)
+    assert updated == bench_size["signals"]
+
+def test_shared_state_tick(benchmark, shared_state, db):
+    """Writing one tick of readings into the shared signal state"""
+    readings = [(key, zone_id, 40, 0.5) for key, zone_id in db.query(models.Signal.log_key, models.Signal.zone_id)]
+    benchmark(shared_state.observe_many, datetime.utcnow(), readings, [10] * len(readings))
+    assert shared_state.stats()["ready"]
+
+def test_road_segment_tick(benchmark, db, monkeypatch):
+    """Folding one tick of readings into the MUMBAI_ROADS segments"""
+    monkeypatch.setattr(settings, "ROAD_SEGMENTS_SOURCE", "mumbai_roads")
+    segments = RoadSegmentStore(RoadGraphStore())
+    segments.load(db)
+    readings = [(key, zone_id, 40, 0.9) for key, zone_id in db.query(models.Signal.log_key, models.Signal.zone_id)]
+    benchmark(segments.observe_many, datetime.utcnow(), readings)
+    summary = segments.summary()
+    assert summary["reporting"] == summary["with_signals"] == summary["by_congestion"]["severe"] > 0
+    assert segments.segments(limit=1)[0]["speed_kmh"] < segments.segments(limit=1)[0]["free_speed_kmh"]
+
+def test_cached_weather(benchmark, run):
+    """Every signal in a tick asks for the weather; only the first call reaches the backend"""
+    provider = WeatherProvider(SimulatedWeather(), ttl=300)
+    first = run(provider.get)
+    assert benchmark(run, provider.get) is first
+    assert provider.refreshes == 1
+
+def test_broadcast_fanout(benchmark, run, bench_size):
+    simulator = TrafficSimulator()
+    clients = [FakeWebSocket() for _ in range(bench_size["ws_clients"])]
+    for ws in clients:
+        simulator.add_websocket(ws)
+    payload = {"signals_updated": bench_size["signals"], "timestamp": "2024-01-01T00:00:00"}
+    benchmark(run, lambda: simulator.broadcast("traffic_update", payload))
+    assert clients[-1].frames > 0
@@ -0,0 +1,15 @@
+"""Benchmarks for building and opening the road network graph"""
+from app.services.road_graph import SAMPLE_EXTRACT, RoadGraph, build_graph, read_overpass_json
+
+def test_build_road_graph(benchmark):
+    ways, signals, meta = read_overpass_json(SAMPLE_EXTRACT)
+    graph = benchmark(build_graph, ways, signals, meta)
+    # 12x12 junctions; one-way lanes contribute a single direction
+    assert (graph.node_count, graph.edge_count) == (144, 468)
+    assert graph.indptr[-1] == graph.rev_indptr[-1] == graph.edge_count
+
+def test_open_road_graph(benchmark, road_graph_path):
+    graph = benchmark(RoadGraph.open, road_graph_path)
+    assert graph.summary()["signals"] == 27
+    edge = graph.out_edges(0)[0]
+    assert graph.edge_geometry(edge)[0] == [graph.node_lon[0], graph.node_lat[0]]
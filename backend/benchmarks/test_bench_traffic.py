@@ -0,0 +1,48 @@
+"""Benchmarks for the traffic read endpoints"""
+from datetime import datetime, timedelta
+
+from app.api.v1.endpoints.traffic import (
+    calculate_traffic_stats, calculate_traffic_predictions, get_traffic_history,
+)
+from app.services.demand_profiles import demand_profiles
+from app.services.response_cache import ResponseCache
+
+def test_traffic_stats_all_zones(benchmark, run, db):
+    result = benchmark(run, lambda: calculate_traffic_stats(None, db))
+    assert result.total_signals > 0
+
+def test_traffic_stats_zone(benchmark, run, db, zone_id):
+    result = benchmark(run, lambda: calculate_traffic_stats(zone_id, db))
+    assert result.zone_id == zone_id
+
+def test_traffic_stats_shared_state(benchmark, shared_state, zone_id):
+    totals = benchmark(shared_state.traffic_totals, zone_id)
+    assert totals["total_signals"] > 0
+
+def test_signals_page_shared_state(benchmark, shared_state):
+    fields = ["id", "signal_id", "zone_id", "status", "current_phase", "green_time"]
+    body, _ = benchmark(shared_state.signals_page, None, fields, None, 500)
+    assert body.startswith(b"[{")
+
+def test_traffic_stats_cached(benchmark, run, db):
+    cache = ResponseCache(ttl_seconds=3600)
+    compute = lambda: calculate_traffic_stats(None, db)
+    run(lambda: cache.get_or_compute("traffic_stats", None, None, compute))  # Prime the cache
+    result = benchmark(run, lambda: cache.get_or_compute("traffic_stats", None, None, compute))
+    assert cache.hits > 0 and result.total_signals > 0
+
+def test_traffic_history_day(benchmark, run, db, admin):
+    end = datetime.utcnow()
+    start = (end - timedelta(hours=24)).isoformat()
+    result = benchmark(run, lambda: get_traffic_history(start, end.isoformat(), None, admin, db))
+    assert result["history"]
+
+def test_traffic_predictions_warm(benchmark, run, db):
+    demand_profiles.load(db)
+    result = benchmark(run, lambda: calculate_traffic_predictions(24, None, db))
+    assert len(result["predictions"]) == 24
+
+def test_demand_profile_load(benchmark, db):
+    """Cold start of predictions: bootstrapping profiles from the logs"""
+    benchmark(demand_profiles.load, db)
+    assert demand_profiles.signals
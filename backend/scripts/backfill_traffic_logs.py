@@ -0,0 +1,214 @@
+"""
+Backfill historical traffic logs for every signal
+Synthesizes N days of readings from the time-of-day / weekday demand curve
+(realtime_data_service.time_multiplier) and simulated hourly weather, using
+the same formulas as the real-time service. Readings are computed in NumPy
+blocks of a few hundred thousand rows and streamed into traffic_logs with
+multi-row INSERTs, one transaction per block, so memory stays bounded.
+
+By default history is written up to the oldest existing log, so the
+backfill never overlaps live data and repeated runs extend it further back.
+
+Usage:
+    python scripts/backfill_traffic_logs.py --days 14 --interval 300
+    python scripts/backfill_traffic_logs.py --days 28 --defer-index   # fastest; offline databases only
+    python scripts/backfill_traffic_logs.py --days 7 --dry-run        # generation throughput only
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, select
+
+from app.db.database import engine, init_db
+from app.db import models
+from app.services.realtime_data_service import (
+    BASE_QUEUE_LENGTH, BASE_VEHICLE_COUNT, WEATHER_MULTIPLIERS, is_rush_hour, time_multiplier,
+)
+
+BLOCK_ROWS = 250_000  # Rows generated and written per block (bounds memory)
+ROWS_PER_STATEMENT = 160  # Multi-row VALUES per INSERT on SQLite (6 columns, well under the variable limit)
+PROGRESS_SECONDS = 2.0
+COLUMNS = ("signal_key", "vehicle_count", "pedestrian_count", "queue_length", "density", "timestamp")
+LOG_INDEX = "ix_traffic_logs_signal_key_timestamp"
+
+# Demand multiplier by [weekday, hour] and rush-hour flag by hour, from the live service's curve
+DEMAND_CURVE = np.array([[time_multiplier(hour, day) for hour in range(24)] for day in range(7)])
+RUSH_HOURS = np.array([is_rush_hour(hour) for hour in range(24)])
+WEATHER_VALUES = np.array(list(WEATHER_MULTIPLIERS.values()))
+
+def sqlite_timestamp(moment: datetime) -> str:
+    """A naive UTC datetime as SQLAlchemy stores it on SQLite (so string range filters still work)"""
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+class Backfill:
+    def __init__(self, signal_keys: np.ndarray, start: datetime, steps: int, interval: int,
+                 utc_offset_minutes: int, seed: int = 42):
+        self.keys = signal_keys
+        self.start = start
+        self.steps = steps
+        self.interval = interval
+        self.utc_offset = timedelta(minutes=utc_offset_minutes)
+        self.rng = np.random.default_rng(seed)
+        # Busier and quieter junctions around the shared curve
+        self.scale = self.rng.uniform(0.8, 1.2, len(signal_keys))
+        # One simulated weather condition per hour of the range, shared by all signals
+        hours = steps * interval // 3600 + 2
+        self.weather = WEATHER_VALUES[self.rng.integers(0, len(WEATHER_VALUES), hours)]
+
+    @property
+    def total_rows(self) -> int:
+        return self.steps * len(self.keys)
+
+    def blocks(self, block_rows: int = BLOCK_ROWS) -> Iterator[Tuple[np.ndarray, ...]]:
+        """(keys, vehicles, pedestrians, queues, densities, step indexes), signal-major within a block"""
+        steps_per_block = max(1, block_rows // len(self.keys))
+        for first in range(0, self.steps, steps_per_block):
+            steps = np.arange(first, min(first + steps_per_block, self.steps))
+            seconds = steps * self.interval
+            local = self.start + self.utc_offset
+            offsets = local.hour * 3600 + local.minute * 60 + local.second + seconds
+            hour = (offsets // 3600) % 24
+            weekday = (local.weekday() + offsets // 86400) % 7
+            multiplier = DEMAND_CURVE[weekday, hour]
+            weather = self.weather[(local.minute * 60 + local.second + seconds) // 3600]
+
+            shape = (len(self.keys), len(steps))
+            demand = multiplier * weather * self.scale[:, None]
+            vehicles = np.maximum(0, (BASE_VEHICLE_COUNT * demand).astype(np.int64)
+                                  + self.rng.integers(-10, 21, shape))
+            queues = np.maximum(0, (BASE_QUEUE_LENGTH * demand).astype(np.int64)
+                                + self.rng.integers(-5, 16, shape))
+            densities = np.round(np.minimum(1.0, vehicles / 100 * multiplier), 2)
+            pedestrians = self.rng.integers(0, np.where(RUSH_HOURS[hour], 21, 11), shape)
+            yield (np.repeat(self.keys, len(steps)), vehicles.ravel(), pedestrians.ravel(), queues.ravel(),
+                   densities.ravel(), np.tile(steps, len(self.keys)))
+
+    def timestamps(self, steps: np.ndarray) -> np.ndarray:
+        """Timestamp strings for step indexes (each distinct step is formatted once)"""
+        unique, inverse = np.unique(steps, return_inverse=True)
+        labels = np.array([sqlite_timestamp(self.start + timedelta(seconds=int(step) * self.interval))
+                           for step in unique], dtype=object)
+        return labels[inverse]
+
+def write_sqlite(cursor, block, timestamps: np.ndarray):
+    """Multi-row INSERTs: one statement binds ROWS_PER_STATEMENT rows"""
+    keys, vehicles, pedestrians, queues, densities, _ = block
+    rows = np.empty((len(keys), len(COLUMNS)), dtype=object)
+    for column, values in enumerate((keys, vehicles, pedestrians, queues, densities, timestamps)):
+        rows[:, column] = values
+    full = len(rows) // ROWS_PER_STATEMENT * ROWS_PER_STATEMENT
+    placeholders = "(" + ", ".join("?" * len(COLUMNS)) + ")"
+    prefix = f"INSERT INTO traffic_logs ({', '.join(COLUMNS)}) VALUES "
+    if full:
+        sql = prefix + ", ".join([placeholders] * ROWS_PER_STATEMENT)
+        cursor.executemany(sql, rows[:full].reshape(-1, ROWS_PER_STATEMENT * len(COLUMNS)).tolist())
+    if full < len(rows):
+        sql = prefix + ", ".join([placeholders] * (len(rows) - full))
+        cursor.execute(sql, rows[full:].ravel().tolist())
+
+def write_core(conn, block, backfill: Backfill):
+    """Other databases: Core executemany (batched by the dialect's insertmanyvalues)"""
+    keys, vehicles, pedestrians, queues, densities, steps = block
+    conn.execute(insert(models.TrafficLog), [
+        {"signal_key": key, "vehicle_count": vehicle, "pedestrian_count": pedestrian, "queue_length": queue,
+         "density": density, "timestamp": backfill.start + timedelta(seconds=step * backfill.interval)}
+        for key, vehicle, pedestrian, queue, density, step in zip(
+            keys.tolist(), vehicles.tolist(), pedestrians.tolist(), queues.tolist(), densities.tolist(),
+            steps.tolist())
+    ])
+
+def default_end() -> datetime:
+    """Oldest existing log (so live data is never overlapped), else now"""
+    with engine.connect() as conn:
+        oldest = conn.execute(select(func.min(models.TrafficLog.timestamp))).scalar()
+    if isinstance(oldest, str):
+        oldest = datetime.fromisoformat(oldest)
+    if oldest is not None and oldest.tzinfo is not None:
+        oldest = oldest.replace(tzinfo=None)
+    return oldest or datetime.utcnow()
+
+def run(days: float, interval: int, end: Optional[datetime], utc_offset_minutes: int, seed: int,
+        defer_index: bool, dry_run: bool, block_rows: int):
+    with engine.connect() as conn:
+        keys = np.array(conn.execute(
+            select(models.Signal.log_key).order_by(models.Signal.log_key)
+        ).scalars().all(), dtype=np.int64)
+    if not len(keys):
+        print("[ERROR] No signals to backfill; seed the database first")
+        return
+    end = end or default_end()
+    steps = int(days * 86400 // interval)
+    start = end - timedelta(seconds=steps * interval)
+    backfill = Backfill(keys, start, steps, interval, utc_offset_minutes, seed)
+    print(f"[INFO] Backfilling {backfill.total_rows:,} logs: {len(keys):,} signals x {steps:,} readings "
+          f"every {interval}s from {start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M} UTC")
+
+    sqlite = engine.dialect.name == "sqlite"
+    index = next(index for index in models.TrafficLog.__table__.indexes if index.name == LOG_INDEX)
+    if defer_index and not dry_run:
+        # Appending without the index is several times faster; it is rebuilt (sorted) at the end
+        index.drop(bind=engine, checkfirst=True)
+        print(f"[INFO] Dropped {LOG_INDEX}; it is rebuilt after the backfill")
+
+    started = time.perf_counter()
+    last_report, written = started, 0
+    raw = engine.raw_connection() if sqlite and not dry_run else None
+    try:
+        for block in backfill.blocks(block_rows):
+            if dry_run:
+                backfill.timestamps(block[5])
+            elif sqlite:
+                cursor = raw.cursor()
+                write_sqlite(cursor, block, backfill.timestamps(block[5]))
+                raw.commit()
+            else:
+                with engine.begin() as conn:
+                    write_core(conn, block, backfill)
+            written += len(block[0])
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_SECONDS:
+                print(f"[INFO] {written:,}/{backfill.total_rows:,} rows ({written / backfill.total_rows:.0%}), "
+                      f"{written / (now - started):,.0f} rows/s")
+                last_report = now
+    finally:
+        if raw is not None:
+            raw.close()
+    elapsed = time.perf_counter() - started
+    action = "Generated" if dry_run else "Wrote"
+    print(f"[OK] {action} {written:,} logs in {elapsed:.2f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    if defer_index and not dry_run:
+        rebuild_started = time.perf_counter()
+        index.create(bind=engine, checkfirst=True)
+        total = time.perf_counter() - started
+        print(f"[OK] Rebuilt {LOG_INDEX} in {time.perf_counter() - rebuild_started:.2f}s "
+              f"({written / total:,.0f} rows/s including the rebuild)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill synthetic traffic log history for every signal")
+    parser.add_argument("--days", type=float, default=14.0)
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between readings of a signal")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None,
+                        help="UTC end of the range (default: oldest existing log, else now)")
+    parser.add_argument("--utc-offset", type=float, default=5.5,
+                        help="Hours added to UTC to place readings on the local demand curve (Mumbai: 5.5)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS, help="Rows per generated block")
+    parser.add_argument("--defer-index", action="store_true",
+                        help=f"Drop {LOG_INDEX} during the backfill and rebuild it after (offline databases)")
+    parser.add_argument("--dry-run", action="store_true", help="Generate without writing")
+    args = parser.parse_args()
+
+    init_db()
+    run(args.days, args.interval, args.end, int(args.utc_offset * 60), args.seed,
+        args.defer_index, args.dry_run, args.block_rows)
+
+if __name__ == "__main__":
+    main()
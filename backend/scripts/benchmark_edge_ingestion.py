@@ -0,0 +1,90 @@
+"""
+Benchmark the edge ingestion gateway
+- parse/validate/coalesce rate of feed() on one core
+- end-to-end TCP loopback rate including batched inserts into an in-memory SQLite DB
+Usage: python scripts/benchmark_edge_ingestion.py [signals] [readings]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import random
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.pool import StaticPool
+from app.db import models
+from app.services.edge_ingestion import EdgeIngestionGateway
+
+def make_payload(signals: int, readings: int) -> bytes:
+    rng = random.Random(42)
+    now_ms = int(time.time() * 1000)
+    lines = [
+        f"SIG-{rng.randrange(signals):06d},{rng.randint(0, 120)},{rng.randint(0, 20)},"
+        f"{rng.randint(0, 60)},{rng.random():.3f},{now_ms}"
+        for _ in range(readings)
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+def make_gateway(signals: int) -> EdgeIngestionGateway:
+    gateway = EdgeIngestionGateway(flush_interval=1.0, max_pending=10**9)
+    gateway.signals = {f"SIG-{i:06d}".encode(): (i + 1, f"zone-{i % 20}") for i in range(signals)}
+    gateway._registry_refreshed = time.monotonic()
+    return gateway
+
+def benchmark_feed(signals: int, readings: int):
+    gateway = make_gateway(signals)
+    payload = make_payload(signals, readings)
+    chunks = [payload[i:i + 64 * 1024] for i in range(0, len(payload), 64 * 1024)]
+    # Re-align chunks on line boundaries like the TCP protocol does
+    aligned, partial = [], b""
+    for chunk in chunks:
+        data = partial + chunk
+        end = data.rfind(b"\n")
+        aligned.append(data[:end])
+        partial = data[end + 1:]
+    began = time.perf_counter()
+    for chunk in aligned:
+        gateway.feed(chunk)
+    elapsed = time.perf_counter() - began
+    print(f"feed():        {readings / elapsed:,.0f} readings/s "
+          f"({gateway.stats['accepted']:,} accepted, {len(gateway.pending):,} coalesced rows)")
+
+async def benchmark_tcp(signals: int, readings: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(bind=engine)
+
+    def write_rows(rows):
+        with engine.begin() as conn:
+            conn.execute(insert(models.TrafficLog), rows)
+
+    gateway = make_gateway(signals)
+    gateway._write_rows = write_rows
+    gateway.load_signals = lambda: None
+    await gateway.start("127.0.0.1", 0, 0)
+    port = gateway._servers[1].sockets[0].getsockname()[1]
+
+    payload = make_payload(signals, readings)
+    began = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(payload)
+    await writer.drain()
+    writer.close()
+    while gateway.stats["received"] < readings:
+        await asyncio.sleep(0.01)
+    await gateway.stop()
+    elapsed = time.perf_counter() - began
+    print(f"TCP + inserts: {readings / elapsed:,.0f} readings/s "
+          f"({gateway.stats['rows_written']:,} rows in {gateway.stats['flushes']} flushes, "
+          f"{gateway.stats['backpressure_pauses']} backpressure pauses)")
+
+if __name__ == "__main__":
+    signals = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    readings = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    print("=" * 60)
+    print(f"Signals: {signals}, readings: {readings:,}")
+    benchmark_feed(signals, readings)
+    asyncio.run(benchmark_tcp(signals, readings))
+    print("=" * 60)
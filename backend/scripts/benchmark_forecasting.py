@@ -0,0 +1,64 @@
+"""
+Benchmark the short-horizon forecaster: batch fit, per-tick update and forecast
+Usage: python scripts/benchmark_forecasting.py [signals] [history_steps]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+from app.services.forecasting import ShortHorizonForecaster, METRICS
+
+def benchmark(signals: int = 10000, history_steps: int = 240, ticks: int = 50):
+    rng = np.random.default_rng(42)
+    step = 15.0
+    keys = list(range(1, signals + 1))
+    start = time.time() - history_steps * step
+
+    # Synthetic history: noisy sinusoidal demand per signal
+    phase = rng.uniform(0, 2 * np.pi, size=(signals, 1))
+    t = np.arange(history_steps)[None, :]
+    vehicles = 50 + 20 * np.sin(2 * np.pi * t / 240 + phase) + rng.normal(0, 5, (signals, history_steps))
+    density = np.clip(vehicles / 100, 0, 1)
+    values = np.stack([vehicles, density], axis=-1)
+    mask = rng.random((signals, history_steps)) > 0.05  # ~5% missing readings
+    times = start + (np.arange(history_steps) + 1) * step
+
+    model = ShortHorizonForecaster(step_seconds=step)
+    began = time.perf_counter()
+    model.fit(keys, times, values, mask)
+    fit_seconds = time.perf_counter() - began
+    model.loaded = True
+
+    rows = model.row_indices(keys)
+    update_times = []
+    now = times[-1]
+    for _ in range(ticks):
+        now += step
+        tick_values = np.stack([
+            50 + rng.normal(0, 5, signals),
+            rng.uniform(0.2, 0.9, signals),
+        ], axis=-1)
+        began = time.perf_counter()
+        model.update_rows(rows, tick_values, now)
+        update_times.append(time.perf_counter() - began)
+
+    began = time.perf_counter()
+    model.forecast(keys, [5, 10, 15])
+    forecast_seconds = time.perf_counter() - began
+
+    update_ms = np.array(update_times) * 1000
+    print("=" * 60)
+    print(f"Signals: {signals}, history steps: {history_steps}, metrics: {len(METRICS)}")
+    print(f"Batch fit:        {fit_seconds * 1000:.1f} ms total, "
+          f"{fit_seconds / (signals * history_steps) * 1e9:.1f} ns per reading")
+    print(f"Tick update:      median {np.median(update_ms):.2f} ms, p95 {np.percentile(update_ms, 95):.2f} ms "
+          f"({np.median(update_ms) * 1e6 / signals:.0f} ns per signal)")
+    print(f"Forecast (3 horizons): {forecast_seconds * 1000:.2f} ms")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    signals = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    history_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 240
+    benchmark(signals, history_steps)
@@ -0,0 +1,65 @@
+"""
+Build the road network graph (app/services/road_graph.py) from an OSM extract
+Parses an Overpass JSON export or an .osm.pbf file (needs pyosmium) once and
+writes the memory-mapped graph file the API loads at startup. With no
+--source, the cached Overpass response is used (downloaded first if missing).
+
+Usage:
+    python scripts/build_road_graph.py --source mumbai.osm.pbf
+    python scripts/build_road_graph.py --source data/osm/sample_grid.osm.json --out /tmp/sample.graph
+    python scripts/build_road_graph.py            # cached Overpass response (fetched once)
+    python scripts/build_road_graph.py --info     # summary of the current graph file
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.services.road_graph import RoadGraph, build_from_file, default_graph_path, default_osm_cache
+
+def show_info(path: str):
+    started = time.perf_counter()
+    graph = RoadGraph.open(path)
+    print(f"[INFO] {path}: opened in {(time.perf_counter() - started) * 1000:.1f} ms, "
+          f"{os.path.getsize(path) / 1e6:.1f} MB")
+    print(json.dumps(graph.summary(), indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the road network graph from an OSM extract")
+    parser.add_argument("--source", help=".osm.pbf or Overpass .json extract (default: cached Overpass response)")
+    parser.add_argument("--out", default=None, help="Graph file (default: ROAD_GRAPH_PATH or data/road_graph.bin)")
+    parser.add_argument("--landmarks", type=int, default=None,
+                        help="ALT routing landmarks to precompute (default: ROUTING_LANDMARKS; 0 = none)")
+    parser.add_argument("--info", action="store_true", help="Only print the summary of the graph file")
+    args = parser.parse_args()
+
+    out = args.out or default_graph_path()
+    if args.info:
+        show_info(out)
+        return
+    source = args.source or default_osm_cache()
+    if not os.path.exists(source):
+        if args.source:
+            print(f"[ERROR] {source} not found")
+            sys.exit(1)
+        from app.services.realtime_data_service import realtime_data_service
+
+        async def download():
+            try:
+                return await realtime_data_service.download_openstreetmap(source)
+            finally:
+                await realtime_data_service.stop()
+
+        error = asyncio.run(download())
+        if error:
+            print(f"[ERROR] Overpass download failed: {error}")
+            sys.exit(1)
+    build_from_file(source, out, args.landmarks)
+    show_info(out)
+
+if __name__ == "__main__":
+    main()
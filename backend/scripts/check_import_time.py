@@ -0,0 +1,77 @@
+"""
+Check the import cost of the API (what every uvicorn worker pays at boot)
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+reports the total, the slowest app modules and the slowest third-party
+packages. Fails if the total exceeds the budget or if a module that should
+only load on first use (aiohttp, paho) is imported.
+Usage: python scripts/check_import_time.py [--budget-ms 2500] [--top 15] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET = "app.main"
+# Optional / heavy modules that must not load when a worker imports the app
+DEFERRED = ("aiohttp", "paho")
+
+def measure(target: str):
+    """(self_us, cumulative_us, module) rows of one -X importtime run"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"[ERROR] import {target} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=2500.0, help="Fail above this total import time")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3, help="Report the fastest of this many runs")
+    args = parser.parse_args()
+
+    runs = [measure(TARGET) for _ in range(max(1, args.runs))]
+    rows = min(runs, key=lambda run: sum(self_us for self_us, _, _ in run))
+    total_ms = sum(self_us for self_us, _, _ in rows) / 1000
+    modules = {name.strip() for _, _, name in rows}
+
+    print(f"import {TARGET}: {total_ms:.0f} ms, {len(modules)} modules (best of {len(runs)})")
+
+    print("\nSlowest app modules (self time):")
+    app_rows = sorted((row for row in rows if row[2].strip().startswith("app.")), reverse=True)
+    for self_us, cumulative_us, name in app_rows[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:7.1f} ms)  {name.strip()}")
+
+    packages = defaultdict(int)
+    for self_us, _, name in rows:
+        package = name.strip().split(".")[0]
+        if package != "app":
+            packages[package] += self_us
+    print("\nSlowest third-party / stdlib packages (total self time):")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    failed = False
+    loaded = sorted({name.split(".")[0] for name in modules} & set(DEFERRED))
+    if loaded:
+        print(f"\n[ERROR] Modules that should load on first use were imported: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\n[ERROR] Import time {total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\n[OK] Within the {args.budget_ms:.0f} ms budget")
+
+if __name__ == "__main__":
+    main()
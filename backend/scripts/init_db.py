@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.database import engine, SessionLocal
+from app.db.database import SessionLocal, init_db
 from app.db import models
 from app.core.security import get_password_hash
 
@@ -16,9 +16,8 @@ except ImportError:
 
 def init_database():
     """Initialize database with sample data"""
-    # Create tables
-    models.Base.metadata.create_all(bind=engine)
-    print("[OK] Database tables created")
+    # Create tables (fresh database) or report pending migrations
+    init_db()
     
     db = SessionLocal()
     try:
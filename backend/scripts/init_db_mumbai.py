@@ -6,142 +6,135 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.database import engine, SessionLocal
+import argparse
+import random
+import time
+from sqlalchemy import func, insert, select
+from app.db.database import engine, init_db
 from app.db import models
 from app.core.security import get_password_hash
-from scripts.mumbai_data import MUMBAI_ZONES, MUMBAI_ROADS, MUMBAI_SIGNALS
+from scripts.mumbai_data import MUMBAI_ZONES, MUMBAI_SIGNALS
+from scripts.seed_city import insert_rows, next_log_key, signal_row, zone_box, zone_row, zone_signals
 
-def init_database():
-    """Initialize database with Mumbai-specific data"""
-    # Create tables
-    models.Base.metadata.create_all(bind=engine)
-    print("[OK] Database tables created")
+def init_database(synthetic_signals: int = 0, seed_value: int = 42):
+    """Initialize database with Mumbai-specific data, plus optional synthetic signals in the Mumbai zones"""
+    # Create tables (fresh database) or report pending migrations
+    init_db()
     
-    db = SessionLocal()
+    began = time.perf_counter()
     try:
-        # Check if users already exist
-        existing_users = db.query(models.User).count()
-        if existing_users > 0:
-            print(f"[INFO] Database already initialized with {existing_users} users")
-            print("[INFO] To reinitialize, delete the database file and run again")
-            return
-        
-        # Create Mumbai zones
-        zones = []
-        for zone_data in MUMBAI_ZONES:
-            zone = models.Zone(
-                name=zone_data["name"],
-                city=zone_data["city"],
-                latitude=zone_data["latitude"],
-                longitude=zone_data["longitude"],
-                pincode=zone_data["pincodes"][0],  # Primary pincode
-                pincodes=",".join(zone_data["pincodes"]),  # All pincodes
-            )
-            db.add(zone)
-            zones.append(zone)
+        with engine.begin() as conn:
+            # Check if users already exist
+            existing_users = conn.execute(select(func.count()).select_from(models.User)).scalar()
+            if existing_users > 0:
+                print(f"[INFO] Database already initialized with {existing_users} users")
+                print("[INFO] To reinitialize, delete the database file and run again")
+                return
+            
+            # Mumbai zones (ids generated here, so nothing is re-queried after insert)
+            zones = [
+                zone_row(zone_data["name"], zone_data["city"], zone_data["latitude"], zone_data["longitude"],
+                         zone_data["pincodes"])
+                for zone_data in MUMBAI_ZONES
+            ]
+            zones_by_name = {zone["name"]: zone for zone in zones}
+            
+            # Users
+            users_data = [
+                {
+                    "email": "admin@urbanflow.gov",
+                    "password": "Admin@2024",
+                    "name": "Super Admin",
+                    "role": models.UserRole.SUPER_ADMIN,
+                },
+                {
+                    "email": "operator1@urbanflow.gov",
+                    "password": "Operator@2024",
+                    "name": "South Mumbai Operator",
+                    "role": models.UserRole.OPERATOR,
+                    "zone_id": zones[0]["id"],  # South Mumbai
+                },
+                {
+                    "email": "operator2@urbanflow.gov",
+                    "password": "Operator@2024",
+                    "name": "Central Mumbai Operator",
+                    "role": models.UserRole.OPERATOR,
+                    "zone_id": zones[1]["id"],  # Central Mumbai
+                },
+                {
+                    "email": "operator3@urbanflow.gov",
+                    "password": "Operator@2024",
+                    "name": "Western Suburbs Operator",
+                    "role": models.UserRole.OPERATOR,
+                    "zone_id": zones[2]["id"],  # Western Suburbs
+                },
+                {
+                    "email": "operator4@urbanflow.gov",
+                    "password": "Operator@2024",
+                    "name": "North Mumbai Operator",
+                    "role": models.UserRole.OPERATOR,
+                    "zone_id": zones[3]["id"],  # North Mumbai
+                },
+                {
+                    "email": "viewer@urbanflow.gov",
+                    "password": "Viewer@2024",
+                    "name": "Traffic Viewer",
+                    "role": models.UserRole.VIEWER,
+                },
+            ]
+            for user_data in users_data:
+                user_data["hashed_password"] = get_password_hash(user_data.pop("password"))
+                user_data.setdefault("zone_id", None)
+            
+            # The hand-placed Mumbai signals, then synthetic ones along generated roads in each zone
+            next_key = next_log_key(conn)
+            signals = []
+            for signal_data in MUMBAI_SIGNALS:
+                zone = zones_by_name.get(signal_data["zone"], zones[0])
+                signals.append(signal_row(signal_data["signal_id"], next_key, zone["id"],
+                                          signal_data["lat"], signal_data["lon"]))
+                next_key += 1
+            if synthetic_signals:
+                rng = random.Random(seed_value)
+                per_zone, extra = divmod(synthetic_signals, len(zones))
+                for z, zone in enumerate(zones):
+                    count = per_zone + (1 if z < extra else 0)
+                    box = zone_box(zone["latitude"], zone["longitude"])
+                    signals += zone_signals(zone, box, count, f"MUM-SYN-{z + 1:02d}-", next_key, "roads", rng)
+                    next_key += count
+            
+            insert_rows(conn, zones, signals)
+            conn.execute(insert(models.User), users_data)
         
-        db.commit()
         print(f"[OK] Created {len(zones)} Mumbai zones with pincodes")
-        
-        # Create users
-        users_data = [
-            {
-                "email": "admin@urbanflow.gov",
-                "password": "Admin@2024",
-                "name": "Super Admin",
-                "role": models.UserRole.SUPER_ADMIN,
-            },
-            {
-                "email": "operator1@urbanflow.gov",
-                "password": "Operator@2024",
-                "name": "South Mumbai Operator",
-                "role": models.UserRole.OPERATOR,
-                "zone_id": zones[0].id,  # South Mumbai
-            },
-            {
-                "email": "operator2@urbanflow.gov",
-                "password": "Operator@2024",
-                "name": "Central Mumbai Operator",
-                "role": models.UserRole.OPERATOR,
-                "zone_id": zones[1].id,  # Central Mumbai
-            },
-            {
-                "email": "operator3@urbanflow.gov",
-                "password": "Operator@2024",
-                "name": "Western Suburbs Operator",
-                "role": models.UserRole.OPERATOR,
-                "zone_id": zones[2].id,  # Western Suburbs
-            },
-            {
-                "email": "operator4@urbanflow.gov",
-                "password": "Operator@2024",
-                "name": "North Mumbai Operator",
-                "role": models.UserRole.OPERATOR,
-                "zone_id": zones[3].id,  # North Mumbai
-            },
-            {
-                "email": "viewer@urbanflow.gov",
-                "password": "Viewer@2024",
-                "name": "Traffic Viewer",
-                "role": models.UserRole.VIEWER,
-            },
-        ]
-        
-        for user_data in users_data:
-            user_data["hashed_password"] = get_password_hash(user_data.pop("password"))
-            user = models.User(**user_data)
-            db.add(user)
-        
-        db.commit()
         print(f"[OK] Created {len(users_data)} users")
-        
-        # Create signals
-        for signal_data in MUMBAI_SIGNALS:
-            # Find zone by name
-            zone = next((z for z in zones if z.name == signal_data["zone"]), zones[0] if zones else None)
-            
-            signal = models.Signal(
-                signal_id=signal_data["signal_id"],
-                zone_id=zone.id if zone else zones[0].id if zones else None,
-                latitude=signal_data["lat"],
-                longitude=signal_data["lon"],
-                status=models.SignalStatus.ACTIVE,
-                current_phase=models.SignalPhase.NORTH,
-                green_time=30,
-                yellow_time=5,
-                red_time=30,
-                mode=models.ControlMode.AUTO,
-            )
-            db.add(signal)
-        
-        db.commit()
-        print(f"[OK] Created {len(MUMBAI_SIGNALS)} Mumbai traffic signals")
+        print(f"[OK] Created {len(signals)} Mumbai traffic signals "
+              f"({len(MUMBAI_SIGNALS)} mapped, {synthetic_signals} synthetic) in {time.perf_counter() - began:.2f}s")
         
         print("\n" + "="*60)
         print("[SUCCESS] Mumbai Database Initialized Successfully!")
         print("="*60)
         print(f"\nZones Created: {len(zones)}")
         for zone in zones:
-            print(f"  - {zone.name} (Pincodes: {zone.pincodes})")
+            print(f"  - {zone['name']} (Pincodes: {zone['pincodes']})")
         print(f"\nUsers Created: {len(users_data)}")
         print(f"  - Super Admin: admin@urbanflow.gov")
         print(f"  - Operators: operator1-4@urbanflow.gov (assigned to zones)")
         print(f"  - Viewer: viewer@urbanflow.gov")
-        print(f"\nSignals Created: {len(MUMBAI_SIGNALS)}")
+        print(f"\nSignals Created: {len(signals)}")
         print("\n[INFO] All operators are assigned to Mumbai zones")
         print("[INFO] Each operator can only see roads/signals from their assigned zone")
         print("="*60 + "\n")
         
     except Exception as e:
-        db.rollback()
         print(f"[ERROR] Failed to initialize database: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        db.close()
 
 if __name__ == "__main__":
-    init_database()
-
-
-
+    parser = argparse.ArgumentParser(description="Initialize the database with Mumbai data")
+    parser.add_argument("--signals", type=int, default=0,
+                        help="Synthetic signals to add along generated roads in the Mumbai zones (e.g. 100000)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    init_database(args.signals, args.seed)
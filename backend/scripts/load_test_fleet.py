@@ -0,0 +1,347 @@
+"""
+Simulated edge-fleet load generator
+Seeds N zones x M signals into the database in bulk, then drives a running
+backend end-to-end: edge readings over the TCP line protocol, K WebSocket
+clients and P HTTP dashboard pollers, all concurrently. Reports ingestion
+throughput, HTTP latency percentiles, WebSocket fan-out latency and
+event-loop lag (of this generator and, via a /health probe, of the server).
+
+Usage:
+    # 1. Seed (before starting the server, so the edge registry sees the signals)
+    python scripts/load_test_fleet.py seed --zones 20 --signals-per-zone 500 --layout grid
+
+    # 2. Start the backend with edge ingestion enabled
+    EDGE_INGEST_ENABLED=true python -m uvicorn app.main:app --port 8000
+
+    # 3. Drive load
+    python scripts/load_test_fleet.py run --rate 20000 --ws-clients 50 --pollers 20 --duration 60 --output run.json
+
+    # Remove the synthetic fleet again
+    python scripts/load_test_fleet.py cleanup
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+import aiohttp
+from sqlalchemy import select
+
+from app.db.database import engine
+from app.db import models
+from scripts.seed_city import delete_city, seed_city
+
+LOAD_TEST_CITY = "LoadTest"
+SIGNAL_PREFIX = "LT-"
+
+def seed(zones: int, signals_per_zone: int, layout: str, seed_value: int = 42):
+    """Insert the synthetic fleet with bulk Core inserts in a single transaction"""
+    seed_city(LOAD_TEST_CITY, zones, zones * signals_per_zone, layout, seed_value, SIGNAL_PREFIX)
+
+def cleanup():
+    """Delete the synthetic fleet and its traffic logs"""
+    with engine.begin() as conn:
+        zones, signals, logs = delete_city(conn, LOAD_TEST_CITY)
+    print(f"[OK] Removed {zones} zones, {signals} signals, {logs} traffic logs")
+
+def load_fleet():
+    with engine.connect() as conn:
+        return conn.execute(
+            select(models.Signal.signal_id, models.Signal.zone_id)
+            .join(models.Zone, models.Signal.zone_id == models.Zone.id)
+            .where(models.Zone.city == LOAD_TEST_CITY)
+        ).all()
+
+def percentiles(samples):
+    """p50/p90/p99/max in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p90_ms": round(pick(0.90) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+class LoadRun:
+    def __init__(self, args, fleet):
+        self.args = args
+        self.base_url = args.base_url.rstrip("/")
+        self.codes = [code.encode() for code, _ in fleet]
+        self.zone_ids = sorted({zone_id for _, zone_id in fleet})
+        self.stop_at = 0.0
+        self.readings_sent = 0
+        self.send_stalls = 0
+        self.http_latency = {}
+        self.http_status = {}
+        self.ws_latency = []
+        self.ws_messages = 0
+        self.ws_errors = 0
+        self.generator_lag = []
+        self.server_probe = []
+
+    @property
+    def running(self) -> bool:
+        return time.monotonic() < self.stop_at
+
+    async def wait_for_server(self, session, timeout: float = 120.0):
+        """Poll /health until the backend has finished starting up"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                async with session.get(f"{self.base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except (aiohttp.ClientError, OSError):
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Backend at {self.base_url} did not become healthy")
+            await asyncio.sleep(0.5)
+
+    async def login(self, session) -> str:
+        async with session.post(f"{self.base_url}/api/v1/auth/login",
+                                json={"email": self.args.email, "password": self.args.password}) as response:
+            response.raise_for_status()
+            return (await response.json())["access_token"]
+
+    async def feeder(self, index: int, feeders: int):
+        """One edge controller connection sending its share of readings every 100 ms"""
+        _, writer = await asyncio.open_connection(self.args.edge_host, self.args.edge_port)
+        codes = self.codes[index::feeders]
+        per_tick = max(1, round(self.args.rate / feeders / 10))
+        rng = random.Random(index)
+        cursor = 0
+        next_tick = time.monotonic()
+        try:
+            while self.running:
+                now_ms = int(time.time() * 1000)
+                lines = []
+                for _ in range(per_tick):
+                    code = codes[cursor % len(codes)]
+                    cursor += 1
+                    lines.append(b"%s,%d,%d,%d,%.3f,%d" % (
+                        code, rng.randint(0, 120), rng.randint(0, 20), rng.randint(0, 60), rng.random(), now_ms
+                    ))
+                writer.write(b"\n".join(lines) + b"\n")
+                drained = time.monotonic()
+                await writer.drain()
+                if time.monotonic() - drained > 0.05:
+                    self.send_stalls += 1  # Server applied backpressure
+                self.readings_sent += per_tick
+                next_tick += 0.1
+                await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        finally:
+            writer.close()
+
+    async def ws_client(self, session, token: str):
+        """A dashboard WebSocket; fan-out latency = receive time - broadcast timestamp"""
+        url = self.base_url.replace("http", "ws", 1) + f"/ws?token={token}"
+        try:
+            async with session.ws_connect(url) as ws:
+                while self.running:
+                    try:
+                        message = await ws.receive(timeout=max(0.1, self.stop_at - time.monotonic()))
+                    except asyncio.TimeoutError:
+                        break
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    payload = json.loads(message.data)
+                    self.ws_messages += 1
+                    stamp = payload.get("timestamp")
+                    if stamp and payload.get("type") != "connected":
+                        sent = datetime.fromisoformat(stamp)
+                        self.ws_latency.append(max(0.0, (datetime.utcnow() - sent).total_seconds()))
+        except Exception as e:
+            self.ws_errors += 1
+            print(f"[ERROR] WebSocket client: {e}")
+
+    async def poller(self, session, token: str, index: int):
+        """A dashboard polling read endpoints with conditional requests"""
+        rng = random.Random(1000 + index)
+        headers = {"Authorization": f"Bearer {token}"}
+        etags = {}
+        paths = ["/api/v1/traffic/stats", "/api/v1/traffic/zones", "/api/v1/traffic/predictions?hours=24",
+                 "/api/v1/signals?limit=500"]
+        while self.running:
+            path = rng.choice(paths)
+            if self.zone_ids and rng.random() < 0.5:
+                path += ("&" if "?" in path else "?") + f"zone_id={rng.choice(self.zone_ids)}"
+            request_headers = dict(headers)
+            if path in etags:
+                request_headers["If-None-Match"] = etags[path]
+            began = time.perf_counter()
+            try:
+                async with session.get(self.base_url + path, headers=request_headers) as response:
+                    await response.read()
+                    status = response.status
+                    if "ETag" in response.headers:
+                        etags[path] = response.headers["ETag"]
+            except Exception:
+                status = "error"
+            name = path.split("?")[0].replace("/api/v1", "")
+            self.http_latency.setdefault(name, []).append(time.perf_counter() - began)
+            counts = self.http_status.setdefault(name, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+            await asyncio.sleep(self.args.poll_interval)
+
+    async def loop_lag_monitor(self):
+        """Overshoot of a 50 ms sleep in this process; large values mean the generator is saturated"""
+        while self.running:
+            began = time.perf_counter()
+            await asyncio.sleep(0.05)
+            self.generator_lag.append(max(0.0, time.perf_counter() - began - 0.05))
+
+    async def server_probe_loop(self, session):
+        """/health latency approximates server event-loop lag (the handler does no work)"""
+        while self.running:
+            began = time.perf_counter()
+            try:
+                async with session.get(f"{self.base_url}/health") as response:
+                    await response.read()
+                self.server_probe.append(time.perf_counter() - began)
+            except Exception:
+                pass
+            await asyncio.sleep(0.1)
+
+    async def server_metrics(self, session, token: str) -> dict:
+        metrics = {}
+        for name in ("edge", "cache"):
+            try:
+                async with session.get(f"{self.base_url}/api/v1/metrics/{name}",
+                                       headers={"Authorization": f"Bearer {token}"}) as response:
+                    if response.status == 200:
+                        metrics.update(await response.json())
+            except Exception:
+                pass
+        return metrics
+
+    async def run(self) -> dict:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await self.wait_for_server(session)
+            token = await self.login(session)
+            before = await self.server_metrics(session, token)
+            self.stop_at = time.monotonic() + self.args.duration
+            tasks = [self.loop_lag_monitor(), self.server_probe_loop(session)]
+            tasks += [self.ws_client(session, token) for _ in range(self.args.ws_clients)]
+            tasks += [self.poller(session, token, i) for i in range(self.args.pollers)]
+            if self.args.rate > 0:
+                feeders = min(self.args.feeders, len(self.codes))
+                tasks += [self.feeder(i, feeders) for i in range(feeders)]
+            began = time.perf_counter()
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - began
+            await asyncio.sleep(self.args.settle)  # Let the last flush land
+            after = await self.server_metrics(session, token)
+
+        edge_before = before.get("edge_ingestion", {})
+        edge_after = after.get("edge_ingestion", {})
+        written = edge_after.get("rows_written", 0) - edge_before.get("rows_written", 0)
+        accepted = edge_after.get("accepted", 0) - edge_before.get("accepted", 0)
+        http_requests = sum(len(samples) for samples in self.http_latency.values())
+        return {
+            "config": {k: v for k, v in vars(self.args).items() if k not in ("password", "func")},
+            "signals": len(self.codes),
+            "zones": len(self.zone_ids),
+            "duration_s": round(elapsed, 2),
+            "ingestion": {
+                "readings_sent": self.readings_sent,
+                "sent_per_s": round(self.readings_sent / elapsed),
+                "accepted_per_s": round(accepted / elapsed),
+                "rows_written": written,
+                "send_stalls": self.send_stalls,
+                "server": edge_after,
+            },
+            "http": {
+                "requests_per_s": round(http_requests / elapsed, 1),
+                "endpoints": {
+                    name: {**percentiles(samples), "status": self.http_status.get(name, {})}
+                    for name, samples in sorted(self.http_latency.items())
+                },
+            },
+            "websocket": {
+                "clients": self.args.ws_clients,
+                "messages": self.ws_messages,
+                "messages_per_s": round(self.ws_messages / elapsed, 1),
+                "errors": self.ws_errors,
+                "fanout_latency": percentiles(self.ws_latency),
+            },
+            "event_loop_lag": {
+                "generator": percentiles(self.generator_lag),
+                "server_health_probe": percentiles(self.server_probe),
+            },
+            "response_cache": after.get("response_cache", {}),
+        }
+
+def print_report(report: dict):
+    print(f"\n=== {report['zones']} zones / {report['signals']} signals, {report['duration_s']}s ===")
+    ingestion = report["ingestion"]
+    print(f"Ingestion: sent {ingestion['sent_per_s']:,}/s, accepted {ingestion['accepted_per_s']:,}/s, "
+          f"{ingestion['rows_written']:,} rows written, {ingestion['send_stalls']} backpressure stalls")
+    print(f"HTTP: {report['http']['requests_per_s']} req/s")
+    for name, stats in report["http"]["endpoints"].items():
+        print(f"  {name:28s} p50 {stats.get('p50_ms', 0):8.2f}  p90 {stats.get('p90_ms', 0):8.2f}  "
+              f"p99 {stats.get('p99_ms', 0):8.2f} ms  {stats['status']}")
+    ws = report["websocket"]
+    fanout = ws["fanout_latency"]
+    print(f"WebSocket: {ws['clients']} clients, {ws['messages_per_s']} msg/s, fan-out "
+          f"p50 {fanout.get('p50_ms', 0)} / p99 {fanout.get('p99_ms', 0)} ms, {ws['errors']} errors")
+    for name, stats in report["event_loop_lag"].items():
+        print(f"Loop lag ({name}): p50 {stats.get('p50_ms', 0)} / p99 {stats.get('p99_ms', 0)} / "
+              f"max {stats.get('max_ms', 0)} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Edge-fleet load generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Bulk-insert the synthetic fleet")
+    seed_parser.add_argument("--zones", type=int, default=20)
+    seed_parser.add_argument("--signals-per-zone", type=int, default=500)
+    seed_parser.add_argument("--layout", choices=["grid", "roads", "mumbai-roads"], default="grid")
+    seed_parser.add_argument("--seed", type=int, default=42)
+
+    commands.add_parser("cleanup", help="Remove the synthetic fleet and its logs")
+
+    run_parser = commands.add_parser("run", help="Drive a running backend")
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--edge-host", default="127.0.0.1")
+    run_parser.add_argument("--edge-port", type=int, default=9071)
+    run_parser.add_argument("--rate", type=int, default=10000, help="Edge readings per second (0 = none)")
+    run_parser.add_argument("--feeders", type=int, default=8, help="Concurrent edge TCP connections")
+    run_parser.add_argument("--ws-clients", type=int, default=20)
+    run_parser.add_argument("--pollers", type=int, default=10)
+    run_parser.add_argument("--poll-interval", type=float, default=0.5)
+    run_parser.add_argument("--duration", type=float, default=30.0)
+    run_parser.add_argument("--settle", type=float, default=2.0)
+    run_parser.add_argument("--email", default="admin@urbanflow.gov")
+    run_parser.add_argument("--password", default="Admin@2024")
+    run_parser.add_argument("--output", help="Write the JSON report here")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args.zones, args.signals_per_zone, args.layout, args.seed)
+    elif args.command == "cleanup":
+        cleanup()
+    else:
+        fleet = load_fleet()
+        if not fleet:
+            print("[ERROR] No load-test signals found; run 'seed' first")
+            sys.exit(1)
+        report = asyncio.run(LoadRun(args, fleet).run())
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"[OK] Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
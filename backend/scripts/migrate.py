@@ -0,0 +1,52 @@
+"""
+Apply versioned schema migrations (app/db/migrations.py)
+Usage:
+  python scripts/migrate.py status
+  python scripts/migrate.py upgrade [--to VERSION] [--batch-size N]
+  python scripts/migrate.py stamp [--to VERSION]   # mark as applied without running
+Run `upgrade` before rolling out a release that adds migrations; index builds
+and table rebuilds run online, so the API can keep serving meanwhile.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from app.db.database import engine
+from app.db.migrations import BATCH_SIZE, MigrationRunner
+
+def show_status(runner: MigrationRunner):
+    applied = runner.applied()
+    print(f"[INFO] Schema version {runner.current()} (latest {runner.head})")
+    for migration in runner.migrations:
+        row = applied.get(migration.version)
+        if row:
+            state = f"applied {row['applied_at']:%Y-%m-%d %H:%M:%S} ({row['duration_ms'] / 1000:.1f}s)"
+        else:
+            state = "pending"
+        print(f"  {migration.version:04d} {migration.name:<28} {state}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", choices=["status", "upgrade", "stamp"])
+    parser.add_argument("--to", type=int, default=None, help="Stop at this version (default: latest)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per transaction in table rebuilds")
+    args = parser.parse_args()
+
+    runner = MigrationRunner(engine)
+    if args.command == "status":
+        show_status(runner)
+    elif args.command == "upgrade":
+        try:
+            ran = runner.upgrade(args.to, args.batch_size)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+        print(f"[SUCCESS] {ran} migration(s) applied; schema version {runner.current()}")
+    else:
+        runner.stamp(args.to)
+        print(f"[OK] Schema stamped at version {runner.current()}")
+
+if __name__ == "__main__":
+    main()
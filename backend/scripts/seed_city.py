@@ -0,0 +1,257 @@
+"""
+Bulk synthetic city seeder
+Procedurally generates zones (tiling the Mumbai bounding box) and signals
+spaced along generated road polylines inside each zone's box (the same shape
+as MUMBAI_ROADS), then inserts everything with bulk Core statements in a
+single transaction, so a 100k-signal test city seeds in seconds.
+
+Usage:
+    python scripts/seed_city.py --zones 100 --signals 100000
+    python scripts/seed_city.py --city PerfTest --zones 24 --signals 10000 --layout grid --reset
+    python scripts/seed_city.py --city PerfTest --cleanup
+Run scripts/init_db_mumbai.py first for the users (or add --signals to it to
+grow the Mumbai zones instead).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import math
+import random
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, select
+
+from app.db.database import engine, init_db
+from app.db import models
+from app.data.mumbai_roads import MUMBAI_ROADS
+
+SYNTHETIC_CITY = "Synthetic"
+# Mumbai bounding box (same as realtime_data_service.mumbai_bounds)
+MIN_LAT, MAX_LAT, MIN_LON, MAX_LON = 18.9, 19.3, 72.7, 73.0
+ZONE_HALF_SIZE = 0.05  # Degrees around a real zone's centre used as its box
+ROADS_PER_ZONE = (6, 14)  # Generated roads per zone (min, max)
+ROAD_VERTICES = (4, 9)
+
+def zone_boxes(zones: int):
+    """Tile the Mumbai bounding box into a grid of (south, west, north, east) zone boxes"""
+    columns = math.ceil(math.sqrt(zones))
+    rows = math.ceil(zones / columns)
+    height = (MAX_LAT - MIN_LAT) / rows
+    width = (MAX_LON - MIN_LON) / columns
+    for i in range(zones):
+        row, column = divmod(i, columns)
+        south = MIN_LAT + row * height
+        west = MIN_LON + column * width
+        yield south, west, south + height, west + width
+
+def zone_box(latitude: float, longitude: float):
+    """Box around a real zone's centre"""
+    return (latitude - ZONE_HALF_SIZE, longitude - ZONE_HALF_SIZE,
+            latitude + ZONE_HALF_SIZE, longitude + ZONE_HALF_SIZE)
+
+def grid_points(box, count: int):
+    """Signals on a regular lattice inside the zone box"""
+    south, west, north, east = box
+    side = math.ceil(math.sqrt(count))
+    for i in range(count):
+        row, column = divmod(i, side)
+        yield (south + (row + 0.5) * (north - south) / side,
+               west + (column + 0.5) * (east - west) / side)
+
+def mumbai_road_points(box, count: int, rng: random.Random):
+    """Signals spaced along the real Mumbai road polylines, re-centred into the zone box"""
+    south, west, north, east = box
+    center_lat, center_lon = (south + north) / 2, (west + east) / 2
+    per_road = math.ceil(count / len(MUMBAI_ROADS))
+    produced = 0
+    for road in MUMBAI_ROADS:
+        coords = road["coordinates"]
+        road_lon = sum(c[0] for c in coords) / len(coords)
+        road_lat = sum(c[1] for c in coords) / len(coords)
+        # Scatter each road's copy within the box so roads don't overlap
+        offset_lat = rng.uniform(-0.4, 0.4) * (north - south)
+        offset_lon = rng.uniform(-0.4, 0.4) * (east - west)
+        for k in range(per_road):
+            if produced == count:
+                return
+            position = k / max(per_road - 1, 1) * (len(coords) - 1)
+            segment = min(int(position), len(coords) - 2)
+            t = position - segment
+            lon = coords[segment][0] + t * (coords[segment + 1][0] - coords[segment][0])
+            lat = coords[segment][1] + t * (coords[segment + 1][1] - coords[segment][1])
+            yield (min(north, max(south, lat - road_lat + center_lat + offset_lat)),
+                   min(east, max(west, lon - road_lon + center_lon + offset_lon)))
+            produced += 1
+
+def generate_roads(box, zone_name: str, rng: random.Random):
+    """Road polylines crossing the zone box, alternating east-west and north-south, MUMBAI_ROADS-shaped"""
+    south, west, north, east = box
+    roads = []
+    for r in range(rng.randint(*ROADS_PER_ZONE)):
+        vertices = rng.randint(*ROAD_VERTICES)
+        across = rng.uniform(0.1, 0.9)
+        coordinates = []
+        for v in range(vertices):
+            along = v / (vertices - 1)
+            # Drift sideways a little at each bend, staying inside the box
+            across = min(0.98, max(0.02, across + rng.uniform(-0.06, 0.06)))
+            if r % 2 == 0:
+                lon, lat = west + along * (east - west), south + across * (north - south)
+            else:
+                lon, lat = west + across * (east - west), south + along * (north - south)
+            coordinates.append([round(lon, 6), round(lat, 6)])
+        roads.append({
+            "id": f"{zone_name.lower().replace(' ', '-')}-{r + 1}",
+            "name": f"{zone_name} Road {r + 1}",
+            "coordinates": coordinates,
+            "zone": zone_name,
+        })
+    return roads
+
+def road_points(roads, count: int):
+    """count points evenly spaced by length along the roads, as (lat, lon)"""
+    if count <= 0:
+        return  # Fewer signals than zones leaves some zones without any
+    segments = []  # (cumulative start, length, [lon, lat] start, [lon, lat] end)
+    total = 0.0
+    for road in roads:
+        coords = road["coordinates"]
+        for start, end in zip(coords, coords[1:]):
+            length = math.hypot(end[0] - start[0], end[1] - start[1])
+            segments.append((total, length, start, end))
+            total += length
+    spacing = total / count
+    index = 0
+    for k in range(count):
+        distance = (k + 0.5) * spacing
+        while index < len(segments) - 1 and segments[index][0] + segments[index][1] < distance:
+            index += 1
+        offset, length, start, end = segments[index]
+        t = (distance - offset) / length if length else 0.0
+        yield start[1] + t * (end[1] - start[1]), start[0] + t * (end[0] - start[0])
+
+def zone_row(name: str, city: str, latitude: float, longitude: float, pincodes=()):
+    return {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "city": city,
+        "latitude": latitude,
+        "longitude": longitude,
+        "pincode": pincodes[0] if pincodes else None,
+        "pincodes": ",".join(pincodes) if pincodes else None,
+    }
+
+def signal_row(signal_id: str, log_key: int, zone_id: str, latitude: float, longitude: float,
+               phase: models.SignalPhase = models.SignalPhase.NORTH):
+    return {
+        "id": str(uuid.uuid4()),
+        "signal_id": signal_id,
+        "log_key": log_key,
+        "zone_id": zone_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "status": models.SignalStatus.ACTIVE,
+        "current_phase": phase,
+        "green_time": 30,
+        "yellow_time": 5,
+        "red_time": 30,
+        "mode": models.ControlMode.AUTO,
+    }
+
+def zone_signals(zone: dict, box, count: int, prefix: str, next_key: int, layout: str, rng: random.Random):
+    """Signal rows for one zone (log keys from next_key on)"""
+    if layout == "grid":
+        points = grid_points(box, count)
+    elif layout == "mumbai-roads":
+        points = mumbai_road_points(box, count, rng)
+    else:
+        points = road_points(generate_roads(box, zone["name"], rng), count)
+    phases = list(models.SignalPhase)
+    return [
+        signal_row(f"{prefix}{s + 1:05d}", next_key + s, zone["id"], lat, lon, rng.choice(phases))
+        for s, (lat, lon) in enumerate(points)
+    ]
+
+def next_log_key(conn) -> int:
+    return (conn.execute(select(func.max(models.Signal.log_key))).scalar() or 0) + 1
+
+def insert_rows(conn, zone_rows, signal_rows):
+    """Bulk Core inserts (one executemany per table)"""
+    if zone_rows:
+        conn.execute(insert(models.Zone), zone_rows)
+    if signal_rows:
+        conn.execute(insert(models.Signal), signal_rows)
+
+def delete_city(conn, city: str):
+    """Delete a city's zones, signals and their traffic logs; returns (zones, signals, logs)"""
+    zone_ids = select(models.Zone.id).where(models.Zone.city == city)
+    keys = select(models.Signal.log_key).where(models.Signal.zone_id.in_(zone_ids))
+    logs = conn.execute(delete(models.TrafficLog).where(models.TrafficLog.signal_key.in_(keys))).rowcount
+    conn.execute(delete(models.AIExplanation).where(models.AIExplanation.signal_id.in_(
+        select(models.Signal.id).where(models.Signal.zone_id.in_(zone_ids)))))
+    conn.execute(models.User.__table__.update().where(models.User.zone_id.in_(zone_ids)).values(zone_id=None))
+    signals = conn.execute(delete(models.Signal).where(models.Signal.zone_id.in_(zone_ids))).rowcount
+    zones = conn.execute(delete(models.Zone).where(models.Zone.city == city)).rowcount
+    return zones, signals, logs
+
+def seed_city(city: str, zones: int, signals: int, layout: str = "roads", seed_value: int = 42,
+              prefix: str = "SYN-", reset: bool = False) -> bool:
+    """Generate and insert a synthetic city in one transaction; False if the city already exists"""
+    rng = random.Random(seed_value)
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        if reset:
+            removed = delete_city(conn, city)
+            if removed[0]:
+                print(f"[OK] Removed {removed[0]} zones, {removed[1]} signals, {removed[2]} traffic logs of {city}")
+        existing = conn.execute(
+            select(func.count()).select_from(models.Zone).where(models.Zone.city == city)
+        ).scalar()
+        if existing:
+            print(f"[ERROR] {city} already has {existing} zones; use --reset or --cleanup")
+            return False
+        next_key = next_log_key(conn)
+
+        zone_rows, signal_rows = [], []
+        per_zone, extra = divmod(signals, zones)
+        for z, box in enumerate(zone_boxes(zones)):
+            zone = zone_row(f"{city} Zone {z + 1:03d}", city, (box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+            zone_rows.append(zone)
+            count = per_zone + (1 if z < extra else 0)
+            signal_rows += zone_signals(zone, box, count, f"{prefix}{z + 1:03d}-", next_key, layout, rng)
+            next_key += count
+        generated = time.perf_counter()
+        insert_rows(conn, zone_rows, signal_rows)
+    elapsed = time.perf_counter() - began
+    print(f"[OK] Seeded {city}: {len(zone_rows)} zones, {len(signal_rows)} signals ({layout}) in {elapsed:.2f}s "
+          f"(generate {generated - began:.2f}s, insert {elapsed - (generated - began):.2f}s, "
+          f"{len(signal_rows) / max(elapsed, 1e-9):,.0f} signals/s)")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk synthetic city seeder")
+    parser.add_argument("--city", default=SYNTHETIC_CITY, help="City name the zones are tagged with")
+    parser.add_argument("--zones", type=int, default=100)
+    parser.add_argument("--signals", type=int, default=100000, help="Total signals, spread evenly over the zones")
+    parser.add_argument("--layout", choices=["roads", "mumbai-roads", "grid"], default="roads",
+                        help="roads: along generated polylines; mumbai-roads: along re-centred MUMBAI_ROADS")
+    parser.add_argument("--prefix", default="SYN-", help="signal_id prefix (must be unique per city)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Replace the city if it exists")
+    parser.add_argument("--cleanup", action="store_true", help="Only delete the city")
+    args = parser.parse_args()
+
+    init_db()
+    if args.cleanup:
+        with engine.begin() as conn:
+            zones, signals, logs = delete_city(conn, args.city)
+        print(f"[OK] Removed {zones} zones, {signals} signals, {logs} traffic logs of {args.city}")
+        return
+    if not seed_city(args.city, args.zones, args.signals, args.layout, args.seed, args.prefix, args.reset):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Urban Flow edge agent - runs at the intersection and uploads traffic summaries"""
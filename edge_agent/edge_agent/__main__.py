@@ -0,0 +1,71 @@
+"""
+Command-line entry point
+
+    python -m edge_agent --backend http://localhost:8000 --token <EDGE_AGENT_TOKEN> --simulate MUM-S-001,MUM-S-002
+
+Without --simulate, events are read from stdin, one per line:
+    <signal_id>,<vehicle|pedestrian|queue|occupancy>[,<value>]
+"""
+import argparse
+import os
+import random
+import socket
+import sys
+import time
+from typing import Iterator, List
+
+from edge_agent.agent import EdgeAgent, Event
+from edge_agent.buffer import DiskBuffer
+from edge_agent.uploader import Uploader
+
+def stdin_events() -> Iterator[Event]:
+    for line in sys.stdin:
+        parts = line.strip().split(",")
+        if len(parts) < 2:
+            continue
+        try:
+            value = float(parts[2]) if len(parts) > 2 else 0.0
+        except ValueError:
+            continue
+        yield parts[0], parts[1], value
+
+def simulated_events(signal_ids: List[str], rate: float) -> Iterator[Event]:
+    """Detector events for the given signals at roughly `rate` events/second in total"""
+    while True:
+        signal_id = random.choice(signal_ids)
+        roll = random.random()
+        if roll < 0.7:
+            yield signal_id, "vehicle", random.uniform(0.2, 1.5)
+        elif roll < 0.85:
+            yield signal_id, "pedestrian", 0.0
+        else:
+            yield signal_id, "queue", float(random.randint(0, 30))
+        time.sleep(random.expovariate(rate))
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban Flow edge agent")
+    parser.add_argument("--backend", default=os.getenv("URBANFLOW_BACKEND", "http://localhost:8000"))
+    parser.add_argument("--token", default=os.getenv("EDGE_AGENT_TOKEN", ""))
+    parser.add_argument("--agent-id", default=os.getenv("EDGE_AGENT_ID") or socket.gethostname())
+    parser.add_argument("--interval", type=float, default=60.0, help="Summary interval in seconds")
+    parser.add_argument("--spool", default=os.getenv("EDGE_AGENT_SPOOL", "./edge_spool"))
+    parser.add_argument("--spool-mb", type=float, default=50.0)
+    parser.add_argument("--simulate", help="Comma-separated signal ids to simulate detectors for")
+    parser.add_argument("--rate", type=float, default=20.0, help="Simulated events per second")
+    args = parser.parse_args()
+
+    agent = EdgeAgent(
+        agent_id=args.agent_id,
+        uploader=Uploader(args.backend, args.token),
+        buffer=DiskBuffer(args.spool, max_bytes=int(args.spool_mb * 1024 * 1024)),
+        interval_seconds=args.interval,
+    )
+    events = simulated_events(args.simulate.split(","), args.rate) if args.simulate else stdin_events()
+    print(f"[OK] Edge agent {args.agent_id} uploading to {args.backend} every {args.interval:g}s")
+    try:
+        agent.run(events)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
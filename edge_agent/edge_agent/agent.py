@@ -0,0 +1,131 @@
+"""
+Edge agent main loop
+Consumes raw detector events, closes one summary per signal per interval and
+uploads summaries in compressed batches. Batches that can't be sent are
+spooled to disk and drained oldest-first once the uplink is back.
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from edge_agent.aggregator import IntervalAggregator
+from edge_agent.buffer import DiskBuffer
+from edge_agent.uploader import Uploader, encode_batch
+
+# A detector event: (signal_id, kind, value)
+#   kind "vehicle": value = seconds the detector was occupied by the vehicle
+#   kind "pedestrian": value ignored
+#   kind "queue": value = queue length sample
+#   kind "occupancy": value = occupied seconds
+Event = Tuple[str, str, float]
+
+RETRY_MIN_SECONDS = 5.0  # Backoff after a failed upload, doubling up to RETRY_MAX_SECONDS
+RETRY_MAX_SECONDS = 300.0
+
+class EdgeAgent:
+    def __init__(self, agent_id: str, uploader: Uploader, buffer: DiskBuffer,
+                 interval_seconds: float = 60.0, max_batch: int = 500):
+        self.agent_id = agent_id
+        self.uploader = uploader
+        self.buffer = buffer
+        self.interval_seconds = interval_seconds
+        self.max_batch = max_batch
+        self.aggregators: Dict[str, IntervalAggregator] = {}
+        self.ready: List[dict] = []
+        self.retry_delay = 0.0
+        self.retry_at = 0.0  # No upload attempts before this time (after failures)
+        self.stats = {
+            "detections": 0,
+            "summaries": 0,
+            "uploads": 0,
+            "bytes_sent": 0,
+            "spooled": 0,
+            "unknown_events": 0,
+        }
+
+    def handle(self, event: Event):
+        """Fold one raw detector event into its signal's current interval"""
+        signal_id, kind, value = event
+        aggregator = self.aggregators.get(signal_id)
+        if aggregator is None:
+            aggregator = self.aggregators[signal_id] = IntervalAggregator(signal_id, self.interval_seconds)
+        if kind == "vehicle":
+            aggregator.vehicle(value)
+        elif kind == "pedestrian":
+            aggregator.pedestrian()
+        elif kind == "queue":
+            aggregator.queue(int(value))
+        elif kind == "occupancy":
+            aggregator.occupancy(value)
+        else:
+            self.stats["unknown_events"] += 1
+            return
+        self.stats["detections"] += 1
+
+    def close_intervals(self, now: Optional[float] = None, force: bool = False):
+        """Close every interval that is due (or all of them when force is set)"""
+        now = now or time.time()
+        for aggregator in self.aggregators.values():
+            if force or aggregator.due(now):
+                summary = aggregator.close(now)
+                if summary is not None:
+                    self.ready.append(summary.to_dict())
+                    self.stats["summaries"] += 1
+
+    def _send(self, payload: bytes) -> bool:
+        now = time.time()
+        if now < self.retry_at:
+            return False
+        if self.uploader.send(payload):
+            self.stats["uploads"] += 1
+            self.stats["bytes_sent"] += len(payload)
+            self.retry_delay = 0.0
+            return True
+        self.retry_delay = min(max(self.retry_delay * 2, RETRY_MIN_SECONDS), RETRY_MAX_SECONDS)
+        self.retry_at = now + self.retry_delay
+        return False
+
+    def flush(self):
+        """Upload ready summaries, spooling them on failure; then drain the spool"""
+        while self.ready:
+            batch, self.ready = self.ready[:self.max_batch], self.ready[self.max_batch:]
+            payload = encode_batch(self.agent_id, batch)
+            if not self._send(payload):
+                self.buffer.put(payload)
+                self.stats["spooled"] += 1
+                # Uplink is down; keep the rest on disk too rather than retrying now
+                for start in range(0, len(self.ready), self.max_batch):
+                    self.buffer.put(encode_batch(self.agent_id, self.ready[start:start + self.max_batch]))
+                    self.stats["spooled"] += 1
+                self.ready = []
+                return
+        while True:
+            spooled = self.buffer.oldest()
+            if spooled is None:
+                return
+            path, payload = spooled
+            if not self._send(payload):
+                return
+            self.buffer.remove(path)
+
+    def reduction_ratio(self) -> float:
+        """Raw detections per uploaded summary"""
+        if not self.stats["summaries"]:
+            return 0.0
+        return self.stats["detections"] / self.stats["summaries"]
+
+    def run(self, events: Iterable[Event], tick_seconds: float = 1.0):
+        """Consume events until the source is exhausted, closing intervals as they fall due"""
+        last_check = time.time()
+        try:
+            for event in events:
+                self.handle(event)
+                now = time.time()
+                if now - last_check >= tick_seconds:
+                    last_check = now
+                    self.close_intervals(now)
+                    if self.ready:
+                        self.flush()
+        finally:
+            self.close_intervals(force=True)
+            self.flush()
+            print(f"[INFO] Edge agent stats: {self.stats}, reduction {self.reduction_ratio():.1f}x")
@@ -0,0 +1,71 @@
+"""Per-interval aggregation of raw detector events"""
+import time
+from typing import List, Optional
+
+from edge_agent.schema import IntervalSummary
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class IntervalAggregator:
+    def __init__(self, signal_id: str, interval_seconds: float = 60.0):
+        self.signal_id = signal_id
+        self.interval_seconds = interval_seconds
+        self._reset(time.time())
+
+    def _reset(self, start: float):
+        self.interval_start = start
+        self.vehicles = 0
+        self.pedestrians = 0
+        self.queue_samples: List[int] = []
+        self.occupied_seconds = 0.0
+        self.detections = 0
+
+    def vehicle(self, occupied_seconds: float = 0.0):
+        """A vehicle crossed the detector, occupying it for occupied_seconds"""
+        self.vehicles += 1
+        self.occupied_seconds += occupied_seconds
+        self.detections += 1
+
+    def pedestrian(self):
+        self.pedestrians += 1
+        self.detections += 1
+
+    def queue(self, length: int):
+        """A queue-length sample from the approach camera/loop"""
+        self.queue_samples.append(length)
+        self.detections += 1
+
+    def occupancy(self, occupied_seconds: float):
+        """Detector-reported occupied time not tied to a single vehicle"""
+        self.occupied_seconds += occupied_seconds
+        self.detections += 1
+
+    def due(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) - self.interval_start >= self.interval_seconds
+
+    def close(self, now: Optional[float] = None) -> Optional[IntervalSummary]:
+        """Finish the current interval and return its summary (None if nothing happened)"""
+        now = now or time.time()
+        elapsed = max(now - self.interval_start, 1e-6)
+        summary = None
+        if self.detections:
+            queues = sorted(self.queue_samples)
+            summary = IntervalSummary(
+                signal_id=self.signal_id,
+                timestamp=now,
+                interval_seconds=round(elapsed, 3),
+                vehicle_count=self.vehicles,
+                pedestrian_count=self.pedestrians,
+                queue_length=percentile(queues, 0.5),
+                density=round(min(1.0, self.occupied_seconds / elapsed), 3),
+                queue_p90=percentile(queues, 0.9),
+                queue_max=queues[-1] if queues else 0,
+                detections=self.detections,
+            )
+        self._reset(now)
+        return summary
@@ -0,0 +1,50 @@
+"""Local disk spool for batches that could not be uploaded"""
+import os
+import time
+from typing import List, Optional, Tuple
+
+class DiskBuffer:
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _files(self) -> List[str]:
+        return sorted(f for f in os.listdir(self.directory) if f.endswith(".json.gz"))
+
+    def put(self, payload: bytes):
+        """Spool one compressed batch, dropping the oldest files beyond max_bytes"""
+        name = f"{time.time_ns():020d}.json.gz"
+        tmp = os.path.join(self.directory, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.directory, name))  # Atomic: no half-written batches
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        files = self._files()
+        sizes = [os.path.getsize(os.path.join(self.directory, f)) for f in files]
+        total = sum(sizes)
+        for name, size in zip(files, sizes):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+            print(f"[WARNING] Edge buffer full, dropped {name}")
+
+    def oldest(self) -> Optional[Tuple[str, bytes]]:
+        files = self._files()
+        if not files:
+            return None
+        path = os.path.join(self.directory, files[0])
+        with open(path, "rb") as f:
+            return path, f.read()
+
+    def remove(self, path: str):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def __len__(self) -> int:
+        return len(self._files())
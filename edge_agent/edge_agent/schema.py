@@ -0,0 +1,26 @@
+"""
+Summary schema shared with the backend
+Field names mirror backend/app/db/models.py TrafficLog so a summary maps
+one-to-one onto a traffic log row; the extra fields carry the detail that
+only the edge can compute.
+"""
+from dataclasses import dataclass, asdict
+
+# TrafficLog columns carried by every summary
+TRAFFIC_LOG_FIELDS = ("vehicle_count", "pedestrian_count", "queue_length", "density", "timestamp")
+
+@dataclass
+class IntervalSummary:
+    signal_id: str  # Signal code, e.g. MUM-S-001
+    timestamp: float  # Interval end, epoch seconds
+    interval_seconds: float
+    vehicle_count: int
+    pedestrian_count: int
+    queue_length: int  # Median queue over the interval
+    density: float  # Detector occupancy (0.0 to 1.0)
+    queue_p90: int = 0
+    queue_max: int = 0
+    detections: int = 0  # Raw events folded into this summary
+
+    def to_dict(self) -> dict:
+        return asdict(self)
@@ -0,0 +1,50 @@
+"""Compressed batch upload to the backend"""
+import gzip
+import json
+import urllib.error
+import urllib.request
+from typing import List
+
+# Statuses meaning the payload itself is bad: retrying the same batch can never succeed.
+# Everything else (401/403 bad or rotated token, 404 uploads disabled, 429, 5xx) is retried.
+REJECTED_STATUSES = (400, 413, 422)
+
+def encode_batch(agent_id: str, summaries: List[dict]) -> bytes:
+    """gzip-compressed JSON body for POST /api/v1/edge/batches"""
+    body = json.dumps({"agent_id": agent_id, "summaries": summaries}, separators=(",", ":"))
+    return gzip.compress(body.encode("utf-8"))
+
+class Uploader:
+    def __init__(self, backend_url: str, token: str, timeout: float = 10.0):
+        self.url = backend_url.rstrip("/") + "/api/v1/edge/batches"
+        self.token = token
+        self.timeout = timeout
+
+    def send(self, payload: bytes) -> bool:
+        """POST one compressed batch; False if it should stay spooled and be retried later"""
+        request = urllib.request.Request(
+            self.url,
+            data=payload,
+            method="POST",
+            headers={
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+                "X-Edge-Token": self.token,
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return 200 <= response.status < 300
+        except urllib.error.HTTPError as e:
+            if e.code in REJECTED_STATUSES:
+                # The backend rejected the batch itself; retrying won't help
+                print(f"[ERROR] Batch rejected by backend: HTTP {e.code}")
+                return True
+            if e.code in (401, 403, 404):
+                print(f"[WARNING] Upload refused: HTTP {e.code} (check --token and EDGE_AGENT_TOKEN); keeping the batch")
+            else:
+                print(f"[WARNING] Upload failed: HTTP {e.code}")
+            return False
+        except (urllib.error.URLError, OSError) as e:
+            print(f"[WARNING] Uplink unavailable: {e}")
+            return False
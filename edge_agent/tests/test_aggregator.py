@@ -0,0 +1,44 @@
+"""Interval aggregation windows"""
+from edge_agent.aggregator import IntervalAggregator, percentile
+
+def test_percentile_nearest_rank():
+    assert percentile([], 0.5) == 0
+    assert percentile([1, 2, 3, 4, 5], 0.5) == 3
+    assert percentile([1, 2, 3, 4, 5], 0.9) == 5
+    assert percentile([7], 0.9) == 7
+
+def test_interval_due_after_window():
+    aggregator = IntervalAggregator("MUM-S-001", interval_seconds=60)
+    aggregator._reset(1000.0)
+    assert not aggregator.due(1059.9)
+    assert aggregator.due(1060.0)
+
+def test_close_summarizes_window():
+    aggregator = IntervalAggregator("MUM-S-001", interval_seconds=60)
+    aggregator._reset(1000.0)
+    for _ in range(12):
+        aggregator.vehicle(1.5)
+    aggregator.pedestrian()
+    for length in (2, 4, 6, 8, 10):
+        aggregator.queue(length)
+    summary = aggregator.close(1060.0)
+    assert summary.signal_id == "MUM-S-001"
+    assert summary.timestamp == 1060.0 and summary.interval_seconds == 60.0
+    assert (summary.vehicle_count, summary.pedestrian_count) == (12, 1)
+    assert (summary.queue_length, summary.queue_p90, summary.queue_max) == (6, 10, 10)
+    assert summary.density == 0.3  # 18 occupied seconds over 60
+    assert summary.detections == 18
+
+def test_close_starts_next_window():
+    aggregator = IntervalAggregator("MUM-S-001", interval_seconds=60)
+    aggregator._reset(1000.0)
+    aggregator.vehicle(0.5)
+    aggregator.close(1060.0)
+    assert aggregator.interval_start == 1060.0
+    assert aggregator.close(1120.0) is None  # Nothing detected in the second window
+
+def test_density_capped_at_one():
+    aggregator = IntervalAggregator("MUM-S-001", interval_seconds=10)
+    aggregator._reset(0.0)
+    aggregator.occupancy(25.0)
+    assert aggregator.close(10.0).density == 1.0
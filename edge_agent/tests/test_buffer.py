@@ -0,0 +1,68 @@
+"""Disk spool and replay"""
+import gzip
+import json
+
+from edge_agent.agent import EdgeAgent
+from edge_agent.buffer import DiskBuffer
+from edge_agent.uploader import encode_batch
+
+class FakeUploader:
+    """Records payloads; fails while `up` is False"""
+    def __init__(self):
+        self.up = True
+        self.sent = []
+
+    def send(self, payload: bytes) -> bool:
+        if self.up:
+            self.sent.append(json.loads(gzip.decompress(payload)))
+        return self.up
+
+def test_buffer_oldest_first(tmp_path):
+    buffer = DiskBuffer(str(tmp_path))
+    for i in range(3):
+        buffer.put(encode_batch("agent", [{"n": i}]))
+    assert len(buffer) == 3
+    path, payload = buffer.oldest()
+    assert json.loads(gzip.decompress(payload))["summaries"] == [{"n": 0}]
+    buffer.remove(path)
+    assert len(buffer) == 2
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_buffer_drops_oldest_beyond_limit(tmp_path):
+    payload = encode_batch("agent", [{"filler": "x" * 1000}])
+    buffer = DiskBuffer(str(tmp_path), max_bytes=len(payload) * 2)
+    for _ in range(4):
+        buffer.put(payload)
+    assert len(buffer) == 2
+
+def test_spool_while_down_then_replay_in_order(tmp_path):
+    uploader = FakeUploader()
+    agent = EdgeAgent("agent", uploader, DiskBuffer(str(tmp_path)), interval_seconds=60, max_batch=2)
+
+    uploader.up = False
+    agent.ready = [{"n": i} for i in range(5)]
+    agent.flush()
+    assert len(agent.buffer) == 3 and agent.ready == []
+    assert agent.stats["spooled"] == 3
+
+    uploader.up = True
+    agent.retry_at = 0.0  # Backoff elapsed
+    agent.ready = [{"n": 5}]
+    agent.flush()
+    assert len(agent.buffer) == 0
+    replayed = [summary["n"] for batch in uploader.sent for summary in batch["summaries"]]
+    assert replayed == [5, 0, 1, 2, 3, 4]
+
+def test_backoff_after_failure(tmp_path):
+    uploader = FakeUploader()
+    agent = EdgeAgent("agent", uploader, DiskBuffer(str(tmp_path)))
+    uploader.up = False
+    agent.ready = [{"n": 0}]
+    agent.flush()
+    assert agent.retry_delay == 5.0 and agent.retry_at > 0
+
+    # Within the backoff the uplink is not tried again, even though it is back
+    uploader.up = True
+    agent.ready = [{"n": 1}]
+    agent.flush()
+    assert uploader.sent == [] and len(agent.buffer) == 2
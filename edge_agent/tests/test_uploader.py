@@ -0,0 +1,45 @@
+"""Which upload failures keep a batch spooled"""
+import io
+import urllib.error
+
+import pytest
+
+from edge_agent import uploader as uploader_module
+from edge_agent.uploader import Uploader
+
+class OkResponse:
+    status = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def respond_with(monkeypatch, outcome):
+    def urlopen(request, timeout):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(uploader_module.urllib.request, "urlopen", urlopen)
+
+def http_error(code: int) -> urllib.error.HTTPError:
+    return urllib.error.HTTPError("http://backend/api/v1/edge/batches", code, "error", {}, io.BytesIO())
+
+def test_accepted(monkeypatch):
+    respond_with(monkeypatch, OkResponse())
+    assert Uploader("http://backend", "token").send(b"batch")
+
+@pytest.mark.parametrize("code", [400, 413, 422])
+def test_payload_rejections_are_dropped(monkeypatch, code):
+    respond_with(monkeypatch, http_error(code))
+    assert Uploader("http://backend", "token").send(b"batch")
+
+@pytest.mark.parametrize("code", [401, 403, 404, 408, 429, 500, 502, 503])
+def test_other_failures_are_retried(monkeypatch, code):
+    respond_with(monkeypatch, http_error(code))
+    assert not Uploader("http://backend", "token").send(b"batch")
+
+def test_uplink_down_is_retried(monkeypatch):
+    respond_with(monkeypatch, urllib.error.URLError("connection refused"))
+    assert not Uploader("http://backend", "token").send(b"batch")
@@ -126,11 +126,20 @@ export default function TrafficControlCenter() {
       }
       
       if (message.type === 'road_congestion_update' && message.data?.congestion) {
-        // Update all roads with new congestion level
-        setRoads(prevRoads => prevRoads.map(road => ({
-          ...road,
-          congestion: message.data.congestion as 'low' | 'medium' | 'high' | 'severe',
-        })))
+        // Per-segment levels for roads the signals report on; the city-wide level for the rest
+        const segments = new Map<string, any>((message.data.segments || []).map((s: any) => [s.id, s]))
+        setRoads(prevRoads => prevRoads.map(road => {
+          const segment = segments.get(road.id)
+          return segment ? {
+            ...road,
+            congestion: segment.congestion as 'low' | 'medium' | 'high' | 'severe',
+            speed: Math.round(segment.speed_kmh),
+            vehicleCount: segment.vehicle_count,
+          } : {
+            ...road,
+            congestion: message.data.congestion as 'low' | 'medium' | 'high' | 'severe',
+          }
+        }))
       }
     }
     